@@ -0,0 +1,68 @@
+"""Times appending a month of new actuals to a large ledger against reloading the whole ledger with the new month
+
+Run from the repository root (optionally pass the number of items and months of the ledger):
+    > python benchmarks/benchmark_append.py 10000 120
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evm_calc import (
+    COST_SCHEMA,
+    append_cost_rows,
+    build_baseline_monthly,
+    build_item_index,
+    load_data_file,
+    make_cost_ledger,
+    merge_baseline_monthly,
+    prepare_append,
+)
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    ledger_df = make_cost_ledger(n_items, n_months)
+
+    # The next month's actuals: two rows for one item in ten
+    month_df = make_cost_ledger(n_items // 10, 1, start=ledger_df['Date'].max() + pd.offsets.MonthBegin(1), seed=1)
+    month_df['Item Number'] = month_df['Item Number'].cat.rename_categories(lambda item: str(int(item) * 10 - 90009))
+
+    with tempfile.TemporaryDirectory() as directory:
+        ledger_path = os.path.join(directory, "ledger.parquet")
+        month_path = os.path.join(directory, "month.parquet")
+        ledger_df.to_parquet(ledger_path)
+        month_df.to_parquet(month_path)
+        pd.concat([ledger_df.astype({'Item Number': str}), month_df.astype({'Item Number': str})]).to_parquet(os.path.join(directory, "full.parquet"))
+        print(f"{len(ledger_df):,} cost rows for {n_items:,} items, appending {len(month_df):,} rows")
+
+        cost_df, _ = load_data_file(ledger_path, COST_SCHEMA, cache_dir=None)
+        indexed_df, _ = build_item_index(cost_df)
+        baseline_monthly = build_baseline_monthly(indexed_df)
+
+        # Reload: read, index and bucket the whole ledger including the new month
+        start = time.perf_counter()
+        full_df, _ = load_data_file(os.path.join(directory, "full.parquet"), COST_SCHEMA, cache_dir=None)
+        full_df, full_offsets = build_item_index(full_df)
+        full_monthly = build_baseline_monthly(full_df)
+        print(f"  {'reload the whole ledger':<28} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+        # Append: read the new month only and merge it into the indexed ledger and monthly baseline
+        start = time.perf_counter()
+        new_rows, _ = load_data_file(month_path, COST_SCHEMA, cache_dir=None)
+        new_rows, report = prepare_append(indexed_df, new_rows)
+        merged_df, merged_offsets = append_cost_rows(indexed_df, new_rows)
+        merged_monthly = merge_baseline_monthly(baseline_monthly, new_rows)
+        print(f"  {'append the new month':<28} {(time.perf_counter() - start) * 1000:9.1f} ms ({report['appended']:,} rows for {len(report['items']):,} items)")
+
+    # Both give each item the same rows and monthly baseline
+    assert merged_offsets == full_offsets
+    assert all(merged_monthly[item].equals(full_monthly[item]) for item in full_monthly)
+
+
+if __name__ == "__main__":
+    main()
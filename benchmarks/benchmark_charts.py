@@ -0,0 +1,62 @@
+"""Times building the line and bubble charts and measures their JSON size, at full resolution and as displayed
+
+Full resolution draws every period with SVG traces; displayed is what the app sends, with long series downsampled
+and drawn with WebGL. Run from the repository root (optionally pass the numbers of periods to chart); Streamlit
+warns that it is not running under streamlit run, which can be ignored:
+    > python benchmarks/benchmark_charts.py 120 520 5000 50000
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main as app
+from evm_calc import calculate_evm
+
+
+def make_combined_data_set(n_periods, seed=0):
+    """weekly baseline and modified costs with EVM columns"""
+    rng = np.random.default_rng(seed)
+    combined_data_set = pd.DataFrame({
+        'Date': pd.period_range('2020-01-05', periods=n_periods, freq='W-SUN').to_timestamp(how='end').normalize(),
+        'Initial_Costs': rng.uniform(0, 100, n_periods),
+        'Modified_Costs': rng.uniform(0, 120, n_periods),
+    })
+    return calculate_evm(combined_data_set)
+
+
+def time_charts(combined_data_set, evm_summary_data, repeats=5):
+    """mean build and JSON time in ms and the JSON size in KB of both charts"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        figures = (
+            app.plot_line_chart_with_percent_delta(combined_data_set, evm_summary_data, "Baseline", "Modified", ""),
+            app.plot_bubble_chart(combined_data_set, "week"),
+        )
+    build_ms = (time.perf_counter() - start) / repeats * 1000
+
+    start = time.perf_counter()
+    sizes = [len(figure.to_json()) for figure in figures]
+    json_ms = (time.perf_counter() - start) * 1000
+    return build_ms, json_ms, sum(sizes) / 1024
+
+
+def main():
+    period_counts = [int(value) for value in sys.argv[1:]] or [120, 520, 5000, 50000]
+    display_settings = (app.MAX_DISPLAY_POINTS, app.WEBGL_POINT_THRESHOLD)
+
+    print(f"{'periods':>8}  {'':<16} {'build ms':>9} {'JSON ms':>8} {'JSON KB':>9}")
+    for n_periods in period_counts:
+        combined_data_set, evm_summary_data = make_combined_data_set(n_periods)
+        for label, (max_points, webgl_threshold) in (("full resolution", (sys.maxsize, sys.maxsize)), ("displayed", display_settings)):
+            app.MAX_DISPLAY_POINTS, app.WEBGL_POINT_THRESHOLD = max_points, webgl_threshold
+            build_ms, json_ms, json_kb = time_charts(combined_data_set, evm_summary_data)
+            print(f"{n_periods:>8,}  {label:<16} {build_ms:9.1f} {json_ms:8.1f} {json_kb:9,.0f}")
+    app.MAX_DISPLAY_POINTS, app.WEBGL_POINT_THRESHOLD = display_settings
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compares the memory per row and pipeline times of the standard and compact cost tables
+
+Strings is the table as format_cost_data leaves it (item numbers and types as strings), standard is the table from
+load_data_file (categoricals) and compact is compact_cost_data at each cost precision. Run from the repository root
+(optionally pass the number of items and months; 20000 items x 120 months is a 4.8M row ledger):
+    > python benchmarks/benchmark_compact.py 20000 120
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmark_portfolio import make_portfolio
+from evm_calc import (
+    COST_DTYPES,
+    build_baseline_monthly,
+    build_item_index,
+    build_portfolio_index,
+    compact_cost_data,
+    format_cost_data,
+    memory_report,
+    run_scenario,
+)
+
+
+def time_ms(function, repeats=1):
+    """mean time of function() in ms"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    cost_df, attribute_df = make_portfolio(n_items, n_months)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+    tables = {
+        "strings": format_cost_data(cost_df.astype({'Item Number': object, 'Type': object})),
+        "standard": cost_df.astype({'Item Number': 'category', 'Type': 'category'}),
+    }
+    for cost_dtype in COST_DTYPES:
+        tables[f"compact {cost_dtype}"] = compact_cost_data(tables["standard"], cost_dtype)
+
+    user_attributes_dictionary = {"item_lead_time": 60.5, "item_cost": 30.0, "item_yeild": 0.9, "item_hours": 5.0}
+    print(f"{len(cost_df):,} cost rows, {n_items:,} items")
+    print(f"  {'table':<18} {'bytes/row':>9} {'MB':>7} {'scenario ms':>12} {'baseline ms':>12} {'portfolio ms':>13}")
+    for label, df in tables.items():
+        report = memory_report(df)
+        indexed_df, cost_item_offsets = build_item_index(df)
+        items = list(cost_item_offsets)[:50]
+        scenario_ms = time_ms(lambda: [run_scenario(indexed_df, attribute_df, user_attributes_dictionary, item_number=item, cost_item_offsets=cost_item_offsets, attribute_item_offsets=attribute_item_offsets) for item in items]) / len(items)
+        baseline_ms = time_ms(lambda: build_baseline_monthly(indexed_df))
+        portfolio_ms = time_ms(lambda: build_portfolio_index(indexed_df))
+        print(f"  {label:<18} {report['Bytes per row'].iloc[-1]:9.1f} {report['Bytes'].iloc[-1] / 1e6:7,.0f} {scenario_ms:12.2f} {baseline_ms:12.0f} {portfolio_ms:13.0f}")
+
+
+if __name__ == "__main__":
+    main()
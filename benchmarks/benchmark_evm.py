@@ -0,0 +1,73 @@
+"""Compares the vectorized calculate_evm against the original per-row loop
+
+Run from the repository root:
+    > python benchmarks/benchmark_evm.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evm_calc import calculate_evm, calculate_evm_arrays
+
+# The original loop is quadratic, so it is skipped above this many periods
+LOOP_LIMIT = 10_000
+
+
+def calculate_evm_loop(combined_data_set):
+    """the original calculate_evm implementation, kept for comparison"""
+    pv_to_date_list = []
+    ac_to_date_list = []
+    BAC = combined_data_set['Initial_Costs'].sum()
+    EAC = combined_data_set['Modified_Costs'].sum()
+    for idx in range(len(combined_data_set)):
+        current_data = combined_data_set.iloc[:idx + 1]
+        PV_to_date = current_data['Initial_Costs'].sum()
+        pv_to_date_list.append(PV_to_date)
+        AC_to_date = current_data['Modified_Costs'].sum()
+        ac_to_date_list.append(AC_to_date)
+    combined_data_set['PV_to_Date'] = pv_to_date_list
+    combined_data_set['AC_to_Date'] = ac_to_date_list
+    return combined_data_set, {'BAC': BAC, 'EAC': EAC}
+
+
+def make_combined_data_set(n_periods, seed=0):
+    """creates a random aligned baseline/modified cost series"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Date': pd.date_range('2000-01-31', periods=n_periods, freq='D'),
+        'Initial_Costs': rng.uniform(0, 100, n_periods),
+        'Modified_Costs': rng.uniform(0, 120, n_periods),
+    })
+
+
+def time_call(func, *args):
+    """returns the wall time of a single call in seconds"""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'periods':>10} {'loop (s)':>12} {'vectorized (s)':>15} {'speedup':>10}")
+    for n_periods in (100, 10_000, 1_000_000):
+        data = make_combined_data_set(n_periods)
+        vectorized = time_call(calculate_evm, data.copy())
+        if n_periods <= LOOP_LIMIT:
+            loop = time_call(calculate_evm_loop, data.copy())
+            print(f"{n_periods:>10,} {loop:>12.4f} {vectorized:>15.4f} {loop / vectorized:>9.0f}x")
+        else:
+            print(f"{n_periods:>10,} {'skipped':>12} {vectorized:>15.4f} {'-':>10}")
+
+    # Batch mode: many items evaluated in one call
+    rng = np.random.default_rng(1)
+    initial = rng.uniform(0, 100, (10_000, 120))
+    modified = rng.uniform(0, 120, (10_000, 120))
+    print(f"batch of 10,000 items x 120 periods: {time_call(calculate_evm_arrays, initial, modified):.4f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compares filtering a large cost table by copy-and-compare against the pre-built item index
+
+Run from the repository root (optionally pass the number of rows and items):
+    > python benchmarks/benchmark_filter.py 5000000 5000
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evm_calc import build_item_index, filter_data
+
+
+def make_cost_df(n_rows, n_items, seed=0):
+    """creates a random cost table shaped like the uploaded cost data"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Date': pd.Timestamp('2024-01-31') + pd.to_timedelta(rng.integers(0, 3650, n_rows), unit='D'),
+        'Cost': rng.uniform(0, 100, n_rows),
+        'Item Number': (10000 + rng.integers(0, n_items, n_rows)).astype(str),
+        'Type': np.where(rng.random(n_rows) < 0.5, 'Labor', 'Material'),
+    })
+
+
+def measure(func, *args):
+    """returns the wall time in seconds and the peak traced allocation in bytes of a single call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_items = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    cost_df = make_cost_df(n_rows, n_items)
+    item = cost_df['Item Number'].iloc[0]
+
+    index_time, index_peak = measure(build_item_index, cost_df)
+    indexed_df, item_offsets = build_item_index(cost_df)
+
+    copy_time, copy_peak = measure(filter_data, cost_df, item)
+    view_time, view_peak = measure(filter_data, indexed_df, item, item_offsets)
+
+    print(f"{n_rows:,} rows, {n_items:,} items")
+    print(f"  one-time index build: {index_time:.4f} s, peak {index_peak / 1e6:,.1f} MB")
+    print(f"  filter (copy):        {copy_time:.4f} s, peak {copy_peak / 1e6:,.1f} MB")
+    print(f"  filter (indexed):     {view_time:.6f} s, peak {view_peak / 1e6:,.3f} MB")
+    print(f"  generate_charts filters four times per rerun: {4 * copy_time:.4f} s -> {4 * view_time:.6f} s")
+
+
+if __name__ == "__main__":
+    main()
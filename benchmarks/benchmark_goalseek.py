@@ -0,0 +1,76 @@
+"""Times goal seek on one item against finding the same value by bisection, one run_scenario (slider move) per step
+
+Run from the repository root (optionally pass the number of cost rows of the item):
+    > python benchmarks/benchmark_goalseek.py 1000000
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evm_calc import (
+    ATTRIBUTE_SCHEMA,
+    COST_SCHEMA,
+    base_slider_values,
+    build_baseline_monthly,
+    build_item_index,
+    check_schema,
+    goal_seek,
+    make_attributes,
+    make_cost_ledger,
+    prepare_sweep_inputs,
+    run_scenario,
+    sweep_ranges,
+)
+
+
+def bisect_cost(inputs, base_values, high, target, steps):
+    """the largest Material Cost keeping EAC at or under target, by bisection with one scenario run per step"""
+    low = 0.0
+    for _ in range(steps):
+        middle = (low + high) / 2
+        _, evm_summary_data = run_scenario(user_attributes_dictionary=dict(base_values, item_cost=middle), **inputs)
+        if evm_summary_data['EAC'] <= target:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cost_df, _ = check_schema(make_cost_ledger(1, 120, n_rows), COST_SCHEMA)
+    attribute_df, _ = check_schema(make_attributes(1), ATTRIBUTE_SCHEMA)
+    cost_df, cost_item_offsets = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+    item_number = list(cost_item_offsets)[0]
+    item_rows, initial_attributes = prepare_sweep_inputs(cost_df, attribute_df, [item_number], cost_item_offsets, attribute_item_offsets)[item_number]
+    base_values = base_slider_values(initial_attributes)
+    ranges = sweep_ranges(base_values, spread=5.0)
+    inputs = dict(
+        cost_df=cost_df,
+        attributes_df=attribute_df,
+        item_number=item_number,
+        cost_item_offsets=cost_item_offsets,
+        attribute_item_offsets=attribute_item_offsets,
+        baseline_monthly=build_baseline_monthly(cost_df),
+    )
+
+    # Budget 10% over the item's BAC
+    _, evm_summary_data = run_scenario(user_attributes_dictionary=base_values, **inputs)
+    target = evm_summary_data['BAC'] * 1.1
+    print(f"one item with {n_rows:,} cost rows, target EAC {target:,.2f}")
+
+    start = time.perf_counter()
+    results_df = goal_seek(item_rows, initial_attributes, base_values, 'EAC', target, ranges=ranges)
+    print(f"  {'goal seek, all four attributes':<36} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    print(results_df[['Attribute', 'Status', 'Limit', 'Value', 'EAC']].to_string(index=False))
+
+    # The same precision for one attribute takes log2(65 ** 4) steps of bisection
+    start = time.perf_counter()
+    value = bisect_cost(inputs, base_values, ranges['item_cost'][1], target, 24)
+    print(f"  {'bisection by slider moves, Cost only':<36} {(time.perf_counter() - start) * 1000:9.1f} ms (Cost {value:,.4f})")
+
+
+if __name__ == "__main__":
+    main()
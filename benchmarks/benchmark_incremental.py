@@ -0,0 +1,69 @@
+"""Times a slider move on one large item with the full pipeline and with the incremental evaluator
+
+Run from the repository root (optionally pass the number of cost rows of the item):
+    > python benchmarks/benchmark_incremental.py 1000000
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evm_calc import build_baseline_monthly, build_item_index, run_scenario
+
+
+def make_item(n_rows, seed=0):
+    """creates one item's cost rows spread over ten years, and its attributes"""
+    rng = np.random.default_rng(seed)
+    cost_df = pd.DataFrame({
+        'Date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 3650, n_rows), unit='D'),
+        'Cost': rng.uniform(0, 100, n_rows),
+        'Item Number': '10001',
+        'Type': np.where(rng.random(n_rows) < 0.5, 'Labor', 'Material'),
+    })
+    attribute_df = pd.DataFrame({'Item Number': ['10001'], 'Cost': [20.0], 'Lead Time': [50.0], 'Yield': [0.95], 'Hours': [2.0]})
+    return cost_df, attribute_df
+
+
+def time_moves(label, moves, **kwargs):
+    """runs each slider setting in turn and prints the mean time per move"""
+    start = time.perf_counter()
+    for user_attributes_dictionary in moves:
+        run_scenario(item_number='10001', user_attributes_dictionary=user_attributes_dictionary, **kwargs)
+    print(f"  {label:<34} {(time.perf_counter() - start) / len(moves) * 1000:8.2f} ms per move")
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cost_df, attribute_df = make_item(n_rows)
+    cost_df, cost_item_offsets = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+    inputs = dict(
+        cost_df=cost_df,
+        attributes_df=attribute_df,
+        cost_item_offsets=cost_item_offsets,
+        attribute_item_offsets=attribute_item_offsets,
+        baseline_monthly=build_baseline_monthly(cost_df),
+    )
+
+    # Dragging the Material Cost slider, then the Lead Time slider
+    base = {"item_lead_time": 50, "item_cost": 20.0, "item_yeild": 0.95, "item_hours": 2.0}
+    cost_moves = [dict(base, item_cost=value) for value in np.linspace(10, 60, 20)]
+    lead_time_moves = [dict(base, item_lead_time=value) for value in range(50, 250, 10)]
+
+    print(f"one item with {n_rows:,} cost rows")
+    time_moves("full pipeline, cost slider", cost_moves, **inputs)
+    time_moves("full pipeline, lead time slider", lead_time_moves, **inputs)
+
+    evaluators = {}
+    start = time.perf_counter()
+    run_scenario(item_number='10001', user_attributes_dictionary=base, evaluators=evaluators, **inputs)
+    print(f"  {'incremental, first evaluation':<34} {(time.perf_counter() - start) * 1000:8.2f} ms")
+    time_moves("incremental, cost slider", cost_moves, evaluators=evaluators, **inputs)
+    time_moves("incremental, lead time slider", lead_time_moves, evaluators=evaluators, **inputs)
+
+
+if __name__ == "__main__":
+    main()
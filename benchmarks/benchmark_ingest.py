@@ -0,0 +1,51 @@
+"""Times loading a large cost file: the original read and format, the typed loader, its cache and a parquet upload
+
+Run from the repository root (optionally pass the number of items and months; rows = items x months x 2):
+    > python benchmarks/benchmark_ingest.py 5000 100
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evm_calc import COST_SCHEMA, format_cost_data, load_data_file, read_data_file
+
+from benchmark_portfolio import make_portfolio
+
+
+def timed(label, function):
+    """runs function once, prints how long it took and returns its result"""
+    start = time.perf_counter()
+    result = function()
+    print(f"  {label:<32} {time.perf_counter() - start:.3f} s")
+    return result
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    cost_df, _ = make_portfolio(n_items, n_months)
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        csv_path = os.path.join(work_dir, "costs.csv")
+        parquet_path = os.path.join(work_dir, "costs.parquet")
+        cache_dir = os.path.join(work_dir, "cache")
+        cost_df.to_csv(csv_path, index=False, date_format="%m/%d/%Y")
+        cost_df.to_parquet(parquet_path)
+
+        print(f"{len(cost_df):,} cost rows ({os.path.getsize(csv_path) / 1e6:.0f} MB csv)")
+        timed("read_csv + format_cost_data", lambda: format_cost_data(read_data_file(csv_path)))
+        timed("typed csv load, inferred dates", lambda: load_data_file(csv_path, COST_SCHEMA, cache_dir=None))
+        timed("typed csv load, date format", lambda: load_data_file(csv_path, COST_SCHEMA, "%m/%d/%Y", cache_dir=None))
+        timed("typed csv load, filling cache", lambda: load_data_file(csv_path, COST_SCHEMA, "%m/%d/%Y", cache_dir))
+        timed("same file again, from cache", lambda: load_data_file(csv_path, COST_SCHEMA, "%m/%d/%Y", cache_dir))
+        timed("parquet upload", lambda: load_data_file(parquet_path, COST_SCHEMA, cache_dir=None))
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Times a Monte Carlo simulation of one item and reports its peak memory
+
+Run from the repository root (optionally pass the number of samples, months and the chunk size):
+    > python benchmarks/benchmark_montecarlo.py 100000 120 2000
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evm_calc import base_slider_values, build_item_index, monte_carlo_percentiles, prepare_sweep_inputs, run_monte_carlo
+
+from benchmark_portfolio import make_portfolio
+
+
+def main():
+    n_samples = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    chunk_size = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    cost_df, attribute_df = make_portfolio(1, n_months)
+    cost_df, cost_item_offsets = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+
+    item_inputs = prepare_sweep_inputs(cost_df, attribute_df, list(cost_item_offsets), cost_item_offsets, attribute_item_offsets)
+    item_rows, initial_attributes = next(iter(item_inputs.values()))
+    base_values = base_slider_values(initial_attributes)
+    lead_time, item_yield = base_values['item_lead_time'], base_values['item_yeild']
+    distributions = {
+        'item_lead_time': ('triangular', lead_time * 0.8, lead_time, lead_time * 2),
+        'item_yeild': ('pert', item_yield * 0.7, item_yield, min(item_yield * 1.1, 1.0)),
+        'item_cost': ('normal', base_values['item_cost'] * 0.8, base_values['item_cost'], base_values['item_cost'] * 1.2),
+    }
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    results_df = run_monte_carlo(item_rows, initial_attributes, base_values, distributions, n_samples, seed=0, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{n_samples:,} samples x {n_months} months (chunks of {chunk_size:,})")
+    print(f"  time:        {elapsed:.3f} s")
+    print(f"  peak memory: {peak / 1e6:.1f} MB (results table {results_df.memory_usage().sum() / 1e6:.1f} MB)")
+    print(monte_carlo_percentiles(results_df).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Times PDF export of one item and of many items, with the charts drawn as vector graphics into ReportLab
+
+Cold exports build the chart drawings, and a repeated single item export reuses its PDF cached per item and slider
+values, as the app's export does. The background report job, which builds the pages in worker processes, is timed
+writing every item to a file.
+When kaleido is installed the previous approach (each Plotly chart rendered to a PNG by kaleido) is timed for one
+item.
+
+Run from the repository root (optionally pass the number of items, months per item and workers):
+    > python benchmarks/benchmark_pdf.py 100 120 4
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmark_portfolio import make_portfolio
+from evm_calc import ScenarioCache, build_item_index, run_scenario, scenario_key
+from evm_calc.ingest import peak_rss_mb
+from evm_calc.report import ReportJob, cached_report_pdf, export_report_pdf, scenario_drawings
+
+
+def export(pages):
+    """exports one page per (item, scenario result) and returns the PDF size in bytes"""
+    report_pages = [
+        (f"Modified Cost Profile for {item_number}", "Modified Attributes: benchmark", scenario_drawings(combined_data_set, evm_summary_data))
+        for item_number, (combined_data_set, evm_summary_data) in pages
+    ]
+    return len(export_report_pdf(report_pages).getvalue())
+
+
+def time_export(label, pages):
+    """runs one export and prints its time"""
+    start = time.perf_counter()
+    size = export(pages)
+    print(f"  {label:<34} {(time.perf_counter() - start) * 1000:9.1f} ms  ({size / 1024:,.0f} KB)")
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    cost_df, attribute_df = make_portfolio(n_items, n_months)
+    cost_df, cost_item_offsets = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+
+    # Scenario results are computed up front so only the export is timed
+    user_attributes_dictionary = {"item_lead_time": 60, "item_cost": 30.0, "item_yeild": 0.9, "item_hours": 5.0}
+    pages = []
+    for item_number in cost_item_offsets:
+        result = run_scenario(cost_df, attribute_df, user_attributes_dictionary, item_number=item_number, cost_item_offsets=cost_item_offsets, attribute_item_offsets=attribute_item_offsets)
+        pages.append((item_number, result))
+
+    print(f"{n_items:,} items, {n_months} months each")
+    time_export("single item, cold", pages[:1])
+
+    # The app's export: the PDF is cached under the item and slider values, so a repeated export draws nothing
+    item_number, (combined_data_set, evm_summary_data) = pages[0]
+    report_cache = ScenarioCache()
+    key = scenario_key(item_number, user_attributes_dictionary)
+    cached_report_pdf(report_cache, key, "Modified Cost Profile", "", combined_data_set, evm_summary_data)
+    start = time.perf_counter()
+    cached_report_pdf(report_cache, key, "Modified Cost Profile", "", combined_data_set, evm_summary_data)
+    print(f"  {'single item, cached PDF':<34} {(time.perf_counter() - start) * 1000:9.3f} ms")
+
+    time_export(f"{n_items} items, one thread", pages)
+
+    # Background report job, computing each item's scenario as well as drawing it, in worker processes
+    path = os.path.join(tempfile.gettempdir(), "benchmark_report.pdf")
+    job = ReportJob(cost_df, attribute_df, path, cost_item_offsets=cost_item_offsets, attribute_item_offsets=attribute_item_offsets, workers=workers).start()
+    job.wait()
+    rss = peak_rss_mb()
+    memory = f", peak RSS {rss:,.0f} MB" if rss is not None else ""
+    print(f"  {f'report job, {workers} workers':<34} {job.seconds * 1000:9.1f} ms  ({os.path.getsize(path) / 1024:,.0f} KB{memory}, {os.cpu_count()} CPUs)")
+    os.remove(path)
+
+    if importlib.util.find_spec('kaleido') is None:
+        print("  kaleido is not installed, skipping the PNG export comparison")
+        return
+
+    # Previous approach: both Plotly charts rendered to PNG by kaleido for every export
+    import main as app
+    combined_data_set, evm_summary_data = pages[0][1]
+    start = time.perf_counter()
+    for fig in (app.plot_line_chart_with_percent_delta(combined_data_set, evm_summary_data, "Baseline", "Modified", ""), app.plot_bubble_chart(combined_data_set)):
+        fig.to_image(format="png", width=1200, height=600, scale=2)
+    print(f"  {'single item, kaleido PNG charts':<34} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Times portfolio mode (every item modified and rolled up in one batched pass)
+
+Run from the repository root (optionally pass the number of items and months):
+    > python benchmarks/benchmark_portfolio.py 50000 120
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evm_calc import assess_portfolio_impacts, build_item_index, build_portfolio_index, calculate_portfolio_evm
+
+
+def make_portfolio(n_items, n_months, seed=0):
+    """creates a cost table with one Labor and one Material row per item per month, and matching attributes"""
+    rng = np.random.default_rng(seed)
+    n_rows = n_items * n_months * 2
+    month_ends = pd.date_range('2024-01-31', periods=n_months, freq='ME').to_numpy()
+    cost_df = pd.DataFrame({
+        'Date': np.tile(np.repeat(month_ends, 2), n_items),
+        'Cost': rng.uniform(0, 100, n_rows),
+        'Item Number': np.repeat(np.arange(10000, 10000 + n_items), n_months * 2).astype(str),
+        'Type': np.tile(['Labor', 'Material'], n_items * n_months),
+    })
+    attribute_df = pd.DataFrame({
+        'Item Number': np.arange(10000, 10000 + n_items).astype(str),
+        'Cost': rng.uniform(5, 50, n_items),
+        'Lead Time': rng.integers(5, 200, n_items).astype(float),
+        'Yield': rng.uniform(0.5, 1.0, n_items),
+        'Hours': rng.uniform(1, 20, n_items),
+    })
+    return cost_df, attribute_df
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    cost_df, attribute_df = make_portfolio(n_items, n_months)
+
+    start = time.perf_counter()
+    indexed_df, _ = build_item_index(cost_df)
+    portfolio_index = build_portfolio_index(indexed_df)
+    setup_time = time.perf_counter() - start
+
+    # A slider move: new impacts for every item, then the batched modify, bucketing and EVM pass
+    percent_changes = {"item_cost": 10, "item_lead_time": 20, "item_yeild": -5, "item_hours": 0}
+    start = time.perf_counter()
+    impacts_df = assess_portfolio_impacts(attribute_df, percent_changes)
+    _, evm_summary_data, _ = calculate_portfolio_evm(portfolio_index, impacts_df)
+    update_time = time.perf_counter() - start
+
+    print(f"{n_items:,} items x {n_months} months ({len(cost_df):,} cost rows)")
+    print(f"  one-time setup at upload: {setup_time:.3f} s")
+    print(f"  per slider move:          {update_time:.3f} s")
+    print(f"  program BAC ${evm_summary_data['BAC']:,.0f}, EAC ${evm_summary_data['EAC']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
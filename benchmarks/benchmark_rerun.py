@@ -0,0 +1,101 @@
+"""Times the server side of a slider move on the chart screen: a full rerun of main.py against the slider fragment
+
+The chart screen is rendered with Streamlit's AppTest on a synthetic ledger, and each slider move is timed twice:
+once rerunning the whole script (how every slider move ran before the sliders, tabs and export became a fragment,
+and how the item selector and time period still rerun) and once running only show_item_scenario, the fragment a
+slider move now reruns. AppTest always runs a whole script, so the fragment is run from a script that calls it
+alone, and the time of an empty script is taken off both. Run from the repository root (optionally pass the number
+of items and months of the ledger and the number of slider moves); Streamlit warns that it is not running under
+streamlit run, which can be ignored:
+    > python benchmarks/benchmark_rerun.py 10000 120 20
+"""
+import os
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from evm_calc import (
+    ATTRIBUTE_SCHEMA,
+    COST_SCHEMA,
+    build_baseline_monthly,
+    build_item_index,
+    check_schema,
+    filter_data,
+    make_attributes,
+    make_cost_ledger,
+)
+
+# Either the whole of main.py, run as the server runs it, or only the slider fragment, with the arguments the chart
+# screen passes it
+CHART_SCREEN = f"""
+import runpy
+import streamlit as st
+if st.session_state.get('fragment_args') is None:
+    runpy.run_path({os.path.join(ROOT, 'main.py')!r}, run_name='__main__')
+else:
+    import main
+    main.show_item_scenario(*st.session_state.fragment_args)
+"""
+
+
+def time_moves(test, values):
+    """median ms of moving the Material Cost slider to each value and rerunning"""
+    times = []
+    for value in values:
+        slider = test.sidebar.slider[0]
+        start = time.perf_counter()
+        slider.set_value(value).run()
+        times.append((time.perf_counter() - start) * 1000)
+        if test.exception:
+            raise RuntimeError(test.exception[0].message)
+    return statistics.median(times)
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    n_moves = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    cost_df, _ = check_schema(make_cost_ledger(n_items, n_months), COST_SCHEMA)
+    attribute_df, _ = check_schema(make_attributes(n_items), ATTRIBUTE_SCHEMA)
+    cost_df, cost_item_offsets = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+    print(f"{len(cost_df):,} cost rows for {n_items:,} items, {n_moves} slider moves")
+
+    test = AppTest.from_string(CHART_SCREEN, default_timeout=600)
+    test.session_state.page = 'chart_screen'
+    test.session_state.cost_df = cost_df
+    test.session_state.cost_item_offsets = cost_item_offsets
+    test.session_state.attribute_df = attribute_df
+    test.session_state.attribute_item_offsets = attribute_item_offsets
+    test.session_state.baseline_monthly = build_baseline_monthly(cost_df)
+    test.run()
+    if test.exception:
+        raise RuntimeError(test.exception[0].message)
+
+    # A new Material Cost each move, so every move misses the scenario cache
+    item_number = list(cost_item_offsets)[0]
+    item_attributes = filter_data(attribute_df, item_number, attribute_item_offsets)
+    default_cost = float(item_attributes['Cost'].iloc[0])
+    values = [default_cost * (1 + move / n_moves) for move in range(1, 2 * n_moves + 1)]
+
+    empty = AppTest.from_string("pass").run()
+    start = time.perf_counter()
+    for _ in range(n_moves):
+        empty.run()
+    empty_ms = (time.perf_counter() - start) * 1000 / n_moves
+
+    full_ms = time_moves(test, values[:n_moves]) - empty_ms
+    print(f"  {'whole script rerun':<24} {full_ms:9.1f} ms per slider move")
+
+    test.session_state.fragment_args = (item_number, 'month', item_attributes, None)
+    fragment_ms = time_moves(test, values[n_moves:]) - empty_ms
+    print(f"  {'slider fragment rerun':<24} {fragment_ms:9.1f} ms per slider move")
+    print(f"  (an empty script run, taken off both, is {empty_ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
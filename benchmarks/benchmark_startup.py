@@ -0,0 +1,88 @@
+"""Checks the app's startup against an import time budget, and that the PDF libraries load only on export
+
+The import time of main.py is read from `python -X importtime`, in a fresh process with Streamlit already imported
+(as it is in the server before the script first runs), and each run takes the median of several processes. The
+upload screen is then rendered with Streamlit's AppTest and none of the DEFERRED_MODULES may have been loaded by it.
+Exits non-zero when main.py takes longer than the budget to import or a deferred module was loaded.
+
+Run from the repository root (optionally pass the budget in ms and the number of processes):
+    > python benchmarks/benchmark_startup.py 1000 5
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time allowed for main.py (pandas, numpy and evm_calc), in ms
+DEFAULT_BUDGET_MS = 1000
+
+# Modules the upload screen must not load: the PDF stack is imported by the export buttons. Plotly and PIL are not
+# listed, as Streamlit itself imports them for st.plotly_chart.
+DEFERRED_MODULES = ("evm_calc.report", "reportlab")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+UPLOAD_SCREEN = f"""
+import sys
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({os.path.join(ROOT, 'main.py')!r}).run()
+if app.exception:
+    sys.exit(str(app.exception))
+print(' '.join(module for module in sys.modules if module.startswith({DEFERRED_MODULES!r})))
+"""
+
+
+def import_times():
+    """{module: cumulative import time in ms} of importing main.py in a fresh process, and main's direct imports"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import streamlit; import main"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times, children = {}, []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        module, depth = match[4], len(match[3]) // 2
+        times[module] = int(match[2]) / 1000
+        if module == "main":
+            return times, children
+        # Each module is listed after its own imports, so main's direct imports follow the last top level module
+        if depth == 0:
+            children = []
+        elif depth == 1:
+            children.append(module)
+    raise RuntimeError(f"main was not imported:\n{result.stderr[-2000:]}")
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    n_processes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    runs = [import_times() for _ in range(n_processes)]
+    main_ms = statistics.median(times["main"] for times, _ in runs)
+    times, children = runs[-1]
+    print(f"import main: {main_ms:,.0f} ms (median of {n_processes} processes, budget {budget_ms:,.0f} ms)")
+    for module in sorted(children, key=times.get, reverse=True)[:10]:
+        print(f"  {module:<32} {times[module]:8.1f} ms")
+
+    result = subprocess.run([sys.executable, "-c", UPLOAD_SCREEN], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        print(f"upload screen failed: {result.stderr[-2000:]}")
+        return 1
+    loaded = result.stdout.split()
+    print(f"loaded by the upload screen: {', '.join(loaded) or 'none of ' + ', '.join(DEFERRED_MODULES)}")
+
+    failed = False
+    if main_ms > budget_ms:
+        print(f"main.py takes {main_ms:,.0f} ms to import, over the {budget_ms:,.0f} ms budget")
+        failed = True
+    if loaded:
+        print(f"the upload screen loaded deferred modules: {', '.join(loaded)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
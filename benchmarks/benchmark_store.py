@@ -0,0 +1,85 @@
+"""Times sessions loading the same cost file with a copy each, and through the shared dataset store
+
+Each copy is a session formatting and item indexing the upload itself. With the store the first session formats it
+once and writes the memory-mapped Arrow file, and every other session gets the same dataframe back. A run of
+distinct uploads into a store capped at two files' size then shows the stored files staying within the cap. Resident
+memory is read from /proc, so it is only reported on Linux.
+
+Run from the repository root (optionally pass the number of items, months and sessions):
+    > python benchmarks/benchmark_store.py 5000 120 10
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmark_portfolio import make_portfolio
+from evm_calc import COST_SCHEMA, build_item_index, load_data_file
+from evm_calc.store import DatasetStore
+
+
+def rss_mb():
+    """current resident memory of this process in MB, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except OSError:
+        return None
+
+
+def time_sessions(label, n_sessions, load):
+    """loads the file once per session, keeping every session's dataframe, and prints the time and memory"""
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    frames = [load() for _ in range(n_sessions)]
+    seconds = time.perf_counter() - start
+    rss_after = rss_mb()
+    memory = f"  +{rss_after - rss_before:,.0f} MB resident" if rss_before is not None else ""
+    distinct = len({id(df) for df in frames})
+    print(f"  {label:<22} {seconds * 1000:9.1f} ms  {distinct} dataframe(s){memory}")
+    return frames
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    n_sessions = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    store_dir = tempfile.mkdtemp()
+    path = os.path.join(store_dir, "costs.csv")
+    cost_df, _ = make_portfolio(n_items, n_months)
+    cost_df.to_csv(path, index=False)
+    print(f"{len(cost_df):,} cost rows ({os.path.getsize(path) / 1e6:,.0f} MB CSV), {n_sessions} sessions")
+
+    try:
+        def load_copy():
+            # A cache directory of its own, so each session formats the file as it did before the store
+            session_dir = tempfile.mkdtemp(dir=store_dir)
+            df, _ = load_data_file(path, COST_SCHEMA, cache_dir=session_dir)
+            return build_item_index(df)[0]
+        copies = time_sessions("copy per session", n_sessions, load_copy)
+        del copies
+
+        store = DatasetStore(os.path.join(store_dir, "store"))
+        time_sessions("shared store", n_sessions, lambda: store.put(path, COST_SCHEMA)[1])
+        print(f"  store: {store.misses} load, {store.hits} repeat uploads, {store.mapped_bytes() / 1e6:,.0f} MB mapped")
+
+        # A restarted server maps the stored file instead of formatting the upload again
+        start = time.perf_counter()
+        DatasetStore(os.path.join(store_dir, "store")).put(path, COST_SCHEMA)
+        print(f"  {'store after restart':<22} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+        # Distinct uploads (each month's ledger, say) into a capped store: the oldest are dropped with their files
+        capped = DatasetStore(os.path.join(store_dir, "capped"), max_bytes=2 * store.mapped_bytes())
+        for upload in range(n_sessions):
+            cost_df.assign(Cost=cost_df['Cost'] + upload).to_csv(path, index=False)
+            capped.put(path, COST_SCHEMA)
+        files = os.listdir(os.path.join(store_dir, "capped"))
+        print(f"  {n_sessions} distinct uploads, capped: {len(capped)} datasets kept, {len(files)} files ({capped.stored_bytes() / 1e6:,.0f} MB) on disk")
+    finally:
+        shutil.rmtree(store_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compares loading a large cost ledger whole with streaming it into (item, type, date) totals
+
+Writes a synthetic ledger with several transactions per item, type and month, then loads it in a fresh process each
+way so the peak resident memory of each is measured on its own. Run from the repository root (optionally pass the
+number of items, months and transactions per item, type and month):
+    > python benchmarks/benchmark_stream.py 2000 60 20
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evm_calc import COST_SCHEMA, load_data_file
+from evm_calc.ingest import aggregate_cost_file, peak_rss_mb
+
+
+def write_ledger(path, n_items, n_months, transactions, seed=0):
+    """writes the ledger one item block at a time so the benchmark itself stays small"""
+    rng = np.random.default_rng(seed)
+    month_ends = pd.date_range('2020-01-31', periods=n_months, freq='ME').strftime('%m/%d/%Y').to_numpy()
+    block_items = 100
+    for first_item in range(0, n_items, block_items):
+        items = np.arange(first_item, min(first_item + block_items, n_items)) + 10000
+        rows_per_item = n_months * 2 * transactions
+        block = pd.DataFrame({
+            'Column1': 'Baseline',
+            'Date': np.tile(np.repeat(month_ends, 2 * transactions), len(items)),
+            'Cost': rng.uniform(0, 10, len(items) * rows_per_item).round(2),
+            'Item Number': np.repeat(items, rows_per_item),
+            'Type': np.tile(np.repeat(['Labor', 'Material'], transactions), len(items) * n_months),
+        })
+        block.to_csv(path, mode='a', header=first_item == 0, index=False)
+
+
+def ingest(method, path):
+    """child process: loads the ledger one way and prints the rows, result size, rate and peak memory"""
+    start = time.perf_counter()
+    if method == 'stream':
+        df, report = aggregate_cost_file(path, date_format='%m/%d/%Y')
+        rows = report['rows']
+    else:
+        df, _ = load_data_file(path, COST_SCHEMA, '%m/%d/%Y', cache_dir=None)
+        rows = len(df)
+    seconds = time.perf_counter() - start
+    print(f"  {method:<7} {rows:,} rows -> {len(df):,} rows kept, {rows / seconds:,.0f} rows/s, peak RSS {peak_rss_mb():,.0f} MB")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--ingest':
+        ingest(sys.argv[2], sys.argv[3])
+        return
+
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    transactions = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(work_dir, 'ledger.csv')
+        write_ledger(path, n_items, n_months, transactions)
+        print(f"ledger of {os.path.getsize(path) / 1e6:,.0f} MB")
+        for method in ('full', 'stream'):
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--ingest', method, path], check=True)
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Times each pipeline function and the end-to-end chart path at several scales, against a stored baseline
+
+The data comes from the synthetic generator (evm_calc/synthetic.py), so every run times the same ledgers. Each
+function is run repeatedly for at least MIN_SECONDS and its median time recorded. Times are compared with the
+baseline file (benchmarks/baseline.json by default) and any function slower than the baseline by more than the
+tolerance (and by more than NOISE_MS) is listed as a regression, with a non-zero exit code. Baselines are machine
+specific: save one on the machine the comparisons run on. Streamlit warns that it is not running under streamlit
+run, which can be ignored.
+
+Run from the repository root:
+    > python benchmarks/benchmark_suite.py                     compare every scale with the baseline
+    > python benchmarks/benchmark_suite.py small medium        compare some scales
+    > python benchmarks/benchmark_suite.py --save              store this run as the baseline
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main as app
+from evm_calc import (
+    ATTRIBUTE_SCHEMA,
+    COST_SCHEMA,
+    assess_impacts,
+    assess_portfolio_impacts,
+    build_baseline_monthly,
+    build_item_index,
+    build_portfolio_index,
+    calculate_evm,
+    calculate_portfolio_evm,
+    check_schema,
+    create_common_x_value_by_month,
+    filter_data,
+    make_attributes,
+    make_cost_ledger,
+    modify_dataset,
+    run_scenario,
+)
+
+# Scale points: items, months and cost rows per item (two a month)
+SCALES = {
+    "small": (100, 36, 72),
+    "medium": (2_000, 60, 120),
+    "large": (10_000, 120, 240),
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Each function is repeated for at least this long (and at least MIN_REPEATS times)
+MIN_SECONDS = 0.5
+MIN_REPEATS = 3
+
+# Slowdowns smaller than this are timer noise, whatever the ratio
+NOISE_MS = 0.5
+
+USER_ATTRIBUTES = {"item_lead_time": 60.5, "item_cost": 30.0, "item_yeild": 0.9, "item_hours": 5.0}
+
+
+def median_ms(function):
+    """median time of function() in ms over at least MIN_REPEATS calls and MIN_SECONDS"""
+    times = []
+    started = time.perf_counter()
+    while len(times) < MIN_REPEATS or time.perf_counter() - started < MIN_SECONDS:
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def scale_timings(n_items, n_months, rows_per_item):
+    """times every benchmarked function on one synthetic ledger and returns {function: ms}"""
+    raw_cost_df = make_cost_ledger(n_items, n_months, rows_per_item)
+    cost_df, _ = check_schema(raw_cost_df.copy(), COST_SCHEMA)
+    attribute_df, _ = check_schema(make_attributes(n_items), ATTRIBUTE_SCHEMA)
+    indexed_df, cost_item_offsets = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+
+    # Item level steps are timed on the middle item, with the cache and incremental evaluators off unless named
+    item_number = list(cost_item_offsets)[n_items // 2]
+    filtered_df = filter_data(indexed_df, item_number, cost_item_offsets)
+    filtered_attributes_df = filter_data(attribute_df, item_number, attribute_item_offsets)
+    impacts_dic = assess_impacts(filtered_attributes_df, USER_ATTRIBUTES)
+    modified_df = modify_dataset(filtered_df[['Date', 'Cost', 'Type']], impacts_dic)
+    combined_data_set = create_common_x_value_by_month(filtered_df, modified_df)
+    portfolio_index = build_portfolio_index(indexed_df)
+    portfolio_impacts = assess_portfolio_impacts(attribute_df, {"item_lead_time": 10, "item_cost": 5, "item_yeild": 0, "item_hours": -5})
+    scenario_arguments = dict(item_number=item_number, cost_item_offsets=cost_item_offsets, attribute_item_offsets=attribute_item_offsets)
+
+    benchmarks = {
+        "check_schema": lambda: check_schema(raw_cost_df.copy(), COST_SCHEMA),
+        "build_item_index": lambda: build_item_index(cost_df),
+        "filter_data": lambda: filter_data(indexed_df, item_number, cost_item_offsets),
+        "filter_data (no index)": lambda: filter_data(indexed_df, item_number),
+        "assess_impacts": lambda: assess_impacts(filtered_attributes_df, USER_ATTRIBUTES),
+        "modify_dataset": lambda: modify_dataset(filtered_df[['Date', 'Cost', 'Type']], impacts_dic),
+        "create_common_x_value_by_month": lambda: create_common_x_value_by_month(filtered_df, modified_df),
+        "calculate_evm": lambda: calculate_evm(combined_data_set.copy()),
+        "run_scenario": lambda: run_scenario(indexed_df, attribute_df, USER_ATTRIBUTES, **scenario_arguments),
+        "run_scenario (incremental)": lambda: run_scenario(indexed_df, attribute_df, USER_ATTRIBUTES, evaluators={}, **scenario_arguments),
+        "generate_charts line": lambda: app.generate_charts(indexed_df, attribute_df, USER_ATTRIBUTES, chart_type="line_chart", **scenario_arguments),
+        "generate_charts bubble": lambda: app.generate_charts(indexed_df, attribute_df, USER_ATTRIBUTES, chart_type="bubble_chart", **scenario_arguments),
+        "build_baseline_monthly": lambda: build_baseline_monthly(indexed_df),
+        "build_portfolio_index": lambda: build_portfolio_index(indexed_df),
+        "calculate_portfolio_evm": lambda: calculate_portfolio_evm(portfolio_index, portfolio_impacts),
+    }
+    return {name: round(median_ms(function), 3) for name, function in benchmarks.items()}
+
+
+def environment():
+    """the versions and machine the timings were taken on"""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """prints each function's time next to its baseline and returns the (scale, function, ratio) regressions"""
+    regressions = []
+    print(f"{'scale':<8} {'function':<32} {'ms':>10} {'baseline':>10} {'ratio':>7}")
+    for scale, timings in results.items():
+        for name, ms in timings.items():
+            baseline_ms = baseline.get("timings", {}).get(scale, {}).get(name)
+            if baseline_ms is None:
+                print(f"{scale:<8} {name:<32} {ms:10.3f} {'':>10} {'':>7}")
+                continue
+            ratio = ms / baseline_ms
+            slower = ratio > tolerance and ms - baseline_ms > NOISE_MS
+            print(f"{scale:<8} {name:<32} {ms:10.3f} {baseline_ms:10.3f} {ratio:6.2f}x{'  slower' if slower else ''}")
+            if slower:
+                regressions.append((scale, name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the EVM pipeline at several scales against a stored baseline")
+    parser.add_argument("scales", nargs="*", help=f"scale points to run: {', '.join(SCALES)} (default: all)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--save", action="store_true", help="store this run as the baseline instead of comparing with it")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="slowdown ratio reported as a regression (default: %(default)s)")
+    args = parser.parse_args()
+    scales = args.scales or list(SCALES)
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"unknown scales {', '.join(unknown)}; choose from {', '.join(SCALES)}")
+
+    results = {}
+    for scale in scales:
+        n_items, n_months, rows_per_item = SCALES[scale]
+        print(f"{scale}: {n_items:,} items x {rows_per_item} rows ({n_items * rows_per_item:,} cost rows) over {n_months} months", file=sys.stderr)
+        results[scale] = scale_timings(n_items, n_months, rows_per_item)
+
+    if args.save:
+        baseline = {"environment": environment(), "scales": {scale: SCALES[scale] for scale in scales}, "timings": results}
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=1)
+        print(f"baseline of {', '.join(scales)} saved to {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get("environment") != environment():
+            print(f"baseline taken on {baseline.get('environment')}, comparisons may not hold", file=sys.stderr)
+    else:
+        print(f"no baseline at {args.baseline}, run with --save to store one", file=sys.stderr)
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} functions slower than the baseline by more than {args.tolerance}x")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Times a Latin hypercube sensitivity sweep with different numbers of worker processes
+
+Run from the repository root (optionally pass the number of scenarios and months):
+    > python benchmarks/benchmark_sweep.py 100000 120
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evm_calc import (
+    base_slider_values,
+    build_item_index,
+    latin_hypercube_scenarios,
+    prepare_sweep_inputs,
+    run_sweep,
+    sweep_ranges,
+)
+
+from benchmark_portfolio import make_portfolio
+
+
+def main():
+    n_scenarios = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    cost_df, attribute_df = make_portfolio(1, n_months)
+    cost_df, cost_item_offsets = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+
+    item_inputs = prepare_sweep_inputs(cost_df, attribute_df, list(cost_item_offsets), cost_item_offsets, attribute_item_offsets)
+    item_number, (_, initial_attributes) = next(iter(item_inputs.items()))
+    ranges = sweep_ranges(base_slider_values(initial_attributes))
+    sweeps = {item_number: latin_hypercube_scenarios(ranges, n_scenarios, seed=0)}
+
+    print(f"{n_scenarios:,} scenarios x {n_months} months ({os.cpu_count()} CPUs)")
+    baseline_time = None
+    for workers in (1, 2, 4):
+        start = time.perf_counter()
+        results_df = run_sweep(item_inputs, sweeps, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline_time = baseline_time or elapsed
+        print(f"  {workers} worker(s): {elapsed:.3f} s ({len(results_df) / elapsed:,.0f} scenarios/s, {baseline_time / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
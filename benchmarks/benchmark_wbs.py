@@ -0,0 +1,77 @@
+"""Times updating the WBS roll-up after one item's attributes change against rolling every item up again
+
+Run from the repository root (optionally pass the number of items and months of the ledger):
+    > python benchmarks/benchmark_wbs.py 10000 120
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evm_calc import (
+    ATTRIBUTE_SCHEMA,
+    COST_SCHEMA,
+    WbsRollup,
+    assess_impacts,
+    assess_portfolio_impacts,
+    build_item_index,
+    build_portfolio_index,
+    check_schema,
+    filter_data,
+    make_attributes,
+    make_cost_ledger,
+    make_hierarchy,
+)
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    cost_df, _ = check_schema(make_cost_ledger(n_items, n_months), COST_SCHEMA)
+    attribute_df, _ = check_schema(make_attributes(n_items), ATTRIBUTE_SCHEMA)
+    cost_df, _ = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+    portfolio_index = build_portfolio_index(cost_df)
+
+    start = time.perf_counter()
+    rollup = WbsRollup(portfolio_index, make_hierarchy(n_items))
+    print(f"{len(cost_df):,} cost rows, {n_items:,} items in {len(rollup.tree['node_names']):,} nodes, built in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Twenty items changed one after another, as when moving one item's sliders at a time
+    rng = np.random.default_rng(0)
+    items = [str(item) for item in rng.choice(rollup.tree['item_numbers'], 20, replace=False)]
+    changes = {}
+    for item_number in items:
+        item_attributes = filter_data(attribute_df, item_number, attribute_item_offsets)
+        changes[item_number] = {
+            'item_cost': float(item_attributes['Cost'].iloc[0]) * 1.5,
+            'item_lead_time': float(item_attributes['Lead Time'].iloc[0]) + 30,
+            'item_yeild': float(item_attributes['Yield'].iloc[0]),
+            'item_hours': float(item_attributes['Hours'].iloc[0]),
+        }
+
+    start = time.perf_counter()
+    for item_number, user_attributes_dictionary in changes.items():
+        rollup.update_item(item_number, assess_impacts(filter_data(attribute_df, item_number, attribute_item_offsets), user_attributes_dictionary))
+    print(f"  {'one item updated':<30} {(time.perf_counter() - start) * 1000 / len(changes):9.2f} ms per change")
+
+    # Every item re-bucketed and every node summed again after each change
+    new_attributes_df = pd.DataFrame([
+        {'Item Number': item_number, 'Cost': values['item_cost'], 'Lead Time': values['item_lead_time'], 'Yield': values['item_yeild'], 'Hours': values['item_hours']}
+        for item_number, values in changes.items()
+    ])
+    full = WbsRollup(portfolio_index, make_hierarchy(n_items))
+    start = time.perf_counter()
+    for _ in range(3):
+        full.set_impacts(assess_portfolio_impacts(attribute_df, new_attributes_df=new_attributes_df))
+    print(f"  {'every item rolled up again':<30} {(time.perf_counter() - start) * 1000 / 3:9.2f} ms per change")
+
+    # Both give every node the same costs
+    assert np.allclose(rollup.node_modified, full.node_modified)
+
+
+if __name__ == "__main__":
+    main()
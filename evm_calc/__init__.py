@@ -0,0 +1,78 @@
+"""EVM Impact Calculator computation engine, usable without Streamlit, Plotly or ReportLab"""
+from evm_calc.append import (
+    append_cost_rows,
+    cost_watermark,
+    item_watermarks,
+    merge_baseline_monthly,
+    merge_watermarks,
+    prepare_append,
+)
+from evm_calc.data import (
+    ATTRIBUTE_COLUMNS,
+    ATTRIBUTE_SCHEMA,
+    COST_COLUMNS,
+    COST_DTYPES,
+    COST_SCHEMA,
+    build_item_index,
+    check_schema,
+    compact_cost_data,
+    expand_cost_data,
+    filter_data,
+    format_attribute_data,
+    format_cost_data,
+    load_data_file,
+    memory_report,
+    read_data_file,
+    validate_columns_exist,
+)
+from evm_calc.downsample import display_indices, lttb_indices
+from evm_calc.evm import calculate_evm, calculate_evm_arrays
+from evm_calc.goalseek import GOAL_METRICS, goal_seek
+from evm_calc.incremental import IncrementalEvaluator
+from evm_calc.ingest import aggregate_cost_file
+from evm_calc.montecarlo import DISTRIBUTIONS, monte_carlo_percentiles, run_monte_carlo, s_curve, sample_scenarios
+from evm_calc.periods import GRANULARITIES, align_period_totals, bucket_costs, days_to_periods, period_end_dates
+from evm_calc.pipeline import (
+    ScenarioCache,
+    align_monthly_costs,
+    assess_impacts,
+    build_baseline_monthly,
+    create_common_x_value_by_month,
+    modify_dataset,
+    resample_costs_by_month,
+    resample_costs_by_period,
+    run_scenario,
+    scenario_key,
+)
+from evm_calc.portfolio import (
+    assess_portfolio_impacts,
+    build_portfolio_index,
+    calculate_portfolio_evm,
+    modify_portfolio,
+)
+from evm_calc.profiling import PROFILE_COLUMNS, StageProfiler, profile_stage
+from evm_calc.scenarios import SLIDER_ATTRIBUTES, prepare_item_rows, run_item_scenarios
+from evm_calc.snapshots import (
+    VERSION_COLUMNS,
+    build_snapshot_index,
+    compare_versions,
+    cost_versions,
+    select_version,
+    version_column,
+    version_item_costs,
+    version_trend,
+)
+from evm_calc.store import DatasetStore
+from evm_calc.sweep import (
+    base_slider_values,
+    grid_scenarios,
+    latin_hypercube_scenarios,
+    prepare_sweep_inputs,
+    run_sweep,
+    surface_scenarios,
+    sweep_ranges,
+    tornado_data,
+    tornado_scenarios,
+)
+from evm_calc.synthetic import make_attributes, make_cost_ledger, make_hierarchy
+from evm_calc.wbs import HIERARCHY_SCHEMA, UNASSIGNED_NODE, WbsRollup, build_wbs_tree, hierarchy_levels
@@ -0,0 +1,397 @@
+"""Command line entry point
+
+Examples:
+    > python -m evm_calc batch --cost costs.csv --attrs attributes.csv --scenarios scenarios.csv --out results.parquet
+    > python -m evm_calc sweep --cost costs.csv --attrs attributes.csv --method lhs --samples 100000 --out sweep.parquet
+    > python -m evm_calc report --cost costs.csv --attrs attributes.csv --workers 4 --out report.pdf
+    > python -m evm_calc generate --items 10000 --months 120 --cost costs.parquet --attrs attributes.csv
+    > python -m evm_calc versions --cost costs.csv --base "Baseline" --out trend.csv
+    > python -m evm_calc goal --cost costs.csv --attrs attributes.csv --metric VAC --target 0 --out limits.csv
+    > python -m evm_calc append --cost costs.parquet --delta october.csv --out costs.parquet
+    > python -m evm_calc rollup --cost costs.csv --attrs attributes.csv --hierarchy wbs.csv --new-attrs changes.csv --out nodes.csv
+"""
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from evm_calc.append import append_cost_rows, prepare_append
+from evm_calc.batch import run_batch, write_results
+from evm_calc.data import (
+    ATTRIBUTE_SCHEMA,
+    COST_DTYPES,
+    COST_SCHEMA,
+    DEFAULT_CACHE_DIR,
+    build_item_index,
+    compact_cost_data,
+    load_data_file,
+    memory_report,
+    read_data_file,
+)
+from evm_calc.goalseek import GOAL_METRICS, goal_seek
+from evm_calc.ingest import aggregate_cost_file
+from evm_calc.periods import GRANULARITIES
+from evm_calc.portfolio import assess_portfolio_impacts, build_portfolio_index
+from evm_calc.profiling import StageProfiler
+from evm_calc.scenarios import SLIDER_ATTRIBUTES
+from evm_calc.snapshots import build_snapshot_index, compare_versions, cost_versions, select_version, version_trend
+from evm_calc.sweep import (
+    base_slider_values,
+    grid_scenarios,
+    latin_hypercube_scenarios,
+    prepare_sweep_inputs,
+    run_sweep,
+    sweep_ranges,
+)
+from evm_calc.synthetic import make_attributes, make_cost_ledger, make_hierarchy
+from evm_calc.wbs import HIERARCHY_SCHEMA, WbsRollup
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m evm_calc", description="Headless EVM Impact Calculator")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch_parser = subparsers.add_parser("batch", help="evaluate every scenario in a scenarios file")
+    batch_parser.add_argument("--cost", required=True, help="cost datafile (columns: Date, Cost, Item Number, Type)")
+    batch_parser.add_argument("--attrs", required=True, help="attribute datafile (columns: Item Number, Cost, Lead Time, Yield, Hours)")
+    batch_parser.add_argument("--scenarios", required=True, help="scenarios file with the attribute file columns and an optional Scenario column")
+    batch_parser.add_argument("--out", required=True, help="results file (.parquet or .csv)")
+    batch_parser.add_argument("--profile", help="also write the time and rows of each pipeline stage of every scenario to this .json or .csv file")
+    batch_parser.add_argument("--profile-memory", action="store_true", help="record the memory each stage allocates in the profile (slows the stages down)")
+
+    sweep_parser = subparsers.add_parser("sweep", help="sensitivity sweep of the four attributes around each item's values")
+    sweep_parser.add_argument("--cost", required=True, help="cost datafile (columns: Date, Cost, Item Number, Type)")
+    sweep_parser.add_argument("--attrs", required=True, help="attribute datafile (columns: Item Number, Cost, Lead Time, Yield, Hours)")
+    sweep_parser.add_argument("--items", nargs="+", help="item numbers to sweep (default: every item)")
+    sweep_parser.add_argument("--method", choices=["grid", "lhs"], default="grid", help="full grid or Latin hypercube sample")
+    sweep_parser.add_argument("--points", type=int, default=10, help="grid points per attribute")
+    sweep_parser.add_argument("--samples", type=int, default=10_000, help="Latin hypercube samples per item")
+    sweep_parser.add_argument("--spread", type=float, default=0.5, help="range either side of each value, as a fraction")
+    sweep_parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    sweep_parser.add_argument("--seed", type=int, default=None, help="random seed for the Latin hypercube sample")
+    sweep_parser.add_argument("--out", required=True, help="results file (.parquet or .csv)")
+
+    report_parser = subparsers.add_parser("report", help="PDF report with a page for every item at its own attribute values")
+    report_parser.add_argument("--cost", required=True, help="cost datafile (columns: Date, Cost, Item Number, Type)")
+    report_parser.add_argument("--attrs", required=True, help="attribute datafile (columns: Item Number, Cost, Lead Time, Yield, Hours)")
+    report_parser.add_argument("--items", nargs="+", help="item numbers to report (default: every item)")
+    report_parser.add_argument("--period", choices=list(GRANULARITIES), default="month", help="time period the costs are grouped by")
+    report_parser.add_argument("--workers", type=int, default=1, help="worker processes building the pages")
+    report_parser.add_argument("--out", required=True, help="report file (.pdf)")
+
+    generate_parser = subparsers.add_parser("generate", help="write a synthetic cost ledger and attribute table to try the tool at scale")
+    generate_parser.add_argument("--items", type=int, default=100, help="number of items")
+    generate_parser.add_argument("--months", type=int, default=36, help="months the costs are spread over")
+    generate_parser.add_argument("--rows-per-item", type=int, default=None, help="cost rows per item (default: two a month)")
+    generate_parser.add_argument("--labor-share", type=float, default=0.5, help="fraction of the cost rows that are Labor, the rest are Material")
+    generate_parser.add_argument("--start", default="2024-01-01", help="first day of the costs")
+    generate_parser.add_argument("--seed", type=int, default=0, help="random seed; the same arguments always give the same files")
+    generate_parser.add_argument("--cost", required=True, help="cost datafile to write (.parquet or .csv)")
+    generate_parser.add_argument("--attrs", required=True, help="attribute datafile to write (.parquet or .csv)")
+    generate_parser.add_argument("--hierarchy", help="WBS hierarchy file to write (.parquet or .csv), ten items to an assembly")
+
+    versions_parser = subparsers.add_parser("versions", help="compare the baseline versions of a cost file (Version or Column1 column) by EVM")
+    versions_parser.add_argument("--cost", required=True, help="cost datafile (columns: Date, Cost, Item Number, Type and Version or Column1)")
+    versions_parser.add_argument("--base", help="version the others are measured against (default: the first in the file)")
+    versions_parser.add_argument("--current", help="write the per-item EVM of this version against the base instead of the trend of every version")
+    versions_parser.add_argument("--item", help="trend of one item instead of the whole program")
+    versions_parser.add_argument("--period", choices=list(GRANULARITIES), default="month", help="time period the costs are grouped by")
+    versions_parser.add_argument("--out", required=True, help="results file (.parquet or .csv)")
+
+    goal_parser = subparsers.add_parser("goal", help="find the attribute values at which each item just meets a target EAC, VAC or finish month")
+    goal_parser.add_argument("--cost", required=True, help="cost datafile (columns: Date, Cost, Item Number, Type)")
+    goal_parser.add_argument("--attrs", required=True, help="attribute datafile (columns: Item Number, Cost, Lead Time, Yield, Hours)")
+    goal_parser.add_argument("--metric", choices=list(GOAL_METRICS), default="EAC", help="metric the target is for (EAC and Modified_Finish at most, VAC at least)")
+    goal_parser.add_argument("--target", required=True, help="target amount, or month (e.g. 2026-06) for Modified_Finish")
+    goal_parser.add_argument("--items", nargs="+", help="item numbers to solve (default: every item)")
+    goal_parser.add_argument("--attributes", nargs="+", choices=list(SLIDER_ATTRIBUTES.values()), help="attributes to search, each on its own (default: all four)")
+    goal_parser.add_argument("--spread", type=float, default=5.0, help="search up to this fraction above each item's value (and down to 0)")
+    goal_parser.add_argument("--out", required=True, help="results file (.parquet or .csv)")
+
+    append_parser = subparsers.add_parser("append", help="add the rows of a file of new costs dated after the last date of a cost file")
+    append_parser.add_argument("--cost", required=True, help="cost datafile (columns: Date, Cost, Item Number, Type)")
+    append_parser.add_argument("--delta", required=True, help="datafile of new cost rows with the same columns; rows on or before their item's last date in the cost file are skipped")
+    append_parser.add_argument("--version", help="version of the new rows when the cost file holds several and the new file has no version column (default: the last)")
+    append_parser.add_argument("--out", required=True, help="merged cost datafile to write (.parquet or .csv), sorted by item")
+
+    rollup_parser = subparsers.add_parser("rollup", help="EVM of every node of a WBS hierarchy (item, assembly, subsystem, program)")
+    rollup_parser.add_argument("--cost", required=True, help="cost datafile (columns: Date, Cost, Item Number, Type)")
+    rollup_parser.add_argument("--attrs", required=True, help="attribute datafile (columns: Item Number, Cost, Lead Time, Yield, Hours)")
+    rollup_parser.add_argument("--hierarchy", required=True, help="hierarchy datafile (Item Number, then one column per level from the item's parent up, e.g. Assembly, Subsystem, Program)")
+    rollup_parser.add_argument("--new-attrs", help="new attribute values of the items that change, same columns as the attribute file (default: none change)")
+    rollup_parser.add_argument("--out", required=True, help="results file (.parquet or .csv)")
+
+    for subparser in (batch_parser, sweep_parser, report_parser, goal_parser, rollup_parser):
+        subparser.add_argument("--baseline-version", help="version of the costs to use when the cost file holds several (default: the last in the file)")
+
+    for subparser in (batch_parser, sweep_parser, report_parser, versions_parser, goal_parser, append_parser, rollup_parser):
+        subparser.add_argument("--date-format", help="strftime format of the cost file dates, e.g. %%m/%%d/%%Y (default: inferred)")
+        subparser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="where formatted datafiles are cached (default: %(default)s)")
+        subparser.add_argument("--no-cache", action="store_true", help="always re-read the datafiles")
+        subparser.add_argument("--stream", action="store_true", help="stream a cost file too large for memory into item, type and date totals")
+        subparser.add_argument("--compact", choices=COST_DTYPES, help="keep the cost data compact (dates as day numbers) with costs at this precision")
+        subparser.add_argument("--memory", action="store_true", help="print the memory the cost data takes per row")
+
+    args = parser.parse_args(argv)
+    if args.command == "batch":
+        return run_batch_command(args)
+    if args.command == "sweep":
+        return run_sweep_command(args)
+    if args.command == "report":
+        return run_report_command(args)
+    if args.command == "generate":
+        return run_generate_command(args)
+    if args.command == "versions":
+        return run_versions_command(args)
+    if args.command == "goal":
+        return run_goal_command(args)
+    if args.command == "append":
+        return run_append_command(args)
+    if args.command == "rollup":
+        return run_rollup_command(args)
+
+def load_datafiles(args):
+    """reads, validates and formats the cost and attribute files named on the command line
+
+    A cost file holding several baseline versions is narrowed to --baseline-version (the last version by default)
+    for the commands that take one.
+    """
+    cache_dir = None if args.no_cache else args.cache_dir
+    datafiles = []
+    for label, data_file, schema in (("cost", args.cost, COST_SCHEMA), ("attribute", getattr(args, 'attrs', None), ATTRIBUTE_SCHEMA)):
+        if data_file is None:
+            continue
+        if args.stream and label == "cost":
+            df, report = aggregate_cost_file(data_file, date_format=args.date_format)
+            if not report['missing_columns']:
+                print(f"streamed {report['rows']:,} cost rows into {len(df):,} totals ({report['rows_per_second']:,.0f} rows/s)", file=sys.stderr)
+                if args.compact:
+                    df = compact_cost_data(df, args.compact)
+        else:
+            df, report = load_data_file(data_file, schema, args.date_format, cache_dir, args.compact if label == "cost" else None)
+        if report['missing_columns']:
+            raise ValueError(f"{label} file is missing required columns: {', '.join(report['missing_columns'])}")
+        if args.memory and label == "cost":
+            print(memory_report(df).to_string(index=False), file=sys.stderr)
+        versions = cost_versions(df) if label == "cost" and hasattr(args, 'baseline_version') else []
+        if len(versions) > 1:
+            version = args.baseline_version or versions[-1]
+            if version not in versions:
+                raise ValueError(f"unknown version {version!r}; the cost file has {', '.join(versions)}")
+            print(f"using version {version} of the {len(versions)} in the cost file", file=sys.stderr)
+            df = select_version(df, version)
+        if not report['bad_rows'].empty:
+            print(f"{label} file has {report['bad_rows']['Row'].nunique()} rows with missing or unreadable values", file=sys.stderr)
+        datafiles.append(df)
+    return datafiles
+
+def run_batch_command(args):
+    """loads the three input files, runs the batch and writes the results"""
+    start = time.perf_counter()
+
+    try:
+        cost_df, attribute_df = load_datafiles(args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    profiler = StageProfiler(trace_memory=args.profile_memory) if args.profile else None
+    results_df, skipped = run_batch(cost_df, attribute_df, read_data_file(args.scenarios), profiler=profiler)
+    write_results(results_df, args.out)
+    if profiler is not None:
+        profiler.close()
+        profiler.dump(args.profile)
+        stage_totals = profiler.to_frame().groupby('stage', sort=False)['ms'].sum()
+        print(", ".join(f"{stage} {ms:,.1f} ms" for stage, ms in stage_totals.items()), file=sys.stderr)
+
+    if skipped:
+        print(f"skipped {len(skipped)} scenarios with items missing from the cost or attribute file", file=sys.stderr)
+    print(f"{len(results_df)} scenarios written to {args.out} in {time.perf_counter() - start:.2f} s")
+    return 0
+
+def run_sweep_command(args):
+    """sweeps every requested item around its own attribute values and writes one row per scenario"""
+    start = time.perf_counter()
+
+    try:
+        cost_df, attribute_df = load_datafiles(args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    cost_df, cost_item_offsets = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+    items = args.items or list(cost_item_offsets)
+    item_inputs = prepare_sweep_inputs(cost_df, attribute_df, items, cost_item_offsets, attribute_item_offsets)
+
+    sweeps = {}
+    for item_number, (_, initial_attributes) in item_inputs.items():
+        ranges = sweep_ranges(base_slider_values(initial_attributes), args.spread)
+        if args.method == "grid":
+            sweeps[item_number] = grid_scenarios(ranges, args.points)
+        else:
+            sweeps[item_number] = latin_hypercube_scenarios(ranges, args.samples, args.seed)
+
+    results_df = run_sweep(item_inputs, sweeps, workers=args.workers)
+    write_results(results_df, args.out)
+
+    if len(item_inputs) < len(items):
+        print(f"skipped {len(items) - len(item_inputs)} items missing from the cost or attribute file", file=sys.stderr)
+    print(f"{len(results_df)} scenarios written to {args.out} in {time.perf_counter() - start:.2f} s")
+    return 0
+
+def run_report_command(args):
+    """writes a report page for every requested item to a PDF"""
+    # ReportLab is only needed for reports
+    from evm_calc.report import ReportJob
+
+    try:
+        cost_df, attribute_df = load_datafiles(args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    cost_df, cost_item_offsets = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+    job = ReportJob(
+        cost_df,
+        attribute_df,
+        args.out,
+        items=args.items,
+        cost_item_offsets=cost_item_offsets,
+        attribute_item_offsets=attribute_item_offsets,
+        granularity=args.period,
+        workers=args.workers,
+    )
+    job.run()
+
+    if job.error:
+        print(f"report failed: {job.error}", file=sys.stderr)
+        return 1
+    if job.skipped:
+        print(f"skipped {len(job.skipped)} items missing from the cost or attribute file", file=sys.stderr)
+    print(f"{job.done} pages written to {args.out} in {job.seconds:.2f} s")
+    return 0
+
+def run_generate_command(args):
+    """writes a synthetic cost ledger and the matching attribute table"""
+    cost_df = make_cost_ledger(args.items, args.months, args.rows_per_item, args.labor_share, args.start, args.seed)
+    write_results(cost_df, args.cost)
+    write_results(make_attributes(args.items, args.seed), args.attrs)
+    if args.hierarchy:
+        write_results(make_hierarchy(args.items), args.hierarchy)
+    print(f"{len(cost_df):,} cost rows for {args.items:,} items written to {args.cost}, attributes to {args.attrs}" + (f", hierarchy to {args.hierarchy}" if args.hierarchy else ""))
+    return 0
+
+def run_versions_command(args):
+    """writes the EVM trend of every version of the cost file, or one version against another per item"""
+    start = time.perf_counter()
+
+    try:
+        cost_df, = load_datafiles(args)
+        snapshot_index = build_snapshot_index(cost_df, args.period)
+        base_version = args.base or snapshot_index['versions'][0]
+        if args.current:
+            _, evm_summary_data, results_df = compare_versions(snapshot_index, base_version, args.current)
+            print(f"{args.current} against {base_version}: EAC {evm_summary_data['EAC']:,.2f}, BAC {evm_summary_data['BAC']:,.2f}, VAC {evm_summary_data['VAC']:,.2f}", file=sys.stderr)
+        else:
+            results_df = version_trend(snapshot_index, base_version, args.item)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    write_results(results_df.reset_index(), args.out)
+    print(f"{len(results_df)} rows for {len(snapshot_index['versions'])} versions written to {args.out} in {time.perf_counter() - start:.2f} s")
+    return 0
+
+def run_goal_command(args):
+    """solves every requested item for the target, starting from its own attribute values, and writes one row per attribute"""
+    start = time.perf_counter()
+
+    try:
+        cost_df, attribute_df = load_datafiles(args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    cost_df, cost_item_offsets = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+    items = args.items or list(cost_item_offsets)
+    item_inputs = prepare_sweep_inputs(cost_df, attribute_df, items, cost_item_offsets, attribute_item_offsets)
+    keys = None if args.attributes is None else [key for key, column in SLIDER_ATTRIBUTES.items() if column in args.attributes]
+
+    results = []
+    try:
+        for item_number, (item_rows, initial_attributes) in item_inputs.items():
+            base_values = base_slider_values(initial_attributes)
+            results_df = goal_seek(item_rows, initial_attributes, base_values, args.metric, args.target, keys, sweep_ranges(base_values, args.spread))
+            results_df.insert(0, 'Item Number', item_number)
+            results.append(results_df)
+    except ValueError as e:
+        print(f"invalid target {args.target!r} for {args.metric}: {e}", file=sys.stderr)
+        return 1
+    results_df = pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+    write_results(results_df, args.out)
+
+    if len(item_inputs) < len(items):
+        print(f"skipped {len(items) - len(item_inputs)} items missing from the cost or attribute file", file=sys.stderr)
+    print(f"{len(item_inputs)} items solved for {args.metric} {args.target} and written to {args.out} in {time.perf_counter() - start:.2f} s")
+    return 0
+
+def run_append_command(args):
+    """merges the new rows of the delta file into each item's rows of the cost file and writes the merged file"""
+    start = time.perf_counter()
+
+    try:
+        cost_df, = load_datafiles(args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    new_rows, report = load_data_file(args.delta, COST_SCHEMA, args.date_format, None)
+    if report['missing_columns']:
+        print(f"delta file is missing required columns: {', '.join(report['missing_columns'])}", file=sys.stderr)
+        return 1
+    if not report['bad_rows'].empty:
+        print(f"delta file has {report['bad_rows']['Row'].nunique()} rows with missing or unreadable values", file=sys.stderr)
+
+    new_rows, report = prepare_append(cost_df, new_rows, args.version)
+    if report['skipped']:
+        print(f"skipped {report['skipped']:,} rows dated on or before their item's last date, for items: {', '.join(report['skipped_items'])}", file=sys.stderr)
+    if report['undated']:
+        print(f"dropped {report['undated']:,} rows with no date", file=sys.stderr)
+    cost_df, _ = append_cost_rows(build_item_index(cost_df)[0], new_rows)
+    write_results(cost_df, args.out)
+    print(f"{report['appended']:,} rows for {len(report['items']):,} items appended, {len(cost_df):,} rows written to {args.out} in {time.perf_counter() - start:.2f} s")
+    return 0
+
+def run_rollup_command(args):
+    """applies the new attribute values to their items and writes the EVM of every node of the hierarchy"""
+    start = time.perf_counter()
+
+    try:
+        cost_df, attribute_df = load_datafiles(args)
+        hierarchy_df, report = load_data_file(args.hierarchy, HIERARCHY_SCHEMA, cache_dir=None)
+        if report['missing_columns']:
+            raise ValueError("hierarchy file is missing required columns: Item Number")
+        rollup = WbsRollup(build_portfolio_index(cost_df), hierarchy_df)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if args.new_attrs:
+        new_attributes_df, report = load_data_file(args.new_attrs, ATTRIBUTE_SCHEMA, cache_dir=None)
+        if report['missing_columns']:
+            print(f"new attribute file is missing required columns: {', '.join(report['missing_columns'])}", file=sys.stderr)
+            return 1
+        changed = attribute_df['Item Number'].astype(str).isin(new_attributes_df['Item Number'].astype(str))
+        rollup.set_impacts(assess_portfolio_impacts(attribute_df[changed], new_attributes_df=new_attributes_df))
+
+    results_df = rollup.node_summary()
+    write_results(results_df.reset_index(), args.out)
+    print(f"{len(results_df)} nodes ({len(rollup.changed_items)} items changed) written to {args.out} in {time.perf_counter() - start:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Appending new cost rows (such as each month's actuals) to an item indexed cost datafile without reloading it"""
+import pandas as pd
+import numpy as np
+from pandas.api.types import union_categoricals
+
+from evm_calc.data import compact_cost_data, datetime_values, factorize_items, is_compact_dates
+from evm_calc.snapshots import cost_versions, version_column
+
+def cost_watermark(cost_df):
+    """the last date of a cost datafile (NaT when no row has a date)"""
+    dates = datetime_values(cost_df['Date'])
+    dates = dates[~np.isnat(dates)]
+    return pd.Timestamp(dates.max()) if len(dates) else pd.NaT
+
+def item_watermarks(cost_df):
+    """the last date of each item of a cost datafile (and of each version, for a datafile holding several baselines)
+
+    Each item is taken to be complete up to its own last date, as items' ledgers end on different days. Returns a
+    Series of dates indexed by item number, or by item number and version; items with no dated row are left out.
+    """
+    item_codes, item_numbers = factorize_items(cost_df)
+    column = version_column(cost_df)
+    if column is not None:
+        version_codes, versions = pd.factorize(cost_df[column].astype(str))
+    else:
+        version_codes, versions = np.zeros(len(cost_df), dtype=np.int64), pd.Index([None])
+
+    # Missing dates are the smallest datetime64 value, so the running maximum passes over them
+    dates = datetime_values(cost_df['Date'])
+    keep = (item_codes >= 0) & (version_codes >= 0)
+    last = np.full(len(item_numbers) * len(versions), np.iinfo(np.int64).min)
+    np.maximum.at(last, item_codes[keep] * len(versions) + version_codes[keep], dates.view('int64')[keep])
+
+    dated = np.flatnonzero(last != np.iinfo(np.int64).min)
+    item_index = pd.Index(item_numbers.astype(str)[dated // len(versions)], name='Item Number')
+    if column is not None:
+        item_index = pd.MultiIndex.from_arrays([item_index, pd.Index(versions)[dated % len(versions)]], names=['Item Number', 'Version'])
+    return pd.Series(last[dated].view(dates.dtype), index=item_index, name='Date')
+
+def merge_watermarks(watermarks, new_rows):
+    """the item watermarks of a cost datafile after appending new_rows (in the datafile's columns) to it"""
+    if new_rows.empty:
+        return watermarks
+    merged = pd.concat([watermarks, item_watermarks(new_rows)])
+    return merged.groupby(level=list(range(merged.index.nlevels)), sort=False).max()
+
+def prepare_append(cost_df, new_rows, version=None, watermarks=None):
+    """the rows of a formatted delta file that are new to a cost datafile, in its columns and types
+
+    Each row dated on or before its item's last date (item_watermarks(cost_df) unless given, per version for a
+    datafile holding several) is taken to be loaded already and is skipped, so appending the same file twice adds
+    nothing; rows of items the datafile does not have are all new. Rows without a date are dropped, as they could
+    not be told apart from rows already loaded. The delta is converted to the datafile's form (compact when the
+    datafile is); columns it lacks are left empty, except the version column of a datafile holding several baseline
+    versions, which is set to version (the last version by default). Returns the rows to append and a report of the
+    rows read, appended, skipped (with the items they belong to) and dropped for having no date, the datafile's last
+    date before and after and the item numbers with new rows.
+    """
+    watermarks = item_watermarks(cost_df) if watermarks is None else watermarks
+
+    if is_compact_dates(cost_df['Date']):
+        new_rows = compact_cost_data(new_rows, str(cost_df['Cost'].dtype))
+    column = version_column(cost_df)
+    if column is not None and column not in new_rows.columns:
+        versions = cost_versions(cost_df)
+        version = version if version is not None else (versions[-1] if versions else None)
+    new_rows = pd.DataFrame({
+        name: new_rows[name] if name in new_rows.columns else pd.Series(version if name == column else None, index=new_rows.index, dtype=object)
+        for name in cost_df.columns
+    })
+
+    # Each row against the last date of its own item (and version)
+    dates = datetime_values(new_rows['Date'])
+    items = new_rows['Item Number'].astype(str).to_numpy()
+    row_keys = pd.Index(items) if column is None else pd.MultiIndex.from_arrays([items, new_rows[column].astype(str).to_numpy()])
+    row_watermarks = watermarks.reindex(row_keys).to_numpy().astype(dates.dtype)
+    undated = np.isnat(dates)
+    covered = ~undated & ~np.isnat(row_watermarks) & (dates <= row_watermarks)
+    appended = new_rows[~undated & ~covered].reset_index(drop=True)
+
+    # The datafile's last date, for display
+    watermark = pd.Timestamp(watermarks.max()) if len(watermarks) else pd.NaT
+    new_watermark = cost_watermark(appended)
+    report = {
+        'rows': len(new_rows),
+        'appended': len(appended),
+        'skipped': int(covered.sum()),
+        'skipped_items': [str(item) for item in pd.unique(items[covered])],
+        'undated': int(undated.sum()),
+        'watermark': watermark,
+        'new_watermark': new_watermark if pd.isna(watermark) or (pd.notna(new_watermark) and new_watermark > watermark) else watermark,
+        'items': [str(item) for item in pd.unique(appended['Item Number'].astype(str))],
+    }
+    return appended, report
+
+def append_cost_rows(indexed_df, new_rows):
+    """merges new rows into an item indexed cost datafile (from build_item_index), after each item's own rows
+
+    new_rows must have the datafile's columns and types, as from prepare_append. The existing item codes are reused
+    rather than factorizing the item numbers again, new item numbers are added after the existing ones, and the
+    rows are reordered with a stable sort that only has to place the new rows. Returns the merged datafile and its
+    item offsets, as build_item_index does.
+    """
+    item_codes, item_numbers = factorize_items(indexed_df)
+    new_codes, new_items = factorize_items(new_rows)
+    item_numbers = item_numbers.append(new_items.difference(item_numbers, sort=False))
+    codes = np.concatenate([item_codes, item_numbers.get_indexer(new_items)[new_codes]])
+    order = np.argsort(codes, kind='stable')
+
+    merged_df = pd.DataFrame({
+        name: _concat_column(indexed_df[name], new_rows[name])[order]
+        for name in indexed_df.columns if name != 'Item Number'
+    })
+    merged_df.insert(indexed_df.columns.get_loc('Item Number'), 'Item Number', pd.Categorical.from_codes(codes[order], categories=item_numbers))
+
+    # Row offsets of each item in the merged datafile
+    boundaries = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(item_numbers)))])
+    item_offsets = {
+        item: (int(start), int(stop))
+        for item, start, stop in zip(item_numbers, boundaries[:-1], boundaries[1:])
+    }
+    return merged_df, item_offsets
+
+def merge_baseline_monthly(baseline_monthly, new_rows):
+    """adds the monthly totals of new cost rows to the per-item monthly baseline of build_baseline_monthly
+
+    Only the items with new rows are bucketed and replaced, each from its existing month totals and its new rows;
+    the other items keep their series.
+    """
+    merged = dict(baseline_monthly)
+    item_codes, item_numbers = factorize_items(new_rows)
+    dates = datetime_values(new_rows['Date'])
+    valid = ~np.isnat(dates)
+    costs = np.nan_to_num(new_rows['Cost'].to_numpy(dtype=float)[valid])
+    item_codes, months = item_codes[valid], dates[valid].astype('datetime64[M]')
+
+    # Each item's new rows as one contiguous run
+    order = np.argsort(item_codes, kind='stable')
+    item_codes, months, costs = item_codes[order], months[order], costs[order]
+    boundaries = np.searchsorted(item_codes, np.arange(len(item_numbers) + 1))
+    for item, start, stop in zip(item_numbers, boundaries[:-1], boundaries[1:]):
+        if start == stop:
+            continue
+        item = str(item)
+        item_months, item_costs = months[start:stop], costs[start:stop]
+        if item in merged:
+            item_months = np.concatenate([merged[item].index.to_numpy().astype('datetime64[M]'), item_months])
+            item_costs = np.concatenate([merged[item].to_numpy(dtype=float), item_costs])
+        month_keys, inverse = np.unique(item_months, return_inverse=True)
+        month_ends = ((month_keys + 1).astype('datetime64[D]') - np.timedelta64(1, 'D')).astype(dates.dtype)
+        merged[item] = pd.Series(np.bincount(inverse, weights=item_costs), index=pd.DatetimeIndex(month_ends, name='Date'), name='Cost')
+    return merged
+
+def _concat_column(values, new_values):
+    """one column of the existing rows followed by the new rows, as an array (or categorical) in the existing type"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return union_categoricals([values, pd.Series(new_values, dtype='category')], ignore_order=True)
+    return np.concatenate([values.to_numpy(), pd.Series(new_values).to_numpy().astype(values.to_numpy().dtype)])
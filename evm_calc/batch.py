@@ -0,0 +1,89 @@
+"""Headless batch runner: evaluates many slider scenarios from a file without the Streamlit app"""
+import pandas as pd
+
+from evm_calc.data import (
+    ATTRIBUTE_COLUMNS,
+    build_item_index,
+    format_attribute_data,
+    validate_columns_exist,
+)
+from evm_calc.pipeline import ScenarioCache, build_baseline_monthly, run_scenario
+
+
+def run_batch(cost_df, attribute_df, scenarios_df, cache_size=1024, profiler=None):
+    """runs the scenario pipeline for every row of scenarios_df and returns one summary row per scenario
+
+    cost_df and attribute_df are formatted datafiles. scenarios_df has the attribute file columns (Item Number, Cost,
+    Lead Time, Yield, Hours, with Yield as a percentage) and an optional Scenario column naming each row. Scenarios
+    whose item is missing from either datafile are left out and their names returned in the skipped list. When a
+    StageProfiler is given each scenario is recorded as one run of it.
+    """
+    if not validate_columns_exist(ATTRIBUTE_COLUMNS, scenarios_df):
+        raise ValueError(f"scenarios file is missing required columns: {', '.join(ATTRIBUTE_COLUMNS)}")
+
+    scenarios_df = format_attribute_data(scenarios_df.copy())
+    if 'Scenario' not in scenarios_df.columns:
+        scenarios_df['Scenario'] = scenarios_df.index
+
+    # Index both datafiles and bucket the baseline once for the whole batch
+    cost_df, cost_item_offsets = build_item_index(cost_df)
+    attribute_df, attribute_item_offsets = build_item_index(attribute_df)
+    baseline_monthly = build_baseline_monthly(cost_df)
+    scenario_cache = ScenarioCache(maxsize=cache_size)
+    evaluators = {}  # Per-item totals reused across every scenario of the same item
+
+    results = []
+    skipped = []
+    for scenario in scenarios_df.to_dict('records'):
+        item_number = scenario['Item Number']
+        if item_number not in cost_item_offsets or item_number not in attribute_item_offsets:
+            skipped.append(scenario['Scenario'])
+            continue
+        if profiler is not None:
+            profiler.start_run()
+
+        # Same dictionary the sidebar sliders produce
+        user_attributes_dictionary = {
+            "item_lead_time": scenario['Lead Time'],
+            "item_cost": scenario['Cost'],
+            "item_yeild": scenario['Yield'],
+            "item_hours": scenario['Hours']
+        }
+        combined_data_set_with_evm, evm_summary_data = run_scenario(
+            cost_df,
+            attribute_df,
+            user_attributes_dictionary,
+            item_number=item_number,
+            cost_item_offsets=cost_item_offsets,
+            attribute_item_offsets=attribute_item_offsets,
+            baseline_monthly=baseline_monthly,
+            scenario_cache=scenario_cache,
+            evaluators=evaluators,
+            profiler=profiler
+            )
+
+        results.append({
+            'Scenario': scenario['Scenario'],
+            'Item Number': item_number,
+            'Cost': user_attributes_dictionary["item_cost"],
+            'Lead Time': user_attributes_dictionary["item_lead_time"],
+            'Yield': user_attributes_dictionary["item_yeild"],
+            'Hours': user_attributes_dictionary["item_hours"],
+            **evm_summary_data,
+            'Baseline_Finish': last_cost_date(combined_data_set_with_evm, 'Initial_Costs'),
+            'Modified_Finish': last_cost_date(combined_data_set_with_evm, 'Modified_Costs'),
+        })
+
+    return pd.DataFrame(results), skipped
+
+def last_cost_date(combined_data_set, cost_column):
+    """returns the last month with a non-zero cost, or NaT if there is none"""
+    dates = combined_data_set.loc[combined_data_set[cost_column] != 0, 'Date']
+    return dates.iloc[-1] if len(dates) else pd.NaT
+
+def write_results(results_df, path):
+    """writes batch results to parquet or csv depending on the file extension"""
+    if str(path).endswith('.parquet'):
+        results_df.to_parquet(path, index=False)
+    else:
+        results_df.to_csv(path, index=False)
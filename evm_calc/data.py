@@ -0,0 +1,324 @@
+"""Reading, formatting and indexing the uploaded cost and attribute data"""
+import hashlib
+import importlib.util
+import io
+import os
+import warnings
+
+import pandas as pd
+import numpy as np
+
+
+# Define expected columns for each datafile
+COST_COLUMNS = ['Date', 'Cost', 'Item Number', 'Type']
+ATTRIBUTE_COLUMNS = ['Item Number', 'Cost', 'Lead Time', 'Yield', 'Hours']
+
+# Type of each expected column: 'date', 'number', 'percent' (a number divided by 100) or 'category' (text stored as
+# a categorical)
+COST_SCHEMA = {'Date': 'date', 'Cost': 'number', 'Item Number': 'category', 'Type': 'category'}
+ATTRIBUTE_SCHEMA = {'Item Number': 'category', 'Cost': 'number', 'Lead Time': 'number', 'Yield': 'percent', 'Hours': 'number'}
+
+# Typed, validated datafiles are cached here keyed on a hash of the file contents
+DEFAULT_CACHE_DIR = os.environ.get('EVM_CALC_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'evm_calc'))
+
+# Bump when the formatting or the dataset store's layout changes so older cached tables are not reused
+CACHE_VERSION = 2
+
+# Cost precisions of the compact cost table
+COST_DTYPES = ('float32', 'float64')
+
+# Day number stored for a missing date in a compact cost table
+MISSING_DAY = np.iinfo(np.int32).min
+
+def read_data_file(data_file, schema=None):
+    """reads a csv, excel, parquet or arrow (feather) file (an uploaded file or a path) into a dataframe
+
+    When a schema is given, csv files are parsed with the pyarrow engine (if installed) and the schema's category
+    columns are read straight into categoricals.
+    """
+    file_name = str(getattr(data_file, 'name', data_file)).lower()
+    if file_name.endswith('.parquet'):
+        return pd.read_parquet(data_file)
+    if file_name.endswith(('.arrow', '.feather')):
+        return pd.read_feather(data_file)
+    if file_name.endswith('.csv'):
+        if schema is None:
+            return pd.read_csv(data_file)
+        dtype = {column: 'category' for column, kind in schema.items() if kind == 'category'}
+        return pd.read_csv(data_file, engine=_csv_engine(), dtype=dtype)
+    return pd.read_excel(data_file)
+
+def _csv_engine():
+    """the fastest available csv parser"""
+    return 'pyarrow' if importlib.util.find_spec('pyarrow') is not None else 'c'
+
+def check_schema(df, schema, date_format=None):
+    """converts each schema column to its type and reports the values that are missing or could not be converted
+
+    Each column is converted and checked in the same pass. Returns the converted dataframe and a report dictionary
+    with 'missing_columns' (a list) and 'bad_rows' (a dataframe of Row, Column, Value and Problem, where Row counts
+    data rows from 1).
+    """
+    missing_columns = [column for column in schema if column not in df.columns]
+    bad_rows = []
+
+    for column, kind in schema.items():
+        if column in missing_columns:
+            continue
+        values = df[column]
+        missing = values.isna().to_numpy()
+
+        if kind == 'date':
+            converted = values if pd.api.types.is_datetime64_any_dtype(values) else pd.to_datetime(values, format=date_format, errors='coerce')
+            problem = 'not a date'
+        elif kind in ('number', 'percent'):
+            converted = values if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values) else pd.to_numeric(values, errors='coerce')
+            problem = 'not a number'
+            if kind == 'percent':
+                converted = converted / 100
+        else:
+            converted = _as_text_category(values)
+            problem = None
+
+        df[column] = converted
+        bad_rows.append(_bad_values(column, values, missing, 'missing'))
+        if problem is not None:
+            bad_rows.append(_bad_values(column, values, converted.isna().to_numpy() & ~missing, problem))
+
+    bad_rows_df = pd.concat(bad_rows, ignore_index=True) if bad_rows else _bad_values('', pd.Series([]), np.zeros(0, bool), '')
+    bad_rows_df = bad_rows_df.sort_values(['Row', 'Column'], kind='stable', ignore_index=True)
+    return df, {'missing_columns': missing_columns, 'bad_rows': bad_rows_df}
+
+def _as_text_category(values):
+    """stores a column as a categorical of strings (whole numbers without a trailing .0)"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        if pd.api.types.is_string_dtype(categories):
+            return values
+        return values.cat.rename_categories(_as_text_category(pd.Series(categories)).astype(str).tolist())
+    if pd.api.types.is_float_dtype(values) and np.all(np.mod(values.dropna(), 1) == 0):
+        # Item numbers in a column with blanks are read as floats
+        values = values.astype('Int64')
+    return values.astype(str).where(values.notna()).astype('category')
+
+def _bad_values(column, values, mask, problem):
+    """rows of the bad row report for the values of one column where mask is set"""
+    positions = np.flatnonzero(mask)
+    return pd.DataFrame({
+        'Row': positions + 1,
+        'Column': column,
+        'Value': values.iloc[positions].astype(str).to_numpy(),
+        'Problem': problem,
+    })
+
+def load_data_file(data_file, schema, date_format=None, cache_dir=DEFAULT_CACHE_DIR, compact=None):
+    """reads, converts and checks a cost or attribute datafile, reusing the cached result for a file seen before
+
+    schema is COST_SCHEMA or ATTRIBUTE_SCHEMA. Rows without an item number cannot be used and are dropped (they
+    are listed in the report). Returns the formatted dataframe and the check_schema report; when columns are missing
+    the dataframe is returned as read. Set cache_dir to None to skip the on-disk cache. For cost datafiles, compact
+    is a cost precision from COST_DTYPES to return the compact table of compact_cost_data.
+    """
+    file_name = str(getattr(data_file, 'name', data_file))
+    content = file_content(data_file)
+    cache_path = os.path.join(cache_dir, datafile_key(content, file_name, schema, date_format, compact)) if cache_dir else None
+
+    if cache_path and os.path.exists(f"{cache_path}.parquet"):
+        try:
+            df = pd.read_parquet(f"{cache_path}.parquet")
+            bad_rows_df = pd.read_parquet(f"{cache_path}.bad_rows.parquet")
+            return df, {'missing_columns': [], 'bad_rows': bad_rows_df}
+        except (OSError, ValueError):
+            pass  # Unreadable cache entry, rebuild it below
+
+    buffer = io.BytesIO(content)
+    buffer.name = file_name
+    df, report = check_schema(read_data_file(buffer, schema), schema, date_format)
+    if report['missing_columns']:
+        return df, report
+
+    df = df[df['Item Number'].notna()].reset_index(drop=True)
+    if compact:
+        df = compact_cost_data(df, compact)
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            df.to_parquet(f"{cache_path}.parquet.tmp")
+            report['bad_rows'].to_parquet(f"{cache_path}.bad_rows.parquet")
+            os.replace(f"{cache_path}.parquet.tmp", f"{cache_path}.parquet")
+        except (OSError, ImportError, ValueError) as e:
+            warnings.warn(f"could not cache datafile: {e}", RuntimeWarning, stacklevel=2)  # The file still loads uncached
+
+    return df, report
+
+def file_content(data_file):
+    """the bytes of an uploaded file or a file path"""
+    if hasattr(data_file, 'getvalue'):
+        return data_file.getvalue()
+    with open(data_file, 'rb') as file:
+        return file.read()
+
+def datafile_key(content, file_name, schema, date_format=None, compact=None):
+    """hash of a datafile's contents together with everything that changes how it is formatted"""
+    key = hashlib.sha256(content)
+    settings = (CACHE_VERSION, os.path.splitext(file_name)[1].lower(), schema, date_format)
+    if compact:
+        settings += (compact,)
+    key.update(repr(settings).encode())
+    return key.hexdigest()
+
+def compact_cost_data(df, cost_dtype='float32'):
+    """stores a formatted cost datafile in about half the memory
+
+    Dates become int32 day numbers (days since 1970-01-01, MISSING_DAY where missing) and costs are stored as
+    cost_dtype ('float32' keeps about 7 significant digits, 'float64' the full precision); Item Number and Type stay
+    categoricals. Day numbers rather than month numbers are kept, as lead time changes shift dates by days before
+    they are bucketed. Totals are still summed in float64, and the pipeline functions read either form.
+    """
+    if cost_dtype not in COST_DTYPES:
+        raise ValueError(f"cost precision must be one of {', '.join(COST_DTYPES)}")
+    compact_df = df.copy(deep=False)
+    dates = datetime_values(df['Date'])
+    if not is_compact_dates(df['Date']):
+        day_numbers = dates.astype('datetime64[D]').astype('int64')
+        compact_df['Date'] = np.where(np.isnat(dates), MISSING_DAY, day_numbers).astype(np.int32)
+    compact_df['Cost'] = df['Cost'].astype(cost_dtype)
+    for column in ('Item Number', 'Type'):
+        if not isinstance(df[column].dtype, pd.CategoricalDtype):
+            compact_df[column] = _as_text_category(df[column])
+    return compact_df
+
+def expand_cost_data(df):
+    """the standard form of a compact cost datafile (datetime dates and float64 costs) for display or export"""
+    if not is_compact_dates(df['Date']):
+        return df
+    return df.assign(Date=datetime_values(df['Date']), Cost=df['Cost'].astype(float))
+
+def is_compact_dates(dates):
+    """whether a date column holds the day numbers of a compact cost datafile"""
+    return pd.api.types.is_integer_dtype(dates)
+
+def memory_report(df):
+    """memory used by each column of a datafile, in bytes and bytes per row, with a Total row"""
+    usage = df.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        'Column': [*usage.index, 'Total'],
+        'Type': [*df.dtypes.astype(str), ''],
+        'Bytes': [*usage.to_numpy(), usage.sum()],
+    })
+    report['Bytes per row'] = report['Bytes'] / max(len(df), 1)
+    return report
+
+def format_cost_data(df):
+    """formats the columns of a cost datafile"""
+    df['Date'] = pd.to_datetime(df['Date'])  # Format date column
+    df['Cost'] = pd.to_numeric(df['Cost'], errors='coerce')  # Format cost column as numeric
+    df['Item Number'] = df['Item Number'].astype(str)  # Format item number as string
+    df['Type'] = df['Type'].astype(str)  # Format type as string
+    return df
+
+def format_attribute_data(df):
+    """formats the columns of an attribute datafile"""
+    df['Item Number'] = df['Item Number'].astype(str)  # Format item number as string
+    df['Cost'] = pd.to_numeric(df['Cost'], errors='coerce')  # Format cost as numeric
+    df['Lead Time'] = pd.to_numeric(df['Lead Time'], errors='coerce')  # Format lead time as numeric
+    df['Yield'] = pd.to_numeric(df['Yield'], errors='coerce') / 100  # Format yield as percentage
+    df['Hours'] = pd.to_numeric(df['Hours'], errors='coerce')  # Format hours as numeric
+    return df
+
+def validate_columns_exist(expected_columns, df):
+    """validates that the required columns exist in the uploaded dataframe"""
+    # Check if all expected columns are present in attributes data
+    return all(column in df.columns for column in expected_columns)
+
+def build_item_index(df):
+    """groups the rows of a datafile by item number once and records where each item's rows start and stop"""
+
+    # Code each item number as an integer, keeping the order items first appear in the file
+    codes, item_numbers = pd.factorize(df['Item Number'].astype(str))
+
+    # Stable sort on the codes so each item's rows are contiguous and keep their original order
+    order = np.argsort(codes, kind='stable')
+    indexed_df = df.iloc[order].reset_index(drop=True)
+    indexed_df['Item Number'] = pd.Categorical.from_codes(codes[order], categories=item_numbers)
+
+    # Row offsets of each item in the sorted datafile
+    boundaries = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(item_numbers)))])
+    item_offsets = {
+        item: (int(start), int(stop))
+        for item, start, stop in zip(item_numbers, boundaries[:-1], boundaries[1:])
+    }
+
+    return indexed_df, item_offsets
+
+def filter_data(df, filter_item_number, item_offsets=None):
+    """create a copy of the datafile that is filtered to specific item
+
+    When item_offsets from build_item_index is given, the item's rows are returned as a slice of df instead of a copy.
+    """
+
+    if item_offsets is not None:
+        #the datafile is already grouped by item, so the item is a contiguous block of rows
+        if filter_item_number:
+            start, stop = item_offsets.get(str(filter_item_number), (0, 0))
+            filtered_data = df.iloc[start:stop]
+        else:
+            filtered_data = df
+    else:
+        #create a acopy of the datafile to filter
+        filtered_data = df.copy()
+
+        if filter_item_number:
+            item_column = filtered_data['Item Number']
+            if not isinstance(item_column.dtype, pd.CategoricalDtype) or not pd.api.types.is_string_dtype(item_column.cat.categories):
+                #categoricals of text (formatted datafiles) compare on their codes without converting every row
+                item_column = item_column.astype(str)
+            filtered_data = filtered_data[item_column == filter_item_number]
+    
+    # Ensure there's data to plot
+    if filtered_data.empty:
+        warnings.warn("No data matches the filters.", RuntimeWarning, stacklevel=2)
+        
+    return filtered_data
+
+def factorize_items(df):
+    """returns integer item codes for each row and the item numbers (as strings) they refer to"""
+    item_column = df['Item Number']
+    if isinstance(item_column.dtype, pd.CategoricalDtype):
+        # Indexed datafiles already store the codes
+        return item_column.cat.codes.to_numpy().astype(np.int64), pd.Index(item_column.cat.categories.astype(str))
+    codes, item_numbers = pd.factorize(item_column.astype(str))
+    return codes.astype(np.int64), pd.Index(item_numbers)
+
+def datetime_values(dates):
+    """returns a date column as a datetime64 array, only parsing it when it is not already datetime
+
+    The day numbers of a compact cost datafile are returned in microseconds, like loaded dates, so lead time shifts
+    of part of a day are rounded the same way.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.to_numpy()
+    if is_compact_dates(dates):
+        day_numbers = dates.to_numpy()
+        return np.where(day_numbers == MISSING_DAY, np.datetime64('NaT', 'us'), day_numbers.astype('datetime64[D]').astype('datetime64[us]'))
+    return pd.to_datetime(dates).to_numpy()
+
+def cost_row_arrays(df):
+    """converts cost rows to the plain arrays the vectorized calculations work on
+
+    Returns the dates as integers in their own unit, the number of those units per day, the costs and the cost type
+    codes (0 other, 1 Labor, 2 Material). Rows with a missing date or cost contribute a cost of 0, and missing dates
+    borrow the earliest valid date so they stay in range.
+    """
+    dates = datetime_values(df['Date'])
+    valid = ~np.isnat(dates)
+    date_unit = np.datetime_data(dates.dtype)[0]
+    units_per_day = int(np.timedelta64(1, 'D') / np.timedelta64(1, date_unit))
+
+    date_values = dates.view('int64').copy()
+    date_values[~valid] = date_values[valid].min() if valid.any() else 0
+    costs = np.where(valid, np.nan_to_num(df['Cost'].to_numpy(dtype=float)), 0.0)
+    type_codes = np.where(df['Type'].eq('Labor').to_numpy(), 1, np.where(df['Type'].eq('Material').to_numpy(), 2, 0))
+
+    return date_values, units_per_day, costs, type_codes
@@ -0,0 +1,52 @@
+"""Largest triangle three buckets (LTTB) downsampling of chart series for display"""
+import numpy as np
+
+def lttb_indices(x, y, n_out):
+    """positions of the n_out points of (x, y) that keep the series' shape
+
+    The first and last points are always kept. The points between are split into n_out - 2 buckets, and from each
+    bucket the point forming the largest triangle with the point kept from the bucket before and the average of the
+    bucket after is kept, so peaks and troughs survive. The kept points are points of the series, not averages.
+    Series of n_out points or fewer are returned whole.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket i holds positions edges[i] to edges[i + 1]; each bucket has at least one point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+
+    indices = np.empty(n_out, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # The bucket after the last one is the final point
+        if bucket + 1 < len(counts):
+            next_x, next_y = mean_x[bucket + 1], mean_y[bucket + 1]
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Twice the triangle areas, which rank the same
+        areas = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous]) - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        indices[bucket + 1] = previous
+    return indices
+
+def display_indices(series, n_out):
+    """sorted positions to display for several series sharing one x axis (the union of each series' LTTB points)
+
+    The x axis is taken as evenly spaced, as consecutive periods are. Up to n_out points are kept per series, so
+    the union holds at most n_out times the number of series.
+    """
+    series = [np.asarray(values, dtype=float) for values in series]
+    n = len(series[0]) if series else 0
+    if n <= n_out:
+        return np.arange(n)
+    positions = np.arange(n)
+    return np.unique(np.concatenate([lttb_indices(positions, values, n_out) for values in series]))
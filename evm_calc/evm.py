@@ -0,0 +1,97 @@
+"""Earned Value Management calculations"""
+import numpy as np
+
+
+def calculate_evm_arrays(initial_costs, modified_costs):
+    """Calculates the Earned Value Management metrics for one or many items in a single vectorized pass
+
+    initial_costs and modified_costs are aligned period costs, either 1-D (one item) or 2-D (items x periods).
+    Returns a dictionary of time-phased arrays and a dictionary of summary values (one per item).
+    """
+    # Arrange inputs as items x periods so a single item and a batch share the same code path
+    initial_costs = np.atleast_2d(np.asarray(initial_costs, dtype=float))
+    modified_costs = np.atleast_2d(np.asarray(modified_costs, dtype=float))
+
+    # Calculate BAC (Budget at Completion) and EAC (Estimate at Completion) for every item
+    BAC = initial_costs.sum(axis=1, keepdims=True)
+    EAC = modified_costs.sum(axis=1, keepdims=True)
+
+    # Planned Value (PV) and Actual Cost (AC) to date are running totals of each series
+    PV_to_date = np.cumsum(initial_costs, axis=1)
+    AC_to_date = np.cumsum(modified_costs, axis=1)
+
+    # Schedule Percent Complete (PV_to_date / BAC) and Percent Complete (AC_to_date / EAC), 0 when the total is 0
+    schedule_percent_complete = _safe_divide(PV_to_date, BAC) * 100
+    percent_complete = _safe_divide(AC_to_date, EAC) * 100
+
+    # Earned Value (EV) as % complete times BAC, then the variances
+    EV = percent_complete * BAC / 100
+    schedule_variance = PV_to_date - EV
+    cost_variance = EV - AC_to_date
+
+    evm_arrays = {
+        'PV_to_Date': PV_to_date,
+        'Schedule_Percent_Complete': schedule_percent_complete,
+        'AC_to_Date': AC_to_date,
+        'Percent_Complete': percent_complete,
+        'Earned_Value': EV,
+        'Schedule_Variance': schedule_variance,
+        'Cost_Variance': cost_variance,
+    }
+
+    # Indices are measured at the baseline finish (last period with planned cost), the point where PV reaches BAC
+    n_items, n_periods = initial_costs.shape
+    if n_periods:
+        status_idx = n_periods - 1 - np.argmax(initial_costs[:, ::-1] != 0, axis=1)
+    else:
+        status_idx = np.zeros(n_items, dtype=int)
+    rows = np.arange(n_items)
+    pv_status = PV_to_date[rows, status_idx] if n_periods else np.zeros(n_items)
+    ac_status = AC_to_date[rows, status_idx] if n_periods else np.zeros(n_items)
+    ev_status = EV[rows, status_idx] if n_periods else np.zeros(n_items)
+    BAC = BAC[:, 0]
+    EAC = EAC[:, 0]
+
+    # Remaining amounts are differences of running totals, so rounding noise is cleared before dividing by them
+    work_remaining = _clear_rounding_noise(BAC - ev_status, BAC)
+    funds_remaining = _clear_rounding_noise(BAC - ac_status, BAC)
+
+    # Create summary data for EVM
+    evm_summary_data = {
+        'BAC': BAC,
+        'EAC': EAC,
+        'CPI': _safe_divide(ev_status, ac_status),  # Cost Performance Index (EV / AC)
+        'SPI': _safe_divide(ev_status, pv_status),  # Schedule Performance Index (EV / PV)
+        'TCPI': _safe_divide(work_remaining, funds_remaining),  # To-Complete Performance Index (work remaining / funds remaining)
+        'SV': _clear_rounding_noise(pv_status - ev_status, BAC),  # Schedule Variance (PV - EV, as in the time-phased data)
+        'CV': _clear_rounding_noise(ev_status - ac_status, BAC),  # Cost Variance (EV - AC)
+        'VAC': BAC - EAC,  # Variance at Completion
+        'ETC': _clear_rounding_noise(EAC - ac_status, EAC),  # Estimate to Complete
+    }
+
+    return evm_arrays, evm_summary_data
+
+def calculate_evm(combined_data_set):
+    """Calculates the Earned Value Management metrics for each date"""
+    evm_arrays, evm_summary = calculate_evm_arrays(
+        combined_data_set['Initial_Costs'].to_numpy(),
+        combined_data_set['Modified_Costs'].to_numpy()
+        )
+
+    # Add calculated values to the combined_data_set
+    for column, values in evm_arrays.items():
+        combined_data_set[column] = values[0]
+
+    # Create summary data for EVM, unpacked to plain numbers for the single item
+    evm_summary_data = {key: float(value[0]) for key, value in evm_summary.items()}
+
+    return combined_data_set, evm_summary_data
+
+def _clear_rounding_noise(values, scale):
+    """sets values that are negligible relative to scale (floating point noise) to exactly 0"""
+    return np.where(np.abs(values) <= np.abs(scale) * 1e-9, 0.0, values)
+
+def _safe_divide(numerator, denominator):
+    """element-wise division that returns 0 where the denominator is 0"""
+    numerator, denominator = np.broadcast_arrays(np.asarray(numerator, dtype=float), np.asarray(denominator, dtype=float))
+    return np.divide(numerator, denominator, out=np.zeros(numerator.shape), where=denominator != 0) + 0.0  # + 0.0 turns -0.0 into 0.0
@@ -0,0 +1,93 @@
+"""Goal seek: the slider values at which an item just meets a target EAC, variance at completion or finish month"""
+import pandas as pd
+import numpy as np
+
+from evm_calc.scenarios import SLIDER_ATTRIBUTES, run_item_scenarios
+from evm_calc.sweep import sweep_ranges
+
+# Metrics a target can be set for, and whether the target is a ceiling or a floor
+GOAL_METRICS = {
+    'EAC': 'at most',
+    'VAC': 'at least',
+    'Modified_Finish': 'at most',
+}
+
+def goal_seek(item_rows, initial_attributes, base_values, metric, target, keys=None, ranges=None, points=65, rounds=4, chunk_size=2000):
+    """finds, for each slider attribute in keys (all four by default), the value at which the item just meets target
+
+    Each attribute is searched on its own with the others at their base_values, over its range in ranges (by
+    default 0 to six times its base value, as in sweep_ranges, and Yield up to 1). A round evaluates points evenly
+    spaced values of every attribute still being searched as one batch of scenarios (run_item_scenarios), then
+    narrows each attribute's range to the step where the metric first crosses the target, so the value found is
+    within range / (points - 1) ** rounds of the crossing. The cost rows are first reduced to per-Type totals on each
+    distinct date, so a round costs the same for a large item as for a small one.
+
+    target is an amount for EAC and VAC and a date for Modified_Finish, whose month is the latest allowed. Returns
+    one row per attribute: the search range, the value found (Value, with Limit 'Maximum' or 'Minimum' for whether
+    it is the largest or smallest value that still meets the target) and the metric there. Status is 'limit', or
+    'met across the range' / 'not met in the range' (with no value) when the metric does not cross the target.
+    """
+    if metric not in GOAL_METRICS:
+        raise ValueError(f"unknown metric '{metric}', expected one of: {', '.join(GOAL_METRICS)}")
+    keys = list(SLIDER_ATTRIBUTES) if keys is None else [key for key in SLIDER_ATTRIBUTES if key in keys]
+    ranges = ranges or sweep_ranges(base_values, spread=5.0)
+    if metric == 'Modified_Finish':
+        # Finish dates are period ends, so any finish within the target month meets it
+        target = (pd.Timestamp(target) + pd.offsets.MonthEnd(0)).to_datetime64()
+    else:
+        target = float(target)
+    item_rows = _date_type_totals(item_rows)
+
+    grids = {key: np.linspace(*ranges[key], points) for key in keys}
+    results = {key: {'Status': 'not met in the range', 'Limit': None, 'Value': np.nan, metric: None} for key in keys}
+    for _ in range(rounds):
+        if not grids:
+            break
+        # Every searched attribute's grid in one batch, the other attributes at their base values
+        scenario_values = {
+            key: np.concatenate([grid if key == searched else np.full(points, float(base_values[key])) for searched, grid in grids.items()])
+            for key in SLIDER_ATTRIBUTES
+        }
+        summary_df = run_item_scenarios(item_rows, initial_attributes, scenario_values, chunk_size)
+        metric_values = summary_df[metric].to_numpy()
+        if metric == 'Modified_Finish':
+            slack = np.timedelta64(0, 'D')
+        else:
+            # Amounts within floating point noise of the target meet it, as when EAC is unchanged from BAC
+            slack = np.maximum(abs(target), summary_df['BAC'].abs().to_numpy()) * 1e-9
+        met = metric_values <= target + slack if GOAL_METRICS[metric] == 'at most' else metric_values >= target - slack
+
+        for position, (key, grid) in enumerate(list(grids.items())):
+            block = slice(position * points, (position + 1) * points)
+            crossings = np.flatnonzero(met[block][:-1] != met[block][1:])
+            if not len(crossings):
+                # Only the first round can miss: later grids run between a value that meets the target and one that does not
+                if met[block].all():
+                    results[key].update(Status='met across the range')
+                del grids[key]
+                continue
+            step = crossings[0]
+            meets = step if met[block][step] else step + 1
+            results[key].update(
+                Status='limit',
+                Limit='Maximum' if meets == step else 'Minimum',
+                Value=grid[meets],
+                **{metric: metric_values[block][meets]}
+                )
+            grids[key] = np.linspace(grid[step], grid[step + 1], points)
+
+    return pd.DataFrame([
+        {'Attribute': SLIDER_ATTRIBUTES[key], 'Base_Value': float(base_values[key]), 'Low': ranges[key][0], 'High': ranges[key][1], **results[key]}
+        for key in keys
+    ])
+
+def _date_type_totals(item_rows):
+    """the item's cost rows reduced to the total of each Type on each distinct date, which evaluate the same"""
+    dates, date_index = np.unique(item_rows['date_values'], return_inverse=True)
+    keys, key_index = np.unique(item_rows['type_codes'] * len(dates) + date_index, return_inverse=True)
+    return {
+        'date_values': dates[keys % max(len(dates), 1)],
+        'units_per_day': item_rows['units_per_day'],
+        'costs': np.bincount(key_index, weights=item_rows['costs'], minlength=len(keys)),
+        'type_codes': keys // max(len(dates), 1),
+    }
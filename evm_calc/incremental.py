@@ -0,0 +1,79 @@
+"""Incremental scenario evaluation: only the step a slider move affects is recomputed"""
+from collections import OrderedDict
+
+import pandas as pd
+import numpy as np
+
+from evm_calc.data import cost_row_arrays
+from evm_calc.evm import calculate_evm
+from evm_calc.periods import align_period_totals, bucket_costs, days_to_periods, month_range, period_end_dates
+from evm_calc.profiling import profile_stage
+
+
+class IncrementalEvaluator:
+    """one item's costs kept as per-Type totals so a slider move only redoes the step it affects
+
+    The cost rows are reduced once to the total of each Type (other, Labor, Material) on each distinct date. Cost,
+    yield and hours changes only scale the Labor and Material totals, so they reuse the per-Type period totals of the
+    current lead time. A lead time change shifts the distinct dates and re-buckets them, which depends on the number
+    of distinct dates rather than the number of cost rows. The per-Type period totals of the last max_shifts lead
+    times are kept, so dragging the lead time slider back to a recent value does not re-bucket. The baseline is
+    bucketed once.
+    """
+
+    def __init__(self, filtered_df, granularity="month", max_shifts=16):
+        self.granularity = granularity
+        self.max_shifts = max_shifts
+        date_values, self.units_per_day, costs, type_codes = cost_row_arrays(filtered_df)
+
+        # Total of each Type on each distinct date
+        self.dates, date_index = np.unique(date_values, return_inverse=True)
+        n_dates = len(self.dates)
+        self.type_totals = np.bincount(type_codes * n_dates + date_index, weights=costs, minlength=3 * n_dates).reshape(3, n_dates)
+
+        # The baseline never changes, only dated rows count (as when resampling)
+        self.baseline = bucket_costs(filtered_df, granularity)
+
+        # Per-Type period totals (first period, types x periods) of recent date shifts, least recently used first
+        self._bucketed = OrderedDict()
+
+    def evaluate(self, impacts_dic, profiler=None):
+        """returns the combined data set with EVM columns and the EVM summary for a set of impacts (see assess_impacts)
+
+        When a StageProfiler is given the shift (rows are the distinct dates re-bucketed, 0 when a recent shift is
+        reused), the rescale and EVM steps are recorded as stages.
+        """
+        shift = int(np.round(impacts_dic['date_impacts'] * self.units_per_day))
+        with profile_stage(profiler, "modify_dataset (shift)", 0) as record:
+            if shift in self._bucketed:
+                self._bucketed.move_to_end(shift)
+            else:
+                self._bucketed[shift] = self._rebucket(shift)
+                record['rows'] = len(self.dates)
+                while len(self._bucketed) > self.max_shifts:
+                    self._bucketed.popitem(last=False)
+            modified_first_period, type_period_totals = self._bucketed[shift]
+
+        with profile_stage(profiler, "modify_dataset (rescale)", type_period_totals.shape[1]):
+            # Scale the Labor and Material totals; other types are unchanged
+            multipliers = np.array([1.0, impacts_dic['labor_impacts'], impacts_dic['material_impacts']])
+            modified_totals = multipliers @ type_period_totals
+
+            first_period, initial_costs, modified_costs = align_period_totals(*self.baseline, modified_first_period, modified_totals)
+            combined_data_set = pd.DataFrame({
+                'Date': period_end_dates(first_period, len(initial_costs), self.granularity),
+                'Initial_Costs': initial_costs,
+                'Modified_Costs': modified_costs
+            })
+        with profile_stage(profiler, "calculate_evm", len(combined_data_set)):
+            return calculate_evm(combined_data_set)
+
+    def _rebucket(self, shift):
+        """buckets the per-Type date totals into periods after shifting every date by shift (in date units)"""
+        periods = days_to_periods(np.floor_divide(self.dates + shift, self.units_per_day), self.granularity)
+        first_period, n_periods = month_range(periods)
+        offsets = periods - first_period
+        type_period_totals = np.vstack([
+            np.bincount(offsets, weights=totals, minlength=n_periods) for totals in self.type_totals
+        ])
+        return first_period, type_period_totals
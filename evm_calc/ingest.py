@@ -0,0 +1,124 @@
+"""Streaming ingestion of cost ledgers too large to load whole"""
+import sys
+import time
+
+import pandas as pd
+
+from evm_calc.data import COST_COLUMNS, COST_SCHEMA, check_schema, read_data_file
+from evm_calc.snapshots import VERSION_COLUMNS, version_column
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Only this many bad rows are kept for the report (all of them are counted)
+MAX_REPORTED_BAD_ROWS = 1000
+
+# Chunk aggregates are merged into the running total after this many chunks
+MERGE_EVERY = 8
+
+BAD_ROW_COLUMNS = ['Row', 'Column', 'Value', 'Problem']
+
+def aggregate_cost_file(data_file, chunk_rows=500_000, date_format=None, progress=None):
+    """streams a cost file in chunks and sums the costs of rows with the same item, type and date
+
+    Each chunk is converted and checked with check_schema and then reduced to (Item Number, Type, Date) totals, so
+    memory is bounded by the number of distinct totals rather than the size of the ledger. The totals are kept at
+    the ledger's own dates (not months) because lead time changes shift dates before they are bucketed by month;
+    every chart and EVM result is the same as for the full ledger. Rows without an item number or date are dropped.
+    A version column (see VERSION_COLUMNS) is kept and summed by, so each baseline version keeps its own totals.
+
+    progress, if given, is called after each chunk with the number of rows read so far. Returns the totals with the
+    cost datafile columns and a report dictionary with 'missing_columns', 'bad_rows' (the first
+    MAX_REPORTED_BAD_ROWS), 'bad_row_count', 'rows', 'seconds', 'rows_per_second' and 'peak_rss_mb'.
+    """
+    start = time.perf_counter()
+    rows = 0
+    bad_rows = []
+    bad_row_count = 0
+    totals = None
+    partials = []
+    columns = COST_COLUMNS
+
+    for chunk in _read_chunks(data_file, chunk_rows):
+        missing_columns = [column for column in COST_COLUMNS if column not in chunk.columns]
+        if missing_columns:
+            return chunk, {'missing_columns': missing_columns, 'bad_rows': pd.DataFrame(columns=BAD_ROW_COLUMNS)}
+
+        columns = [column for column in (version_column(chunk),) if column] + COST_COLUMNS
+        chunk, report = check_schema(chunk[columns], COST_SCHEMA, date_format)
+
+        # Number bad rows from the start of the file rather than the chunk
+        chunk_bad_rows = report['bad_rows']
+        bad_row_count += chunk_bad_rows['Row'].nunique()
+        if sum(len(df) for df in bad_rows) < MAX_REPORTED_BAD_ROWS:
+            bad_rows.append(chunk_bad_rows.assign(Row=chunk_bad_rows['Row'] + rows))
+        rows += len(chunk)
+
+        partials.append(_sum_by_item_type_date(chunk[chunk['Item Number'].notna() & chunk['Date'].notna()]))
+        if len(partials) >= MERGE_EVERY:
+            totals = _sum_by_item_type_date(pd.concat([df for df in [totals, *partials] if df is not None], ignore_index=True))
+            partials = []
+
+        if progress is not None:
+            progress(rows)
+
+    pieces = [df for df in [totals, *partials] if df is not None]
+    totals = _sum_by_item_type_date(pd.concat(pieces, ignore_index=True)) if pieces else pd.DataFrame(columns=columns)
+
+    # Same column order and types as a formatted cost datafile
+    totals = totals[columns].sort_values(['Item Number', 'Date'], kind='stable', ignore_index=True)
+    totals['Item Number'] = totals['Item Number'].astype('category')
+    totals['Type'] = totals['Type'].astype('category')
+
+    seconds = time.perf_counter() - start
+    report = {
+        'missing_columns': [],
+        'bad_rows': pd.concat(bad_rows, ignore_index=True).head(MAX_REPORTED_BAD_ROWS) if bad_rows else pd.DataFrame(columns=BAD_ROW_COLUMNS),
+        'bad_row_count': bad_row_count,
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    return totals, report
+
+def _read_chunks(data_file, chunk_rows):
+    """yields the rows of a csv or parquet file chunk_rows at a time (other formats are read whole)"""
+    file_name = str(getattr(data_file, 'name', data_file)).lower()
+    if file_name.endswith('.csv'):
+        # Item Number and Type are read as text categoricals in every chunk so item numbers read the same way throughout
+        dtype = {column: pd.CategoricalDtype() for column in ('Item Number', 'Type', *VERSION_COLUMNS)}
+        reader = pd.read_csv(data_file, usecols=lambda column: column in COST_COLUMNS or column in VERSION_COLUMNS, dtype=dtype, chunksize=chunk_rows)
+        with reader:
+            yield from reader
+    elif file_name.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(data_file)
+        columns = [column for column in (*VERSION_COLUMNS, *COST_COLUMNS) if column in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield read_data_file(data_file)
+
+def _sum_by_item_type_date(df):
+    """total cost of each (Item Number, Type, Date), and version when there is one, with the keys as plain text
+
+    The item numbers and types are only converted to text after grouping, when there are far fewer of them.
+    """
+    keys = [column for column in (version_column(df),) if column] + ['Item Number', 'Type', 'Date']
+    totals = df.groupby(keys, observed=True, dropna=False, sort=False)['Cost'].sum().reset_index()
+    totals['Item Number'] = totals['Item Number'].astype(str)
+    totals['Type'] = totals['Type'].astype(str)
+    if keys[0] != 'Item Number':
+        totals[keys[0]] = totals[keys[0]].astype(str).where(totals[keys[0]].notna())
+    return totals
+
+def peak_rss_mb():
+    """peak resident memory of this process in MB, or None where it cannot be measured"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
@@ -0,0 +1,88 @@
+"""Monte Carlo risk simulation: slider values drawn from distributions and evaluated as a batch of scenarios"""
+import pandas as pd
+import numpy as np
+
+from evm_calc.scenarios import SLIDER_ATTRIBUTES, run_item_scenarios
+
+DISTRIBUTIONS = ("triangular", "normal", "pert")
+
+def sample_distribution(rng, distribution, low, mode, high, size):
+    """draws size values from a three point (low, most likely, high) estimate
+
+    triangular and pert (a beta distribution weighted towards the most likely value) stay within low and high.
+    normal is centred on the most likely value with low and high three standard deviations either side of it.
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"unknown distribution '{distribution}', expected one of: {', '.join(DISTRIBUTIONS)}")
+    if not low <= mode <= high:
+        raise ValueError(f"expected low <= most likely <= high, got {low}, {mode}, {high}")
+    if low == high:
+        return np.full(size, float(mode))
+
+    if distribution == "triangular":
+        return rng.triangular(low, mode, high, size)
+    if distribution == "normal":
+        return rng.normal(mode, (high - low) / 6, size)
+    alpha = 1 + 4 * (mode - low) / (high - low)
+    beta = 1 + 4 * (high - mode) / (high - low)
+    return low + rng.beta(alpha, beta, size) * (high - low)
+
+def sample_scenarios(base_values, distributions, samples, seed=None):
+    """draws a slider dictionary of samples values per attribute
+
+    distributions maps slider keys to (distribution, low, most likely, high); attributes without one stay at their
+    base value. Samples are kept at or above 0, and Yield at or below 1, as the sliders are.
+    """
+    rng = np.random.default_rng(seed)
+    scenario_values = {}
+    for key, value in base_values.items():
+        if key in distributions:
+            values = np.maximum(sample_distribution(rng, *distributions[key], samples), 0.0)
+            if key == "item_yeild":
+                values = np.minimum(values, 1.0)
+        else:
+            values = np.full(samples, float(value))
+        scenario_values[key] = values
+    return scenario_values
+
+def run_monte_carlo(item_rows, initial_attributes, base_values, distributions, samples, seed=None, chunk_size=2000):
+    """draws samples slider settings for one item and returns one EVM summary row per sample
+
+    Samples are evaluated chunk_size at a time (see run_item_scenarios), so memory is bounded by the chunk rather
+    than the number of samples.
+    """
+    scenario_values = sample_scenarios(base_values, distributions, samples, seed)
+    summary_df = run_item_scenarios(item_rows, initial_attributes, scenario_values, chunk_size)
+    labels = pd.DataFrame({column: scenario_values[key] for key, column in SLIDER_ATTRIBUTES.items()})
+    return pd.concat([labels, summary_df], axis=1)
+
+def monte_carlo_percentiles(results_df, percentiles=(10, 50, 90)):
+    """P10/P50/P90 (by default) of EAC, VAC and the modified finish month, one row per percentile"""
+    rows = []
+    finish_values = results_df['Modified_Finish'].dropna().to_numpy()
+    for percentile in percentiles:
+        rows.append({
+            'Percentile': f"P{percentile}",
+            'EAC': np.percentile(results_df['EAC'], percentile),
+            'VAC': np.percentile(results_df['VAC'], percentile),
+            # Finish dates are whole months, so take the month the percentile falls in
+            'Modified_Finish': np.percentile(finish_values, percentile, method='inverted_cdf') if len(finish_values) else pd.NaT,
+        })
+    return pd.DataFrame(rows)
+
+def s_curve(values, points=201):
+    """cumulative probability of finishing at or below each value
+
+    Discrete values (such as finish months) give one row per distinct value; otherwise the curve is sampled at
+    points evenly spaced probabilities.
+    """
+    values = pd.Series(values).dropna()
+    if values.empty:
+        return pd.DataFrame({'Value': [], 'Probability': []})
+
+    counts = values.value_counts().sort_index()
+    if len(counts) <= points:
+        return pd.DataFrame({'Value': counts.index, 'Probability': counts.cumsum().to_numpy() / len(values)})
+
+    probabilities = np.linspace(0, 1, points)
+    return pd.DataFrame({'Value': np.quantile(values.to_numpy(), probabilities), 'Probability': probabilities})
@@ -0,0 +1,97 @@
+"""Period numbering and bucketing helpers shared by the vectorized calculations"""
+import pandas as pd
+import numpy as np
+
+from evm_calc.data import datetime_values
+
+# Time period granularities and the pandas period frequencies they use. Any other pandas period frequency (such as
+# 'Q-JUN' for a fiscal year ending in June) can be passed in their place.
+GRANULARITIES = {
+    "week": "W-SUN",
+    "month": "M",
+    "quarter": "Q-DEC",
+    "fiscal quarter": "Q-SEP",  # Fiscal year running October to September
+}
+
+def period_frequency(granularity):
+    """returns the pandas period frequency for a granularity name (or a frequency passed directly)"""
+    return GRANULARITIES.get(granularity, granularity)
+
+def bucket_by_item_and_month(codes, month_offsets, costs, n_items, n_months):
+    """sums costs into an items x months matrix with a single bincount"""
+    return np.bincount(codes * n_months + month_offsets, weights=costs, minlength=n_items * n_months).reshape(n_items, n_months)
+
+def days_to_months(day_numbers):
+    """converts day numbers (days since 1970-01-01) to month numbers (months since 1970-01)"""
+    if len(day_numbers) == 0:
+        return np.zeros(0, dtype='int64')
+    # Calendar conversion is only done for each distinct day in range, then looked up per row
+    first_day = day_numbers.min()
+    calendar = np.arange(first_day, day_numbers.max() + 1).astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+    return calendar[day_numbers - first_day]
+
+def days_to_periods(day_numbers, granularity="month"):
+    """converts day numbers (days since 1970-01-01) to period ordinals of the granularity"""
+    freq = period_frequency(granularity)
+    if freq == "M":
+        # Month ordinals are month numbers since 1970-01
+        return days_to_months(day_numbers)
+    if len(day_numbers) == 0:
+        return np.zeros(0, dtype='int64')
+    first_day = day_numbers.min()
+    days = pd.DatetimeIndex(np.arange(first_day, day_numbers.max() + 1).astype('datetime64[D]'))
+    calendar = days.to_period(freq).asi8
+    return calendar[day_numbers - first_day]
+
+def month_range(months):
+    """returns the first month number and the number of months spanned"""
+    if len(months) == 0:
+        return 0, 0
+    first_month = int(months.min())
+    return first_month, int(months.max()) - first_month + 1
+
+def month_end_dates(first_month, n_months):
+    """creates the month end dates for n_months consecutive month numbers"""
+    return period_end_dates(first_month, n_months, "month")
+
+def period_end_dates(first_period, n_periods, granularity="month"):
+    """creates the end dates (as midnight) of n_periods consecutive period ordinals"""
+    freq = period_frequency(granularity)
+    return pd.PeriodIndex.from_ordinals(np.arange(first_period, first_period + n_periods), freq=freq).to_timestamp(how='end').normalize()
+
+def date_column_periods(df, granularity="month"):
+    """period ordinals and costs of the rows of a datafile with a date (only the Date and Cost columns are read)"""
+    dates = datetime_values(df['Date'])
+    valid = ~np.isnat(dates)
+    date_unit = np.datetime_data(dates.dtype)[0]
+    units_per_day = int(np.timedelta64(1, 'D') / np.timedelta64(1, date_unit))
+    day_numbers = np.floor_divide(dates[valid].view('int64'), units_per_day)
+    costs = np.nan_to_num(df['Cost'].to_numpy(dtype=float)[valid])
+    return days_to_periods(day_numbers, granularity), costs
+
+def bucket_costs(df, granularity="month"):
+    """sums the costs of a datafile into consecutive periods
+
+    Returns the first period ordinal and the totals of every period from the first to the last dated row.
+    """
+    periods, costs = date_column_periods(df, granularity)
+    first_period, n_periods = month_range(periods)
+    return first_period, np.bincount(periods - first_period, weights=costs, minlength=n_periods)
+
+def align_period_totals(first_period_1, totals_1, first_period_2, totals_2):
+    """places two runs of period totals on their common range, filling the periods either run lacks with 0
+
+    Returns the first period ordinal of the common range and the two aligned arrays.
+    """
+    runs = [(first, totals) for first, totals in ((first_period_1, totals_1), (first_period_2, totals_2)) if len(totals)]
+    if not runs:
+        return 0, np.zeros(0), np.zeros(0)
+    first_period = min(first for first, _ in runs)
+    n_periods = max(first + len(totals) for first, totals in runs) - first_period
+
+    aligned = []
+    for first, totals in ((first_period_1, totals_1), (first_period_2, totals_2)):
+        values = np.zeros(n_periods)
+        values[first - first_period:first - first_period + len(totals)] = totals
+        aligned.append(values)
+    return first_period, aligned[0], aligned[1]
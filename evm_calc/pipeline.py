@@ -0,0 +1,242 @@
+"""The single item scenario pipeline: filter, impacts, modify, period bucketing and EVM"""
+from collections import OrderedDict
+
+import pandas as pd
+import numpy as np
+
+from evm_calc.data import MISSING_DAY, datetime_values, filter_data, is_compact_dates
+from evm_calc.evm import calculate_evm
+from evm_calc.incremental import IncrementalEvaluator
+from evm_calc.periods import (
+    align_period_totals,
+    bucket_costs,
+    days_to_periods,
+    month_range,
+    period_end_dates,
+    period_frequency,
+)
+from evm_calc.profiling import profile_stage
+
+
+def run_scenario(
+        cost_df,
+        attributes_df,
+        user_attributes_dictionary,
+        item_number="",
+        cost_item_offsets=None,
+        attribute_item_offsets=None,
+        baseline_monthly=None,
+        scenario_cache=None,
+        granularity="month",
+        evaluators=None,
+        profiler=None
+        ):
+    """runs the filter, impact, modify, period bucketing and EVM steps for one item and set of slider values
+
+    granularity is a key of GRANULARITIES (or a pandas period frequency); baseline_monthly is only used by month.
+    evaluators is a dictionary kept between calls; when given, each item's IncrementalEvaluator is stored in it and
+    the modify and bucketing steps only redo what the changed sliders affect. When a StageProfiler is given each
+    step is recorded as a stage.
+    """
+
+    #Return the stored result when this item, slider combination and granularity has already been computed
+    cache_key = scenario_key(item_number, user_attributes_dictionary, granularity)
+    if scenario_cache is not None:
+        with profile_stage(profiler, "scenario cache") as record:
+            cached = scenario_cache.get(cache_key)
+            record['rows'] = 0 if cached is None else len(cached[0])
+        if cached is not None:
+            return cached
+
+    #filter the cost_df by the desire item number
+    with profile_stage(profiler, "filter_data") as record:
+        filtered_df = filter_data(cost_df, item_number, cost_item_offsets)
+        filtered_attributes_df = filter_data(attributes_df, item_number, attribute_item_offsets)
+        record['rows'] = len(filtered_df)
+
+    #Calculate the percent change impacts for each attribute
+    with profile_stage(profiler, "assess_impacts", len(filtered_attributes_df)):
+        impacts_dic = assess_impacts(filtered_attributes_df, user_attributes_dictionary)
+
+    if evaluators is not None:
+        #Reuse the item's per-Type totals, so only the rescale (cost, yield, hours) or shift (lead time) is redone
+        evaluator_key = (str(item_number), period_frequency(granularity))
+        if evaluator_key not in evaluators:
+            with profile_stage(profiler, "IncrementalEvaluator setup", len(filtered_df)):
+                evaluators[evaluator_key] = IncrementalEvaluator(filtered_df, granularity)
+        result = evaluators[evaluator_key].evaluate(impacts_dic, profiler)
+        if scenario_cache is not None:
+            scenario_cache.put(cache_key, result)
+        return result
+
+    #Modify datafile based on impacts (only the columns the bucketing uses)
+    with profile_stage(profiler, "modify_dataset", len(filtered_df)):
+        modified_df = modify_dataset(filtered_df[['Date', 'Cost', 'Type']], impacts_dic)
+
+    #create a common X dataset - combined data set is three columns, x value of dates, y values of og costs, and y values of modified costs
+    if baseline_monthly is not None and str(item_number) in baseline_monthly and period_frequency(granularity) == "M":
+        #the baseline was already bucketed by month when the file was uploaded, so only the modified data is bucketed
+        with profile_stage(profiler, "create_common_x_value_by_month", len(modified_df)):
+            combined_data_set = align_monthly_costs(baseline_monthly[str(item_number)], resample_costs_by_month(modified_df))
+    else:
+        with profile_stage(profiler, "create_common_x_value_by_month", len(filtered_df) + len(modified_df)):
+            combined_data_set = create_common_x_value_by_month(filtered_df, modified_df, granularity)
+
+    #Calculate EVM data and adds columns to the combined_data_set for the time-phased values
+    with profile_stage(profiler, "calculate_evm", len(combined_data_set)):
+        result = calculate_evm(combined_data_set)
+
+    if scenario_cache is not None:
+        scenario_cache.put(cache_key, result)
+
+    return result
+
+def scenario_key(item_number, user_attributes_dictionary, granularity="month"):
+    """creates a hashable key from the item number, the four slider values and the granularity"""
+    return (
+        str(item_number),
+        float(user_attributes_dictionary["item_cost"]),
+        float(user_attributes_dictionary["item_lead_time"]),
+        float(user_attributes_dictionary["item_yeild"]),
+        float(user_attributes_dictionary["item_hours"]),
+        period_frequency(granularity),
+    )
+
+class ScenarioCache:
+    """least recently used store of scenario results with hit and miss counters"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """returns the stored result for key (marking it most recently used), or None"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """stores a result, evicting the least recently used entry when full"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """removes all entries and resets the counters"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def discard_items(self, items):
+        """removes the entries of the given item numbers (keys from scenario_key), keeping every other item's"""
+        items = {str(item) for item in items}
+        for key in [key for key in self._entries if key[0] in items]:
+            del self._entries[key]
+
+def assess_impacts(initial_attributes, user_attributes_dictionary):
+
+    """creates a dictionary of the impacts between initial attributes and user changes"""
+    #item_lead_time changes the date only, change will be expressed in days. This will use averages in the case there are multiple data entries for attributes
+    initial_lead_time = initial_attributes['Lead Time'].mean() 
+    initial_cost = initial_attributes['Cost'].mean() 
+    initial_yeild = initial_attributes['Yield'].mean() 
+    initial_item_hours = initial_attributes['Hours'].mean() 
+
+    #Changes
+    new_lead_time = user_attributes_dictionary["item_lead_time"] - initial_lead_time #will be added to all line items
+    new_cost_percent = (user_attributes_dictionary["item_cost"] -initial_cost)/initial_cost #percent will be applied to materials costs
+    new_yield = user_attributes_dictionary["item_yeild"] - initial_yeild #already percentages, so this will give a percent change that should be applied to labor and material costs
+    new_item_hours = (user_attributes_dictionary["item_hours"]-initial_item_hours)/initial_item_hours #percentage will be applied to labor costs
+
+    #summarize change impacts
+    material_impacts = (1 + new_cost_percent - new_yield)
+    labor_impacts = (1 + new_item_hours - new_yield)
+    date_impacts = new_lead_time
+
+    #add to dictionary for simplicity downstream
+    impacts_dictionary = {
+        "material_impacts": material_impacts,  
+        "labor_impacts": labor_impacts,     
+        "date_impacts": date_impacts 
+    }
+
+
+    return impacts_dictionary
+
+def modify_dataset(filtered_df, impacts_dic):
+    """takes the filtered data and makes a modifed dataframe based on impacts"""
+
+    modified_df = filtered_df.copy()
+
+    #modify filtered_df cost column when type = hours by multiplying impacts_dic item labor_impacts
+    modified_df.loc[filtered_df['Type'] == 'Labor', 'Cost'] *= impacts_dic['labor_impacts']
+
+    #modify filtered_df cost column when type = material by multiplying impacts_dic item material_impacts
+    modified_df.loc[filtered_df['Type'] == 'Material', 'Cost'] *= impacts_dic['material_impacts']
+
+    #modify filtered_df date column by aadding impacts_dic item date_impacts
+    if is_compact_dates(modified_df['Date']):
+        #compact datafiles keep day numbers, which land on the same day as the shifted datetime; a missing lead time
+        #impact leaves the dates missing, as it does for datetimes
+        day_numbers = modified_df['Date'].to_numpy()
+        shifted = np.floor(day_numbers + impacts_dic['date_impacts'])
+        modified_df['Date'] = np.where(np.isnan(shifted) | (day_numbers == MISSING_DAY), MISSING_DAY, shifted).astype(day_numbers.dtype)
+        return modified_df
+    modified_df['Date'] = pd.to_datetime(modified_df['Date'])
+    date_impact = pd.to_timedelta(impacts_dic['date_impacts'], unit='D')  # NaT for a missing lead time impact
+    modified_df['Date'] = modified_df['Date'] + date_impact
+    
+    return modified_df
+
+def build_baseline_monthly(cost_df):
+    """buckets the baseline costs of every item by month in one grouped pass"""
+    if is_compact_dates(cost_df['Date']):
+        #compact datafiles keep day numbers and may store costs in single precision
+        cost_df = cost_df[['Item Number']].assign(Date=datetime_values(cost_df['Date']), Cost=cost_df['Cost'].astype(float))
+    monthly = cost_df.groupby(['Item Number', pd.Grouper(key='Date', freq='ME')], observed=True)['Cost'].sum()
+    return {str(item): item_monthly.droplevel(0) for item, item_monthly in monthly.groupby(level=0, observed=True)}
+
+def resample_costs_by_month(df):
+    """sums the costs of a datafile by month, using the last day of each month"""
+    return resample_costs_by_period(df, "month")
+
+def resample_costs_by_period(df, granularity="month"):
+    """sums the costs of a datafile into consecutive periods, indexed by the last day of each period"""
+    first_period, totals = bucket_costs(df, granularity)
+    return pd.Series(totals, index=period_end_dates(first_period, len(totals), granularity), name='Cost')
+
+def create_common_x_value_by_month(filtered_df, modified_df, granularity="month"):
+    """creates a consistent date field between both datafiles for the x-axis
+
+    Despite the name any granularity can be used. Both datafiles are bucketed with a bincount over period ordinals,
+    and only their Date and Cost columns are read.
+    """
+    first_period, initial_costs, modified_costs = align_period_totals(*bucket_costs(filtered_df, granularity), *bucket_costs(modified_df, granularity))
+    return _combined_data_set(first_period, initial_costs, modified_costs, granularity)
+
+def align_monthly_costs(monthly_costs_1, monthly_costs_2, granularity="month"):
+    """aligns two series of period totals (indexed by period end, as from resample_costs_by_period) on a common range"""
+    runs = []
+    for period_costs in (monthly_costs_1, monthly_costs_2):
+        # Spread the totals onto every period between the series' first and last period
+        periods = days_to_periods(period_costs.index.to_numpy().astype('datetime64[D]').astype('int64'), granularity)
+        first_period, n_periods = month_range(periods)
+        runs += [first_period, np.bincount(periods - first_period, weights=period_costs.to_numpy(dtype=float), minlength=n_periods)]
+    return _combined_data_set(*align_period_totals(*runs), granularity)
+
+def _combined_data_set(first_period, initial_costs, modified_costs, granularity):
+    """the combined data set layout used by calculate_evm and the charts"""
+    return pd.DataFrame({
+        'Date': period_end_dates(first_period, len(initial_costs), granularity),
+        'Initial_Costs': initial_costs,
+        'Modified_Costs': modified_costs
+    })
@@ -0,0 +1,133 @@
+"""Portfolio mode: every item modified and rolled up to program level in one batched pass"""
+import pandas as pd
+import numpy as np
+
+from evm_calc.data import cost_row_arrays, factorize_items
+from evm_calc.evm import calculate_evm, calculate_evm_arrays
+from evm_calc.periods import bucket_by_item_and_month, days_to_months, month_end_dates, month_range
+
+
+def assess_portfolio_impacts(attributes_df, percent_changes=None, new_attributes_df=None):
+    """creates a table of impacts for every item at once, indexed by item number
+
+    The new attributes come from new_attributes_df (per-item values, same columns as the attribute file) where an
+    item is listed there, otherwise from applying percent_changes (global percent change per slider) to the item's
+    initial attributes. The impact formulas match assess_impacts.
+    """
+    attribute_columns = ['Cost', 'Lead Time', 'Yield', 'Hours']
+
+    # Average duplicate attribute rows per item, as assess_impacts does
+    initial = attributes_df.groupby(attributes_df['Item Number'].astype(str))[attribute_columns].mean()
+
+    # Apply the global percent changes to every item
+    percent_changes = percent_changes or {}
+    new = initial * pd.Series({
+        'Cost': 1 + percent_changes.get("item_cost", 0) / 100,
+        'Lead Time': 1 + percent_changes.get("item_lead_time", 0) / 100,
+        'Yield': 1 + percent_changes.get("item_yeild", 0) / 100,
+        'Hours': 1 + percent_changes.get("item_hours", 0) / 100,
+    })
+    new['Yield'] = new['Yield'].clip(upper=1)
+
+    # Per-item values take precedence over the global changes
+    if new_attributes_df is not None:
+        per_item = new_attributes_df.groupby(new_attributes_df['Item Number'].astype(str))[attribute_columns].mean()
+        new.update(per_item)
+
+    #Changes
+    new_lead_time = new['Lead Time'] - initial['Lead Time']
+    new_cost_percent = (new['Cost'] - initial['Cost']) / initial['Cost']
+    new_yield = new['Yield'] - initial['Yield']
+    new_item_hours = (new['Hours'] - initial['Hours']) / initial['Hours']
+
+    #summarize change impacts
+    return pd.DataFrame({
+        "material_impacts": 1 + new_cost_percent - new_yield,
+        "labor_impacts": 1 + new_item_hours - new_yield,
+        "date_impacts": new_lead_time,
+    })
+
+def build_portfolio_index(cost_df):
+    """precomputes the slider-independent parts of the portfolio calculation once per uploaded dataset
+
+    Returns a dictionary of per-row arrays (item and cost type codes, dates as integers, costs) and the baseline
+    costs bucketed into an items x months matrix.
+    """
+    codes, item_numbers = factorize_items(cost_df)
+
+    # Dates are kept as integers in their own unit so lead time shifts are plain integer additions
+    date_values, units_per_day, costs, type_codes = cost_row_arrays(cost_df)
+
+    # Baseline costs bucketed by item and month
+    baseline_months = days_to_months(np.floor_divide(date_values, units_per_day))
+    first_month, n_months = month_range(baseline_months)
+    baseline_costs = bucket_by_item_and_month(codes, baseline_months - first_month, costs, len(item_numbers), n_months)
+
+    return {
+        'codes': codes,
+        'item_numbers': item_numbers,
+        'multiplier_keys': codes * 3 + type_codes,
+        'date_values': date_values,
+        'units_per_day': units_per_day,
+        'costs': costs,
+        'first_month': first_month,
+        'baseline_costs': baseline_costs,
+    }
+
+def modify_portfolio(portfolio_index, impacts_df):
+    """applies each item's impacts to every row of the cost table in one vectorized pass
+
+    Items without impacts are left unchanged. Returns the modified cost and month number of every row.
+    """
+    impacts = impacts_df.reindex(portfolio_index['item_numbers'])
+
+    # Scale labor and material costs, leave any other type unchanged
+    multipliers = np.column_stack([
+        np.ones(len(impacts)),
+        impacts['labor_impacts'].fillna(1).to_numpy(),
+        impacts['material_impacts'].fillna(1).to_numpy(),
+    ])
+    modified_costs = portfolio_index['costs'] * multipliers.ravel()[portfolio_index['multiplier_keys']]
+
+    # Shift every date by its item's lead time change (in days)
+    units_per_day = portfolio_index['units_per_day']
+    item_date_shift = np.round(impacts['date_impacts'].fillna(0).to_numpy() * units_per_day).astype('int64')
+    shifted_dates = portfolio_index['date_values'] + item_date_shift[portfolio_index['codes']]
+    modified_months = days_to_months(np.floor_divide(shifted_dates, units_per_day))
+
+    return modified_costs, modified_months
+
+def calculate_portfolio_evm(portfolio_index, impacts_df):
+    """rolls the baseline and modified costs of every item up into program-level monthly EVM data
+
+    Returns the program combined data set with EVM columns, the program EVM summary and a per-item EVM summary table.
+    """
+    modified_costs, modified_months = modify_portfolio(portfolio_index, impacts_df)
+    n_items = len(portfolio_index['item_numbers'])
+
+    # Common month range covering the baseline and the shifted modified dates
+    baseline_costs = portfolio_index['baseline_costs']
+    baseline_first = portfolio_index['first_month']
+    modified_first, modified_n = month_range(modified_months)
+    first_month = min(baseline_first, modified_first)
+    n_months = max(baseline_first + baseline_costs.shape[1], modified_first + modified_n) - first_month
+
+    # Place the precomputed baseline into the common range and bucket the modified costs
+    item_initial_costs = np.zeros((n_items, n_months))
+    offset = baseline_first - first_month
+    item_initial_costs[:, offset:offset + baseline_costs.shape[1]] = baseline_costs
+    item_modified_costs = bucket_by_item_and_month(portfolio_index['codes'], modified_months - first_month, modified_costs, n_items, n_months)
+
+    # Program level data uses the same layout as create_common_x_value_by_month
+    combined_data_set = pd.DataFrame({
+        'Date': month_end_dates(first_month, n_months),
+        'Initial_Costs': item_initial_costs.sum(axis=0),
+        'Modified_Costs': item_modified_costs.sum(axis=0)
+    })
+    combined_data_set_with_evm, evm_summary_data = calculate_evm(combined_data_set)
+
+    # Per-item summary from one batched EVM pass
+    _, item_summary = calculate_evm_arrays(item_initial_costs, item_modified_costs)
+    item_summary_df = pd.DataFrame(item_summary, index=pd.Index(portfolio_index['item_numbers'], name='Item Number'))
+
+    return combined_data_set_with_evm, evm_summary_data, item_summary_df
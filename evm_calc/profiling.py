@@ -0,0 +1,86 @@
+"""Opt-in timing of the scenario pipeline stages: wall time, rows processed and memory allocated"""
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+# Columns of a profiler's records
+PROFILE_COLUMNS = ['run', 'stage', 'ms', 'rows', 'allocated_kb']
+
+class StageProfiler:
+    """records the wall time, rows processed and memory allocated of each pipeline stage, grouped into runs
+
+    Pass one to run_scenario (or time any block with stage()) and call start_run() before each run; the app starts
+    one run per rerun. Memory is the peak traced by tracemalloc during the stage above what was allocated when it
+    started, so it is only recorded when trace_memory is set, as tracing slows Python code down several times.
+    Records of the last max_runs runs are kept.
+    """
+
+    def __init__(self, trace_memory=False, max_runs=500):
+        self.trace_memory = trace_memory
+        self.max_runs = max_runs
+        self.run = 0
+        self.run_started = time.perf_counter()
+        self.records = []
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def start_run(self):
+        """starts a new run; later stages are recorded under it"""
+        self.run += 1
+        self.run_started = time.perf_counter()
+        self.records = [record for record in self.records if record['run'] > self.run - self.max_runs]
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """times the block as a stage of the current run and yields its record, whose rows can be set in the block"""
+        record = {'run': self.run, 'stage': name, 'ms': 0.0, 'rows': rows, 'allocated_kb': None}
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['ms'] = (time.perf_counter() - start) * 1000
+            if tracing:
+                record['allocated_kb'] = (tracemalloc.get_traced_memory()[1] - start_memory) / 1024
+            self.records.append(record)
+
+    def run_ms(self):
+        """wall time since the current run started, in ms"""
+        return (time.perf_counter() - self.run_started) * 1000
+
+    def to_frame(self, run=None):
+        """the records (of one run when given) as a dataframe with PROFILE_COLUMNS"""
+        records = self.records if run is None else [record for record in self.records if record['run'] == run]
+        return pd.DataFrame(records, columns=PROFILE_COLUMNS)
+
+    def dumps(self, file_format='json'):
+        """the records as JSON (a list of records) or CSV text"""
+        if file_format == 'csv':
+            return self.to_frame().to_csv(index=False)
+        return json.dumps(self.records, indent=1)
+
+    def dump(self, path):
+        """writes the records to a .json or .csv file"""
+        with open(path, 'w', newline='') as file:
+            file.write(self.dumps('csv' if os.path.splitext(path)[1].lower() == '.csv' else 'json'))
+
+    def close(self):
+        """stops tracing memory if this profiler started it"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+def profile_stage(profiler, name, rows=None):
+    """profiler.stage(name, rows), or a block that records nothing when profiler is None"""
+    if profiler is None:
+        return nullcontext({})
+    return profiler.stage(name, rows)
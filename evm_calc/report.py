@@ -0,0 +1,350 @@
+"""PDF reports with the charts drawn as vector graphics straight into ReportLab
+
+The charts are built as ReportLab drawings from the scenario results, so no chart images are rendered (and no
+kaleido process is started). This module needs reportlab, so it is imported on its own rather than from evm_calc.
+"""
+import io
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from reportlab import rl_config
+from reportlab.graphics import renderPDF
+from reportlab.graphics.shapes import Drawing, Line, PolyLine, String
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from evm_calc.data import filter_data
+from evm_calc.pipeline import run_scenario
+from evm_calc.sweep import base_slider_values
+
+# Size of each chart on the page, in points
+CHART_WIDTH = 500
+CHART_HEIGHT = 250
+
+# Plot area margins inside a chart (left, right, top, bottom); the right margin holds the BAC and EAC labels
+MARGINS = (70, 95, 25, 30)
+
+# Most x axis labels shown on a chart
+MAX_DATE_LABELS = 6
+
+BASELINE_COLOR = colors.blue
+MODIFIED_COLOR = colors.green
+GRID_COLOR = colors.lightgrey
+
+# Page streams are compressed without ReportLab's default ASCII85 text encoding, which is slow and adds a quarter to
+# the file size. ReportLab reads this process-wide setting while writing, so it is set once here rather than around
+# each export, which would race between the report job's thread and an export from the page.
+rl_config.useA85 = 0
+
+def line_chart_drawing(combined_data_set, evm_summary_data, width=CHART_WIDTH, height=CHART_HEIGHT):
+    """cumulative baseline and modified costs with the BAC and EAC, as in the cumulative line chart"""
+    drawing = Drawing(width, height)
+    drawing.add(String(MARGINS[0], height - 15, 'Cummulative Cost Profile', fontName='Helvetica-Bold', fontSize=10))
+
+    days = _day_numbers(combined_data_set['Date'])
+    initial_values = combined_data_set['Initial_Costs'].cumsum().to_numpy(dtype=float)
+    modified_values = combined_data_set['Modified_Costs'].cumsum().to_numpy(dtype=float)
+    if len(days) == 0:
+        return drawing
+
+    low = min(0.0, initial_values.min(), modified_values.min())
+    high = max(initial_values.max(), modified_values.max())
+    y_ticks = _value_ticks(low, high)
+    x_scale, y_scale = _plot_scales(width, height, days, (y_ticks[0], y_ticks[-1]))
+
+    _draw_value_axis(drawing, width, y_ticks, y_scale)
+    _draw_date_axis(drawing, height, combined_data_set['Date'], days, x_scale)
+
+    drawing.add(PolyLine(_points(x_scale(days), y_scale(initial_values)), strokeColor=BASELINE_COLOR, strokeWidth=1.2))
+    drawing.add(PolyLine(_points(x_scale(days), y_scale(modified_values)), strokeColor=MODIFIED_COLOR, strokeWidth=1.2, strokeDashArray=[4, 2]))
+
+    # BAC and EAC labels to the right of the plot, kept apart when they are close
+    bac = initial_values.max()
+    eac = modified_values.max()
+    bac_y, eac_y = y_scale(np.array([bac, eac]))
+    if abs(bac_y - eac_y) < 10:
+        bac_y, eac_y = (bac_y + 5, eac_y - 5) if bac >= eac else (bac_y - 5, eac_y + 5)
+    label_x = width - MARGINS[1] + 4
+    drawing.add(String(label_x, bac_y - 3, f'BAC ${bac:,.2f}', fontName='Helvetica', fontSize=7, fillColor=BASELINE_COLOR))
+    drawing.add(String(label_x, eac_y - 3, f'EAC ${eac:,.2f}', fontName='Helvetica', fontSize=7, fillColor=MODIFIED_COLOR))
+    return drawing
+
+def bubble_chart_drawing(combined_data_set, granularity="month", width=CHART_WIDTH, height=CHART_HEIGHT):
+    """baseline and current cost of each period as bubbles sized by cost, as in the bubble chart"""
+    drawing = Drawing(width, height)
+    drawing.add(String(MARGINS[0], height - 15, f'Cost Magnitudes by {granularity.title()}', fontName='Helvetica-Bold', fontSize=10))
+
+    days = _day_numbers(combined_data_set['Date'])
+    if len(days) == 0:
+        return drawing
+
+    # Rows at 0 (Baseline) and 1 (Current) on a -1 to 2 axis, as in the bubble chart
+    x_scale, y_scale = _plot_scales(width, height, days, (-1, 2))
+    row_spacing = y_scale(np.array([1.0]))[0] - y_scale(np.array([0.0]))[0]
+    for label, row in (('Baseline', 0.0), ('Current', 1.0)):
+        y = y_scale(np.array([row]))[0]
+        drawing.add(Line(MARGINS[0], y, width - MARGINS[1], y, strokeColor=GRID_COLOR, strokeWidth=0.5))
+        drawing.add(String(MARGINS[0] - 4, y - 3, label, fontName='Helvetica', fontSize=7, textAnchor='end'))
+    _draw_date_axis(drawing, height, combined_data_set['Date'], days, x_scale)
+
+    # Bubble area represents the cost
+    costs = combined_data_set[['Initial_Costs', 'Modified_Costs']].to_numpy(dtype=float)
+    max_cost = costs.max()
+    max_radius = row_spacing * 0.4
+    radii = np.maximum(max_radius * np.sqrt(np.clip(costs, 0, None) / max_cost), 2.0) if max_cost > 0 else np.full(costs.shape, 2.0)
+    x_values = x_scale(days)
+    for column, (row, color) in enumerate(((0.0, BASELINE_COLOR), (1.0, MODIFIED_COLOR))):
+        y = y_scale(np.array([row]))[0]
+        fill = colors.Color(color.red, color.green, color.blue, alpha=0.6)
+        # Each bubble is a zero length line with round caps as wide as the bubble, which draws the same disc with
+        # far fewer path numbers to write than a curved circle outline
+        for x, radius in zip(x_values, radii[:, column]):
+            drawing.add(Line(x, y, x, y, strokeColor=fill, strokeWidth=2 * radius, strokeLineCap=1))
+    return drawing
+
+def scenario_drawings(combined_data_set, evm_summary_data, granularity="month"):
+    """the line and bubble chart drawings of one scenario result"""
+    return (
+        line_chart_drawing(combined_data_set, evm_summary_data),
+        bubble_chart_drawing(combined_data_set, granularity),
+    )
+
+def cached_report_pdf(report_cache, key, title, settings_text, combined_data_set, evm_summary_data, granularity="month"):
+    """returns the single page PDF bytes stored under key in a ScenarioCache, exporting them once
+
+    The title and settings text are expected to follow from key (the item and slider values), so a repeated export
+    of the same scenario returns the stored PDF without drawing anything.
+    """
+    pdf_bytes = report_cache.get(key)
+    if pdf_bytes is None:
+        drawings = scenario_drawings(combined_data_set, evm_summary_data, granularity)
+        pdf_bytes = export_report_pdf([(title, settings_text, drawings)]).getvalue()
+        report_cache.put(key, pdf_bytes)
+    return pdf_bytes
+
+def draw_report_page(c, title, settings_text, drawings):
+    """draws the title, settings text and the two chart drawings on the current page of a canvas"""
+    width, height = letter
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(72, height - 72, title)
+
+    c.setFont("Helvetica", 9)
+    text_y = height - 100
+    for line in settings_text.split('\n'):
+        c.drawString(72, text_y, line)
+        text_y -= 14
+
+    line_chart, bubble_chart = drawings
+    renderPDF.draw(line_chart, c, 72, text_y - 300)
+    renderPDF.draw(bubble_chart, c, 72, text_y - 600)
+
+def export_report_pdf(pages, target=None):
+    """writes a PDF with one page per (title, settings text, chart drawings) and returns it as a bytes buffer
+
+    pages can be a generator; each page is drawn as soon as it is produced. When target (a file path) is given the
+    PDF is written there instead and target is returned.
+    """
+    pdf_buffer = io.BytesIO() if target is None else target
+
+    c = canvas.Canvas(pdf_buffer, pagesize=letter)
+    for title, settings_text, drawings in pages:
+        draw_report_page(c, title, settings_text, drawings)
+        c.showPage()
+    c.save()
+
+    if target is None:
+        pdf_buffer.seek(0)
+    return pdf_buffer
+
+def scenario_settings_text(initial_attributes, user_attributes_dictionary):
+    """the initial and modified attribute lines printed under a report page's title"""
+    initial = initial_attributes.iloc[0]
+    initial_details = f"Initial Attributes: {initial['Yield']*100}% Yield, ${initial['Cost']:,.2f} item cost, {initial['Lead Time']:,.2f} days lead time, {initial['Hours']:,.2f} hours"
+    new_details = f"Modified Attributes: {user_attributes_dictionary['item_yeild']*100}% Yield, ${user_attributes_dictionary['item_cost']:,.2f} item cost, {user_attributes_dictionary['item_lead_time']:,.2f} days lead time, {user_attributes_dictionary['item_hours']:,.2f} hours"
+    return f"{initial_details}\n{new_details}"
+
+def item_report_page(item_number, item_costs, initial_attributes, user_attributes_dictionary=None, granularity="month"):
+    """title, settings text and chart drawings of one item's report page
+
+    Without user_attributes_dictionary the item is reported at its own attribute values.
+    """
+    if user_attributes_dictionary is None:
+        user_attributes_dictionary = base_slider_values(initial_attributes)
+    combined_data_set_with_evm, evm_summary_data = run_scenario(item_costs, initial_attributes, user_attributes_dictionary, item_number=item_number, granularity=granularity)
+    return (
+        f"Modified Cost Profile for {item_number}",
+        scenario_settings_text(initial_attributes, user_attributes_dictionary),
+        scenario_drawings(combined_data_set_with_evm, evm_summary_data, granularity),
+    )
+
+class ReportJob:
+    """writes a PDF report with one page per item, optionally on a background thread
+
+    Pages are built in item order by a pool of worker processes (or by the job's own thread with one worker) and
+    drawn into the PDF as they arrive. At most two pages per worker are in flight, so memory holds only a few pages'
+    results at a time, plus the drawn page streams ReportLab keeps until the file is saved (tens of KB per page).
+    done, total, skipped, error and finished can be read while the job runs (from a Streamlit rerun, for example);
+    cancel() stops it after the current page and saves the pages written so far.
+    """
+
+    def __init__(
+            self,
+            cost_df,
+            attribute_df,
+            path,
+            items=None,
+            cost_item_offsets=None,
+            attribute_item_offsets=None,
+            user_attributes=None,
+            granularity="month",
+            workers=1
+            ):
+        self.cost_df = cost_df
+        self.attribute_df = attribute_df
+        self.path = path
+        self.cost_item_offsets = cost_item_offsets
+        self.attribute_item_offsets = attribute_item_offsets
+        self.user_attributes = user_attributes or {}  # Item number to slider dictionary; other items use their own values
+        self.granularity = granularity
+        self.workers = workers
+        if items is None:
+            items = list(cost_item_offsets) if cost_item_offsets is not None else cost_df['Item Number'].astype(str).unique()
+        self.items = [str(item_number) for item_number in items]
+
+        self.total = len(self.items)
+        self.done = 0
+        self.skipped = []
+        self.error = None
+        self.finished = False
+        self.cancelled = False
+        self.seconds = None
+        self._cancel = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def progress(self):
+        """fraction of the items drawn or skipped so far"""
+        return (self.done + len(self.skipped)) / self.total if self.total else 1.0
+
+    def start(self):
+        """runs the job on a background thread and returns the job"""
+        self._thread = threading.Thread(target=self.run, name="report-job", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """waits for a started job to finish"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def cancel(self):
+        """stops the job after the page being drawn"""
+        self._cancel.set()
+
+    def run(self):
+        """writes the report on the calling thread; errors are kept in error rather than raised"""
+        start = time.perf_counter()
+        try:
+            export_report_pdf(self._pages(), self.path)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.seconds = time.perf_counter() - start
+            self.finished = True
+
+    def _tasks(self):
+        """the arguments of item_report_page for each item, skipping items missing from either datafile"""
+        for item_number in self.items:
+            item_costs = filter_data(self.cost_df, item_number, self.cost_item_offsets)
+            initial_attributes = filter_data(self.attribute_df, item_number, self.attribute_item_offsets)
+            if item_costs.empty or initial_attributes.empty:
+                self.skipped.append(item_number)
+                continue
+            yield (item_number, item_costs, initial_attributes, self.user_attributes.get(item_number), self.granularity)
+
+    def _pages(self):
+        """yields the report pages in item order, counting each one once it has been drawn"""
+        for page in self._built_pages():
+            if self._cancel.is_set():
+                self.cancelled = True
+                return
+            yield page
+            self.done += 1
+
+    def _built_pages(self):
+        """builds the pages on this thread, or in a process pool with a bounded number of pages in flight"""
+        if self.workers <= 1:
+            for task in self._tasks():
+                yield item_report_page(*task)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for task in self._tasks():
+                pending.append(pool.submit(item_report_page, *task))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+                if self._cancel.is_set():
+                    break
+            while pending and not self._cancel.is_set():
+                yield pending.popleft().result()
+            for future in pending:
+                future.cancel()
+
+def _day_numbers(dates):
+    """day numbers (days since 1970-01-01) of a date column"""
+    return pd.to_datetime(dates).to_numpy().astype('datetime64[D]').astype('int64')
+
+def _plot_scales(width, height, days, value_range):
+    """functions mapping day numbers and values to x and y positions in the plot area"""
+    left, right, top, bottom = MARGINS
+    first_day, last_day = days.min(), max(days.max(), days.min() + 1)
+    low, high = value_range
+
+    def x_scale(values):
+        return left + (values - first_day) / (last_day - first_day) * (width - left - right)
+
+    def y_scale(values):
+        return bottom + (values - low) / (high - low) * (height - top - bottom)
+
+    return x_scale, y_scale
+
+def _value_ticks(low, high, count=5):
+    """evenly spaced round tick values covering low to high"""
+    if high <= low:
+        high = low + 1
+    raw_step = (high - low) / count
+    magnitude = 10 ** np.floor(np.log10(raw_step))
+    step = next(multiple * magnitude for multiple in (1, 2, 2.5, 5, 10) if multiple * magnitude >= raw_step)
+    return np.arange(np.floor(low / step), np.ceil(high / step) + 1) * step
+
+def _draw_value_axis(drawing, width, ticks, y_scale):
+    """horizontal grid lines with dollar labels"""
+    left, right = MARGINS[0], width - MARGINS[1]
+    for value, y in zip(ticks, y_scale(ticks)):
+        drawing.add(Line(left, y, right, y, strokeColor=GRID_COLOR, strokeWidth=0.5))
+        drawing.add(String(left - 4, y - 3, f"{'-' if value < 0 else ''}${abs(value):,.0f}", fontName='Helvetica', fontSize=7, textAnchor='end'))
+
+def _draw_date_axis(drawing, height, dates, days, x_scale):
+    """vertical grid lines with year-month labels at up to MAX_DATE_LABELS of the dates"""
+    bottom, top = MARGINS[3], height - MARGINS[2]
+    positions = np.unique(np.linspace(0, len(days) - 1, min(len(days), MAX_DATE_LABELS)).round().astype(int))
+    labels = pd.to_datetime(dates).iloc[positions].dt.strftime('%Y-%m')
+    for x, label in zip(x_scale(days[positions]), labels):
+        drawing.add(Line(x, bottom, x, top, strokeColor=GRID_COLOR, strokeWidth=0.5))
+        drawing.add(String(x, bottom - 12, label, fontName='Helvetica', fontSize=7, textAnchor='middle'))
+    drawing.add(String((MARGINS[0] + drawing.width - MARGINS[1]) / 2, 2, 'Date', fontName='Helvetica', fontSize=8, textAnchor='middle'))
+
+def _points(x_values, y_values):
+    """flat x, y point list for a PolyLine"""
+    return np.column_stack([x_values, y_values]).ravel().tolist()
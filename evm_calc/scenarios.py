@@ -0,0 +1,95 @@
+"""Batched scenario evaluation: many sets of slider values for one item as 2-D (scenarios x months) arrays"""
+import pandas as pd
+import numpy as np
+
+from evm_calc.data import cost_row_arrays
+from evm_calc.evm import calculate_evm_arrays
+from evm_calc.pipeline import assess_impacts
+from evm_calc.periods import bucket_by_item_and_month, days_to_months, month_end_dates
+
+# Slider dictionary keys and the attribute file columns they correspond to
+SLIDER_ATTRIBUTES = {
+    "item_cost": "Cost",
+    "item_lead_time": "Lead Time",
+    "item_yeild": "Yield",
+    "item_hours": "Hours",
+}
+
+def prepare_item_rows(filtered_df):
+    """converts one item's cost rows to the arrays evaluate_item_scenarios works on"""
+    date_values, units_per_day, costs, type_codes = cost_row_arrays(filtered_df)
+    return {
+        'date_values': date_values,
+        'units_per_day': units_per_day,
+        'costs': costs,
+        'type_codes': type_codes,
+    }
+
+def evaluate_item_scenarios(item_rows, impacts):
+    """applies arrays of impacts (one value per scenario) to an item and buckets the results by month
+
+    impacts has the assess_impacts keys with array values. Returns the first month number of the common range, the
+    baseline monthly costs (months) and the modified monthly costs (scenarios x months).
+    """
+    material_impacts, labor_impacts, date_impacts = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(impacts['material_impacts'], dtype=float)),
+        np.atleast_1d(np.asarray(impacts['labor_impacts'], dtype=float)),
+        np.atleast_1d(np.asarray(impacts['date_impacts'], dtype=float)),
+        )
+    n_scenarios = len(material_impacts)
+    n_rows = len(item_rows['costs'])
+    units_per_day = item_rows['units_per_day']
+
+    # Scale labor and material costs per scenario, leave any other type unchanged
+    multipliers = np.column_stack([np.ones(n_scenarios), labor_impacts, material_impacts])
+    modified_costs = item_rows['costs'][None, :] * multipliers[:, item_rows['type_codes']]
+
+    # Shift every date by each scenario's lead time change (in days)
+    date_shift = np.round(date_impacts * units_per_day).astype('int64')
+    shifted_dates = item_rows['date_values'][None, :] + date_shift[:, None]
+    modified_months = days_to_months(np.floor_divide(shifted_dates, units_per_day).ravel())
+    baseline_months = days_to_months(np.floor_divide(item_rows['date_values'], units_per_day))
+
+    # Common month range covering the baseline and every scenario
+    if n_rows == 0:
+        return 0, np.zeros(0), np.zeros((n_scenarios, 0))
+    first_month = min(baseline_months.min(), modified_months.min())
+    n_months = int(max(baseline_months.max(), modified_months.max()) - first_month + 1)
+
+    initial_costs = np.bincount(baseline_months - first_month, weights=item_rows['costs'], minlength=n_months)
+    scenario_codes = np.repeat(np.arange(n_scenarios), n_rows)
+    modified_monthly = bucket_by_item_and_month(scenario_codes, modified_months - first_month, modified_costs.ravel(), n_scenarios, n_months)
+
+    return int(first_month), initial_costs, modified_monthly
+
+def summarize_item_scenarios(first_month, initial_costs, modified_costs):
+    """calculates the EVM summary of every scenario, plus the month its modified costs finish"""
+    _, evm_summary = calculate_evm_arrays(np.broadcast_to(initial_costs, modified_costs.shape), modified_costs)
+    summary_df = pd.DataFrame(evm_summary)
+
+    # Last month with a modified cost
+    month_ends = month_end_dates(first_month, modified_costs.shape[1])
+    has_cost = modified_costs != 0
+    last_index = modified_costs.shape[1] - 1 - np.argmax(has_cost[:, ::-1], axis=1)
+    summary_df['Modified_Finish'] = np.where(has_cost.any(axis=1), month_ends.values[last_index], np.datetime64('NaT'))
+
+    return summary_df
+
+def run_item_scenarios(item_rows, initial_attributes, scenario_values, chunk_size=2000):
+    """evaluates many slider settings for one item and returns one EVM summary row per scenario
+
+    initial_attributes are the item's attribute rows (as passed to assess_impacts) and scenario_values is a slider
+    dictionary whose values are arrays. Scenarios are processed chunk_size at a time to bound memory.
+    """
+    scenario_values = {key: np.atleast_1d(np.asarray(scenario_values[key], dtype=float)) for key in SLIDER_ATTRIBUTES}
+    n_scenarios = len(next(iter(scenario_values.values())))
+
+    summaries = []
+    for start in range(0, n_scenarios, chunk_size):
+        chunk = {key: values[start:start + chunk_size] for key, values in scenario_values.items()}
+        impacts = assess_impacts(initial_attributes, chunk)
+        summaries.append(summarize_item_scenarios(*evaluate_item_scenarios(item_rows, impacts)))
+
+    if not summaries:
+        return pd.DataFrame()
+    return pd.concat(summaries, ignore_index=True)
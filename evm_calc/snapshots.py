@@ -0,0 +1,159 @@
+"""Baseline versions: every baseline or re-plan snapshot in a cost file bucketed in one pass and compared by EVM"""
+import pandas as pd
+import numpy as np
+
+from evm_calc.data import datetime_values, factorize_items
+from evm_calc.evm import calculate_evm, calculate_evm_arrays
+from evm_calc.periods import days_to_periods, month_range, period_end_dates
+
+# Columns naming the snapshot each cost row belongs to, in order of preference. The sample data leaves it unnamed,
+# so it is read as Column1
+VERSION_COLUMNS = ('Version', 'Column1')
+
+def version_column(df):
+    """the version column of a cost datafile, or None when it has none"""
+    return next((column for column in VERSION_COLUMNS if column in df.columns), None)
+
+def cost_versions(df):
+    """the versions of a cost datafile in the order they first appear (an empty list when it has no version column)"""
+    column = version_column(df)
+    if column is None:
+        return []
+    return [str(version) for version in pd.unique(df[column].dropna().astype(str))]
+
+def select_version(df, version):
+    """the rows of a cost datafile that belong to one version (all rows when version is None)"""
+    column = version_column(df)
+    if version is None or column is None:
+        return df
+    return df[df[column].astype(str) == str(version)].reset_index(drop=True)
+
+def build_snapshot_index(cost_df, granularity="month"):
+    """buckets the costs of every version, item and period of a cost datafile in one grouped pass
+
+    Only the non-zero (version, item, period) totals are kept, sorted by version, item and period, so each version
+    is a contiguous block; comparisons then work from these totals without going back to the cost rows. Versions
+    keep the order they first appear in the file, which is taken to be the order the snapshots were made. Rows
+    without a date or version are left out. Returns a dictionary of arrays like build_portfolio_index.
+    """
+    column = version_column(cost_df)
+    if column is None:
+        raise ValueError(f"the cost data has no version column ({' or '.join(VERSION_COLUMNS)})")
+    version_codes, versions = pd.factorize(cost_df[column].astype(str).where(cost_df[column].notna()))
+    item_codes, item_numbers = factorize_items(cost_df)
+
+    # Period of each dated row with a version
+    dates = datetime_values(cost_df['Date'])
+    valid = ~np.isnat(dates) & (version_codes >= 0)
+    units_per_day = int(np.timedelta64(1, 'D') / np.timedelta64(1, np.datetime_data(dates.dtype)[0]))
+    periods = days_to_periods(np.floor_divide(dates[valid].view('int64'), units_per_day), granularity)
+    first_period, n_periods = month_range(periods)
+    costs = np.nan_to_num(cost_df['Cost'].to_numpy(dtype=float)[valid])
+
+    # One key per (version, item, period) cell, summed over the distinct keys in sorted order
+    n_items = len(item_numbers)
+    keys = (version_codes[valid].astype(np.int64) * n_items + item_codes[valid]) * n_periods + (periods - first_period)
+    cells, inverse = np.unique(keys, return_inverse=True)
+    cell_costs = np.bincount(inverse, weights=costs, minlength=len(cells))
+    cell_versions, remainder = np.divmod(cells, n_items * n_periods)
+    cell_items, cell_periods = np.divmod(remainder, n_periods)
+
+    return {
+        'versions': pd.Index(versions, name='Version'),
+        'item_numbers': item_numbers,
+        'granularity': granularity,
+        'first_period': first_period,
+        'n_periods': n_periods,
+        'version_offsets': np.searchsorted(cell_versions, np.arange(len(versions) + 1)),
+        'cell_items': cell_items,
+        'cell_periods': cell_periods,
+        'cell_costs': cell_costs,
+        # Program totals of each version, versions x periods
+        'version_totals': np.bincount(cell_versions * n_periods + cell_periods, weights=cell_costs, minlength=len(versions) * n_periods).reshape(len(versions), n_periods),
+    }
+
+def version_item_costs(snapshot_index, version):
+    """the period costs of every item in one version, as an items x periods matrix"""
+    start, stop = _version_cells(snapshot_index, version)
+    n_items, n_periods = len(snapshot_index['item_numbers']), snapshot_index['n_periods']
+    keys = snapshot_index['cell_items'][start:stop] * n_periods + snapshot_index['cell_periods'][start:stop]
+    return np.bincount(keys, weights=snapshot_index['cell_costs'][start:stop], minlength=n_items * n_periods).reshape(n_items, n_periods)
+
+def compare_versions(snapshot_index, base_version, current_version, item_number=None):
+    """EVM of one version against another, with the base version as the plan and the current one as the estimate
+
+    Returns the combined data set with EVM columns (for the program, or for item_number when given), its EVM
+    summary and a per-item EVM summary table, as calculate_portfolio_evm does.
+    """
+    base_costs = version_item_costs(snapshot_index, base_version)
+    current_costs = version_item_costs(snapshot_index, current_version)
+
+    if item_number is None:
+        initial_costs, modified_costs = base_costs.sum(axis=0), current_costs.sum(axis=0)
+    else:
+        item = _item_code(snapshot_index, item_number)
+        initial_costs, modified_costs = base_costs[item], current_costs[item]
+    combined_data_set_with_evm, evm_summary_data = calculate_evm(_combined_data_set(snapshot_index, initial_costs, modified_costs))
+
+    # Per-item summary from one batched EVM pass
+    _, item_summary = calculate_evm_arrays(base_costs, current_costs)
+    item_summary_df = pd.DataFrame(item_summary, index=pd.Index(snapshot_index['item_numbers'], name='Item Number'))
+
+    return combined_data_set_with_evm, evm_summary_data, item_summary_df
+
+def version_trend(snapshot_index, reference_version=None, item_number=None):
+    """EVM summary of every version against a reference version (the first by default), one row per version
+
+    BAC is the reference version's total and EAC each version's own, so VAC tracks how each snapshot moved from the
+    reference. Finish is the end of each version's last period with a cost. Covers the program, or item_number when
+    given, and all versions are evaluated in one batched pass.
+    """
+    if item_number is None:
+        version_costs = snapshot_index['version_totals']
+    else:
+        # Each version's costs of the item, from the item's cells of every version
+        n_versions, n_periods = len(snapshot_index['versions']), snapshot_index['n_periods']
+        cells = snapshot_index['cell_items'] == _item_code(snapshot_index, item_number)
+        cell_versions = np.searchsorted(snapshot_index['version_offsets'], np.flatnonzero(cells), side='right') - 1
+        keys = cell_versions * n_periods + snapshot_index['cell_periods'][cells]
+        version_costs = np.bincount(keys, weights=snapshot_index['cell_costs'][cells], minlength=n_versions * n_periods).reshape(n_versions, n_periods)
+
+    reference = version_costs[_version_code(snapshot_index, reference_version or snapshot_index['versions'][0])]
+    _, summary = calculate_evm_arrays(np.broadcast_to(reference, version_costs.shape), version_costs)
+    trend_df = pd.DataFrame(summary, index=snapshot_index['versions'])
+
+    # Period end of the last period with a cost (NaT for an empty version)
+    has_cost = version_costs != 0
+    last_period = version_costs.shape[1] - 1 - np.argmax(has_cost[:, ::-1], axis=1)
+    finish_dates = period_end_dates(snapshot_index['first_period'], max(version_costs.shape[1], 1), snapshot_index['granularity'])
+    trend_df['Finish'] = pd.Series(finish_dates[np.maximum(last_period, 0)], index=trend_df.index).where(has_cost.any(axis=1))
+    return trend_df
+
+def _version_cells(snapshot_index, version):
+    """the start and stop of a version's block of cells"""
+    code = _version_code(snapshot_index, version)
+    return snapshot_index['version_offsets'][code], snapshot_index['version_offsets'][code + 1]
+
+def _version_code(snapshot_index, version):
+    """position of a version in the snapshot index"""
+    versions = snapshot_index['versions']
+    if str(version) not in versions:
+        raise ValueError(f"unknown version {version!r}; the cost data has {', '.join(versions)}")
+    return versions.get_loc(str(version))
+
+def _item_code(snapshot_index, item_number):
+    """position of an item in the snapshot index"""
+    item_numbers = pd.Index(snapshot_index['item_numbers'])
+    if str(item_number) not in item_numbers:
+        raise ValueError(f"unknown item number {item_number!r}")
+    return item_numbers.get_loc(str(item_number))
+
+def _combined_data_set(snapshot_index, initial_costs, modified_costs):
+    """the combined data set layout used by calculate_evm and the charts, over the periods either series has a cost"""
+    used = np.flatnonzero((initial_costs != 0) | (modified_costs != 0))
+    start, stop = (used[0], used[-1] + 1) if len(used) else (0, 0)
+    return pd.DataFrame({
+        'Date': period_end_dates(snapshot_index['first_period'] + start, stop - start, snapshot_index['granularity']),
+        'Initial_Costs': initial_costs[start:stop],
+        'Modified_Costs': modified_costs[start:stop]
+    })
@@ -0,0 +1,293 @@
+"""Content addressed dataset store: formatted datafiles memory-mapped once and shared by every session"""
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import numpy as np
+
+from evm_calc.append import append_cost_rows, item_watermarks, merge_watermarks, prepare_append
+from evm_calc.data import COST_SCHEMA, DEFAULT_CACHE_DIR, build_item_index, datafile_key, file_content, load_data_file
+from evm_calc.snapshots import cost_versions, version_column
+
+# Schema metadata entries of a stored Arrow file holding its item offsets, and each version's rows and item offsets
+OFFSETS_METADATA_KEY = b'evm_calc.item_offsets'
+VERSION_OFFSETS_METADATA_KEY = b'evm_calc.version_offsets'
+
+# Total size of the stored Arrow files; past it the least recently used datasets are dropped
+DEFAULT_STORE_BYTES = 2 * 1024 ** 3
+
+class DatasetStore:
+    """formatted, item indexed datafiles kept once per distinct file content and shared by every session
+
+    The first time a file's content is seen it is formatted with load_data_file, grouped by item with
+    build_item_index and written as an uncompressed Arrow file named after its content hash. The Arrow file is then
+    memory-mapped: the dataframe's columns are read-only views of the mapped file, so identical uploads (from any
+    session) share one copy that the operating system pages in as it is read, and the file is reused after a
+    restart. Sessions only need the key; get() returns the shared dataframe and item offsets. Values built from a
+    dataset, such as the portfolio index, are shared the same way with derived().
+
+    A cost file holding several baseline versions is stored grouped by version and then by item, so each version is
+    a slice of the mapped file with its own item offsets rather than a copy. Once the stored files add up to more
+    than max_bytes, the least recently used datasets are dropped with their derived values and their files are
+    deleted (sessions still holding one keep their dataframe, which is freed when they let go of it).
+    """
+
+    def __init__(self, store_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_STORE_BYTES):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._datasets = {}  # Key to (dataframe, item offsets, version offsets, report)
+        self._derived = {}  # (key, name) to a value built from the dataset
+        self._upload_keys = {}  # Streamlit upload file_id to key, so reruns do not hash the upload again
+        self._lock = threading.Lock()
+
+        # Size of each stored file, least recently used first; files left by an earlier run are the first to go
+        self._files = OrderedDict()
+        if os.path.isdir(store_dir):
+            stored = [entry for entry in os.scandir(store_dir) if entry.name.endswith('.arrow') and entry.is_file()]
+            for entry in sorted(stored, key=lambda entry: entry.stat().st_mtime):
+                self._files[entry.name[:-len('.arrow')]] = entry.stat().st_size
+
+    def __len__(self):
+        return len(self._datasets)
+
+    def __contains__(self, key):
+        return key in self._datasets
+
+    def put(self, data_file, schema, date_format=None, compact=None):
+        """adds a datafile (an uploaded file or a path) and returns its key, dataframe and check_schema report
+
+        The dataframe is the shared, item indexed one (compact as in load_data_file when compact is a cost
+        precision). When columns are missing the key is None and the dataframe is the file as read.
+        """
+        file_id = getattr(data_file, 'file_id', None)
+        upload_key = (file_id, repr(schema), date_format, compact)
+        key = self._upload_keys.get(upload_key) if file_id else None
+        if key is None:
+            file_name = str(getattr(data_file, 'name', data_file))
+            content = file_content(data_file)
+            key = datafile_key(content, file_name, schema, date_format, compact)
+
+        # One load per key, even when several sessions upload the same file at once
+        with self._lock:
+            if key not in self._datasets:
+                self.misses += 1
+                path = os.path.join(self.store_dir, f"{key}.arrow")
+                bad_rows_path = os.path.join(self.store_dir, f"{key}.bad_rows.parquet")
+                if not os.path.exists(path):
+                    # The Arrow file is the cache, so the file is not also cached by load_data_file
+                    buffer = io.BytesIO(content)
+                    buffer.name = file_name
+                    df, report = load_data_file(buffer, schema, date_format, cache_dir=None, compact=compact)
+                    if report['missing_columns']:
+                        return None, df, report
+                    _write_arrow(*_index_dataset(df), path)
+                    _write_bad_rows(report['bad_rows'], bad_rows_path)
+                else:
+                    report = {'missing_columns': [], 'bad_rows': _stored_bad_rows(bad_rows_path)}
+                self._datasets[key] = (*_map_arrow(path), report)
+                self._add_file(key, path)
+            else:
+                self.hits += 1
+                self._files.move_to_end(key)
+            df, _, _, report = self._datasets[key]
+
+        if file_id:
+            self._upload_keys[upload_key] = key
+        return key, df, report
+
+    def append(self, key, data_file, date_format=None, version=None):
+        """appends the new rows of a delta cost file to a stored cost dataset, as a new stored dataset
+
+        Only the delta is read and checked against COST_SCHEMA. Its rows dated after their item's last date (the
+        dataset's item_watermarks) are merged into each item's rows (prepare_append, append_cost_rows) and the result is stored like an upload,
+        under a key made from the dataset's key and the delta's content, so the same append from any session is
+        done once. Returns the new key (the same key when there is nothing new), its dataframe and a report with
+        the delta's missing columns and bad rows, the prepare_append counts and the appended rows. Derived values
+        are not carried over to the new key; see carry().
+        """
+        file_name = str(getattr(data_file, 'name', data_file))
+        content = file_content(data_file)
+        buffer = io.BytesIO(content)
+        buffer.name = file_name
+        new_rows, report = load_data_file(buffer, COST_SCHEMA, date_format, cache_dir=None)
+        if report['missing_columns']:
+            return None, new_rows, report
+
+        df = self._datasets[key][0]
+        watermarks = self.derived(key, 'watermarks', item_watermarks)
+        appended_rows, append_report = prepare_append(df, new_rows, version, watermarks)
+        report = {**report, **append_report, 'appended_rows': appended_rows}
+        if appended_rows.empty:
+            return key, df, report
+
+        new_key = hashlib.sha256(repr((key, datafile_key(content, file_name, COST_SCHEMA, date_format), version)).encode()).hexdigest()
+        with self._lock:
+            if new_key not in self._datasets:
+                self.misses += 1
+                path = os.path.join(self.store_dir, f"{new_key}.arrow")
+                if not os.path.exists(path):
+                    if self._datasets[key][2]:
+                        # Several versions: regrouped by version and item, with the new rows after each item's own
+                        _write_arrow(*_index_dataset(pd.concat([df, appended_rows], ignore_index=True)), path)
+                    else:
+                        _write_arrow(*append_cost_rows(df, appended_rows), {}, path)
+                self._datasets[new_key] = (*_map_arrow(path), {'missing_columns': [], 'bad_rows': report['bad_rows']})
+                self._derived[(new_key, 'watermarks')] = merge_watermarks(watermarks, appended_rows)
+                self._add_file(new_key, path)
+            else:
+                self.hits += 1
+                self._files.move_to_end(new_key)
+            new_df = self._datasets[new_key][0]
+        return new_key, new_df, report
+
+    def carry(self, key, new_key, name, update):
+        """shares update(value) as a derived value of new_key, when key's value has been built, instead of building it from the whole new dataset"""
+        with self._lock:
+            if (key, name) in self._derived and (new_key, name) not in self._derived:
+                self._derived[(new_key, name)] = update(self._derived[(key, name)])
+
+    def get(self, key, version=None):
+        """the shared dataframe and item offsets of a stored dataset, or of one version of a dataset holding several
+
+        A version's dataframe is a slice of the mapped file, built once and shared like a derived value.
+        """
+        with self._lock:
+            df, item_offsets, version_offsets, _ = self._datasets[key]
+            self._files.move_to_end(key)
+            if not version_offsets:
+                return df, item_offsets
+            if version is None:
+                raise ValueError(f"the dataset holds several versions ({', '.join(version_offsets)}); choose one")
+            if (key, ('version', str(version))) not in self._derived:
+                self._derived[(key, ('version', str(version)))] = _version_slice(df, *version_offsets[str(version)])
+            return self._derived[(key, ('version', str(version)))]
+
+    def derived(self, key, name, build, version=None):
+        """a value built from a stored dataset (or one of its versions) by build(dataframe), built once and shared like the dataset"""
+        if (key, name) not in self._derived:
+            df = self.get(key, version)[0] if version is not None else self._datasets[key][0]
+            with self._lock:
+                if (key, name) not in self._derived:
+                    self._derived[(key, name)] = build(df)
+        return self._derived[(key, name)]
+
+    def mapped_bytes(self):
+        """total size of the memory-mapped Arrow files"""
+        return sum(self._files[key] for key in self._datasets)
+
+    def stored_bytes(self):
+        """total size of the Arrow files kept in store_dir, mapped or not"""
+        return sum(self._files.values())
+
+    def _add_file(self, key, path):
+        """records a newly mapped file as the most recently used, and drops the least recently used datasets while the files are over max_bytes"""
+        self._files[key] = os.path.getsize(path)
+        self._files.move_to_end(key)
+        while sum(self._files.values()) > self.max_bytes and len(self._files) > 1:
+            self._drop(next(iter(self._files)))
+
+    def _drop(self, key):
+        """forgets a dataset and its derived values and deletes its files"""
+        del self._files[key]
+        self._datasets.pop(key, None)
+        for derived_key in [derived_key for derived_key in self._derived if derived_key[0] == key]:
+            del self._derived[derived_key]
+        for upload_key in [upload_key for upload_key, stored_key in self._upload_keys.items() if stored_key == key]:
+            del self._upload_keys[upload_key]
+        for path in (f"{key}.arrow", f"{key}.bad_rows.parquet"):
+            try:
+                os.remove(os.path.join(self.store_dir, path))
+            except OSError:
+                pass  # Already gone, or still mapped on a system that cannot delete mapped files
+
+def _index_dataset(df):
+    """groups a formatted datafile by item, or by version and then item when it holds several versions
+
+    Returns the grouped dataframe, the item offsets (empty for several versions, whose items are split between
+    them) and each version's (start, stop, item offsets), with the item offsets relative to the version's start.
+    """
+    column = version_column(df)
+    versions = cost_versions(df) if column is not None else []
+    indexed_df, item_offsets = build_item_index(df)
+    if len(versions) <= 1:
+        return indexed_df, item_offsets, {}
+
+    # Stable sort on the version keeps each version's rows grouped by item; rows without a version go first
+    version_codes = pd.Categorical(indexed_df[column].astype(str).where(indexed_df[column].notna()), categories=versions).codes
+    order = np.argsort(version_codes, kind='stable')
+    indexed_df = indexed_df.iloc[order].reset_index(drop=True)
+    version_codes = version_codes[order]
+    item_codes = indexed_df['Item Number'].cat.codes.to_numpy()
+    item_numbers = indexed_df['Item Number'].cat.categories
+
+    version_boundaries = np.searchsorted(version_codes, np.arange(len(versions) + 1))
+    version_offsets = {}
+    for version, start, stop in zip(versions, version_boundaries[:-1], version_boundaries[1:]):
+        codes = item_codes[start:stop]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.zeros(0, dtype=np.int64)
+        stops = np.r_[starts[1:], len(codes)]
+        version_offsets[version] = (int(start), int(stop), {
+            str(item_numbers[codes[item_start]]): (int(item_start), int(item_stop))
+            for item_start, item_stop in zip(starts, stops)
+        })
+    return indexed_df, {}, version_offsets
+
+def _version_slice(df, start, stop, item_offsets):
+    """one version's rows of a dataset grouped by version, as a slice of it, and its item offsets
+
+    The item categories are narrowed to the version's items, which rewrites only the item codes, when the version
+    lacks some of the file's items.
+    """
+    version_df = df.iloc[start:stop]
+    if len(item_offsets) < len(df['Item Number'].cat.categories):
+        version_df = version_df.assign(**{'Item Number': version_df['Item Number'].cat.set_categories(list(item_offsets))})
+    return version_df, item_offsets
+
+def _write_arrow(indexed_df, item_offsets, version_offsets, path):
+    """writes an item indexed dataframe, its item offsets and its versions' offsets as an uncompressed Arrow file"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(indexed_df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        OFFSETS_METADATA_KEY: json.dumps(item_offsets).encode(),
+        VERSION_OFFSETS_METADATA_KEY: json.dumps(version_offsets).encode(),
+    })
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with pa.OSFile(f"{path}.tmp", 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(f"{path}.tmp", path)
+
+def _map_arrow(path):
+    """memory-maps a stored Arrow file and returns its dataframe (columns are views of the mapping), item offsets and versions' offsets"""
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    item_offsets = {item: (start, stop) for item, (start, stop) in json.loads(table.schema.metadata[OFFSETS_METADATA_KEY]).items()}
+    version_offsets = {
+        version: (start, stop, {item: (item_start, item_stop) for item, (item_start, item_stop) in offsets.items()})
+        for version, (start, stop, offsets) in json.loads(table.schema.metadata.get(VERSION_OFFSETS_METADATA_KEY, b'{}')).items()
+    }
+    # One block per column, so numeric, date and category code columns are not copied into combined blocks
+    return table.to_pandas(split_blocks=True), item_offsets, version_offsets
+
+def _write_bad_rows(bad_rows_df, path):
+    """stores the bad rows report of a stored dataset next to its Arrow file (an upload after a restart shows it)"""
+    try:
+        bad_rows_df.to_parquet(path)
+    except (OSError, ImportError, ValueError):
+        pass  # Only the report is lost; _stored_bad_rows then returns an empty one
+
+def _stored_bad_rows(path):
+    """the bad rows report load_data_file cached next to a stored dataset (empty if it is gone)"""
+    try:
+        return pd.read_parquet(path)
+    except (OSError, ValueError):
+        return pd.DataFrame(columns=['Row', 'Column', 'Value', 'Problem'])
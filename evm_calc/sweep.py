@@ -0,0 +1,187 @@
+"""Sensitivity sweeps over the four slider attributes, optionally spread across a process pool"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import pandas as pd
+import numpy as np
+
+from evm_calc.data import filter_data
+from evm_calc.scenarios import SLIDER_ATTRIBUTES, prepare_item_rows, run_item_scenarios
+
+# Arrays of the cost rows shared with the worker processes, set by _attach_shared_rows
+_shared_rows = {}
+_shared_blocks = []
+
+def base_slider_values(initial_attributes):
+    """the slider dictionary for an item's current attributes (averaged as assess_impacts does)"""
+    return {key: float(initial_attributes[column].mean()) for key, column in SLIDER_ATTRIBUTES.items()}
+
+def sweep_ranges(base_values, spread=0.5):
+    """returns the (low, high) range of each slider attribute, spread (a fraction) either side of its base value
+
+    Values are kept at or above 0, and Yield at or below 1.
+    """
+    ranges = {}
+    for key, value in base_values.items():
+        low = max(value * (1 - spread), 0.0)
+        high = value * (1 + spread)
+        if key == "item_yeild":
+            high = min(high, 1.0)
+        ranges[key] = (low, high)
+    return ranges
+
+def grid_scenarios(ranges, points):
+    """full factorial grid with points values per attribute (points ** 4 scenarios)"""
+    axes = [np.linspace(low, high, points) for low, high in ranges.values()]
+    mesh = np.meshgrid(*axes, indexing='ij')
+    return {key: values.ravel() for key, values in zip(ranges, mesh)}
+
+def latin_hypercube_scenarios(ranges, samples, seed=None):
+    """Latin hypercube sample: each attribute's range is split into samples strata, each used exactly once"""
+    rng = np.random.default_rng(seed)
+    scenario_values = {}
+    for key, (low, high) in ranges.items():
+        strata = (rng.permutation(samples) + rng.random(samples)) / samples
+        scenario_values[key] = low + strata * (high - low)
+    return scenario_values
+
+def tornado_scenarios(base_values, ranges):
+    """the base scenario followed by each attribute at its low then high value, with the others at base"""
+    scenario_values = {key: [value] for key, value in base_values.items()}
+    for swept_key in base_values:
+        for bound in ranges[swept_key]:
+            for key, value in base_values.items():
+                scenario_values[key].append(bound if key == swept_key else value)
+    return {key: np.array(values) for key, values in scenario_values.items()}
+
+def tornado_data(base_values, ranges, summary_df, metric='EAC'):
+    """arranges the results of tornado_scenarios into one row per attribute, widest swing first"""
+    base_result = summary_df[metric].iloc[0]
+    rows = []
+    for position, key in enumerate(base_values):
+        low_result = summary_df[metric].iloc[1 + 2 * position]
+        high_result = summary_df[metric].iloc[2 + 2 * position]
+        rows.append({
+            'Attribute': SLIDER_ATTRIBUTES[key],
+            'Low_Value': ranges[key][0],
+            'High_Value': ranges[key][1],
+            f'{metric}_Low': low_result,
+            f'{metric}_High': high_result,
+            f'Base_{metric}': base_result,
+            'Swing': abs(high_result - low_result),
+        })
+    return pd.DataFrame(rows).sort_values('Swing', ascending=False, ignore_index=True)
+
+def surface_scenarios(base_values, ranges, x_key, y_key, points):
+    """grid over two attributes (points x points) with the other attributes at their base values
+
+    Returns the x values, the y values and the scenario dictionary (ordered with x varying fastest).
+    """
+    x_values = np.linspace(*ranges[x_key], points)
+    y_values = np.linspace(*ranges[y_key], points)
+    y_mesh, x_mesh = np.meshgrid(y_values, x_values, indexing='ij')
+    scenario_values = {key: np.full(points * points, value) for key, value in base_values.items()}
+    scenario_values[x_key] = x_mesh.ravel()
+    scenario_values[y_key] = y_mesh.ravel()
+    return x_values, y_values, scenario_values
+
+def prepare_sweep_inputs(cost_df, attribute_df, items, cost_item_offsets=None, attribute_item_offsets=None):
+    """collects each item's cost row arrays and attribute rows, skipping items missing from either datafile"""
+    item_inputs = {}
+    for item_number in items:
+        filtered_df = filter_data(cost_df, str(item_number), cost_item_offsets)
+        filtered_attributes_df = filter_data(attribute_df, str(item_number), attribute_item_offsets)
+        if filtered_df.empty or filtered_attributes_df.empty:
+            continue
+        item_inputs[str(item_number)] = (prepare_item_rows(filtered_df), filtered_attributes_df)
+    return item_inputs
+
+def run_sweep(item_inputs, sweeps, workers=None, chunk_size=2000):
+    """evaluates every scenario of every item's sweep and returns one row per scenario
+
+    item_inputs comes from prepare_sweep_inputs and sweeps maps item numbers to slider dictionaries of arrays. With
+    more than one worker the scenarios are split into chunks across a process pool; the cost row arrays are placed
+    in shared memory once, so each task only carries its item number and its chunk of slider values.
+    """
+    workers = workers or os.cpu_count() or 1
+    sweeps = {item: values for item, values in sweeps.items() if item in item_inputs}
+
+    if workers == 1:
+        results = [
+            _label_results(item, scenario_values, run_item_scenarios(*item_inputs[item], scenario_values, chunk_size))
+            for item, scenario_values in sweeps.items()
+        ]
+    else:
+        results = _run_sweep_in_pool(item_inputs, sweeps, workers, chunk_size)
+
+    if not results:
+        return pd.DataFrame()
+    return pd.concat(results, ignore_index=True)
+
+def _run_sweep_in_pool(item_inputs, sweeps, workers, chunk_size):
+    """splits the sweeps into tasks and evaluates them in a process pool reading from shared memory"""
+    # Concatenate the rows of every swept item and remember where each item's rows are
+    items = list(sweeps)
+    row_counts = [len(item_inputs[item][0]['costs']) for item in items]
+    row_offsets = np.concatenate([[0], np.cumsum(row_counts)]).astype(int)
+    shared_arrays = {
+        name: np.concatenate([item_inputs[item][0][name] for item in items])
+        for name in ('date_values', 'costs', 'type_codes')
+    }
+    blocks, specs = _share_arrays(shared_arrays)
+
+    try:
+        tasks = []
+        for position, item in enumerate(items):
+            item_rows, initial_attributes = item_inputs[item]
+            n_scenarios = len(next(iter(sweeps[item].values())))
+            for start in range(0, n_scenarios, chunk_size):
+                chunk = {key: np.asarray(values)[start:start + chunk_size] for key, values in sweeps[item].items()}
+                tasks.append((item, row_offsets[position], row_offsets[position + 1], item_rows['units_per_day'], initial_attributes, chunk))
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared_rows, initargs=(specs,)) as pool:
+            return list(pool.map(_evaluate_sweep_task, tasks))
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+def _share_arrays(arrays):
+    """copies arrays into new shared memory blocks and returns the blocks and the specs needed to attach to them"""
+    blocks = []
+    specs = {}
+    for name, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        blocks.append(block)
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+def _attach_shared_rows(specs):
+    """worker initializer: maps the shared cost row arrays without copying them"""
+    for name, (block_name, shape, dtype) in specs.items():
+        try:
+            block = shared_memory.SharedMemory(name=block_name, track=False)
+        except TypeError:
+            # Before Python 3.13 attaching always registers with the (parent's) resource tracker, which is harmless
+            # because the parent unlinks the block once
+            block = shared_memory.SharedMemory(name=block_name)
+        _shared_blocks.append(block)
+        _shared_rows[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+def _evaluate_sweep_task(task):
+    """worker task: evaluates one chunk of one item's scenarios"""
+    item, row_start, row_stop, units_per_day, initial_attributes, scenario_values = task
+    item_rows = {
+        'date_values': _shared_rows['date_values'][row_start:row_stop],
+        'units_per_day': units_per_day,
+        'costs': _shared_rows['costs'][row_start:row_stop],
+        'type_codes': _shared_rows['type_codes'][row_start:row_stop],
+    }
+    return _label_results(item, scenario_values, run_item_scenarios(item_rows, initial_attributes, scenario_values))
+
+def _label_results(item, scenario_values, summary_df):
+    """adds the item number and slider values in front of the EVM summary columns"""
+    labels = pd.DataFrame({'Item Number': item, **{column: scenario_values[key] for key, column in SLIDER_ATTRIBUTES.items()}})
+    return pd.concat([labels, summary_df], axis=1)
@@ -0,0 +1,55 @@
+"""Reproducible synthetic cost ledgers and attribute tables, for trying the tool at production scale"""
+import numpy as np
+import pandas as pd
+
+# Item numbers count up from here, as in the sample data
+FIRST_ITEM_NUMBER = 10001
+
+def make_cost_ledger(n_items=100, n_months=36, rows_per_item=None, labor_share=0.5, start='2024-01-01', seed=0):
+    """a cost ledger in the upload format (Date, Cost, Item Number, Type), the same for the same arguments
+
+    Each item has rows_per_item cost rows (default two a month) on days spread at random over the n_months months
+    from start, sorted by item and date. About labor_share of the rows are Labor and the rest Material. Costs are
+    log-normal with a median of 50, rounded to cents.
+    """
+    rng = np.random.default_rng(seed)
+    rows_per_item = 2 * n_months if rows_per_item is None else rows_per_item
+    n_rows = n_items * rows_per_item
+    first_day = pd.Timestamp(start)
+    n_days = (first_day + pd.DateOffset(months=n_months) - first_day).days
+
+    item_codes = np.repeat(np.arange(n_items), rows_per_item)
+    days = rng.integers(0, n_days, n_rows)
+    order = np.lexsort((days, item_codes))
+    item_numbers = (FIRST_ITEM_NUMBER + np.arange(n_items)).astype(str)
+
+    return pd.DataFrame({
+        'Date': first_day + pd.to_timedelta(days[order], unit='D'),
+        'Cost': np.round(rng.lognormal(np.log(50), 0.75, n_rows), 2),
+        'Item Number': pd.Categorical.from_codes(item_codes, categories=item_numbers),
+        'Type': pd.Categorical.from_codes((rng.random(n_rows) >= labor_share).astype(np.int8), categories=['Labor', 'Material']),
+    })
+
+def make_attributes(n_items=100, seed=0):
+    """an attribute table in the upload format for the items of make_cost_ledger, with Lead Time in whole days and
+    Yield as a whole percentage, as in the sample data"""
+    rng = np.random.default_rng([seed, 1])
+    return pd.DataFrame({
+        'Item Number': (FIRST_ITEM_NUMBER + np.arange(n_items)).astype(str),
+        'Cost': np.round(rng.uniform(5, 50, n_items), 2),
+        'Lead Time': rng.integers(5, 200, n_items),
+        'Yield': rng.integers(45, 101, n_items),
+        'Hours': np.round(rng.uniform(1, 20, n_items), 1),
+    })
+
+def make_hierarchy(n_items=100, items_per_assembly=10, assemblies_per_subsystem=5, subsystems_per_program=4):
+    """a WBS hierarchy file for the items of make_cost_ledger: consecutive items grouped into assemblies, assemblies
+    into subsystems and subsystems into programs, with the level columns from the item's parent up"""
+    assemblies = np.arange(n_items) // items_per_assembly
+    subsystems = assemblies // assemblies_per_subsystem
+    return pd.DataFrame({
+        'Item Number': (FIRST_ITEM_NUMBER + np.arange(n_items)).astype(str),
+        'Assembly': [f"A{assembly + 1}" for assembly in assemblies],
+        'Subsystem': [f"S{subsystem + 1}" for subsystem in subsystems],
+        'Program': [f"P{program + 1}" for program in subsystems // subsystems_per_program],
+    })
@@ -0,0 +1,218 @@
+"""WBS roll-up: items grouped into assemblies, subsystems and programs, with the monthly costs of every node kept up to date"""
+import pandas as pd
+import numpy as np
+
+from evm_calc.evm import calculate_evm, calculate_evm_arrays
+from evm_calc.periods import bucket_by_item_and_month, days_to_months, month_end_dates, month_range
+from evm_calc.portfolio import modify_portfolio
+
+# The hierarchy file lists each item's number; every other column is a level, from the item's parent up to the top
+# level (for example Item Number, Assembly, Subsystem, Program)
+HIERARCHY_SCHEMA = {'Item Number': 'category'}
+
+# Node that items missing from the hierarchy file (or with every level blank) are grouped under
+UNASSIGNED_NODE = 'Unassigned'
+
+def hierarchy_levels(hierarchy_df):
+    """the level columns of a hierarchy file, from the item's parent up to the top level"""
+    return [column for column in hierarchy_df.columns if column != 'Item Number']
+
+def build_wbs_tree(hierarchy_df, item_numbers):
+    """builds the node tree of a hierarchy file and places each of item_numbers under its lowest node
+
+    Nodes are named by their path from the top level ("Program A / Subsystem 1 / Assembly X"), so two assemblies
+    with the same name under different subsystems stay apart. A blank level is skipped, so the item hangs from the
+    next level up. Items missing from the file go under an Unassigned node, and an item listed twice keeps its first
+    row. Returns a dictionary of arrays: node names, levels, parents (-1 for a top node) and depths in depth first
+    order, and the lowest node and chain of ancestors (nearest first, padded with -1) of each item.
+    """
+    levels = hierarchy_levels(hierarchy_df)
+    if not levels:
+        raise ValueError("the hierarchy file needs at least one level column after Item Number")
+    first_rows = hierarchy_df.drop_duplicates('Item Number')
+
+    # Level values from the top level down, blank values as missing, for every item in item_numbers
+    top_down = first_rows[levels[::-1]]
+    top_down = top_down.astype(str).apply(lambda column: column.str.strip()).where(top_down.notna())
+    top_down = top_down.where(top_down != '').set_axis(first_rows['Item Number'].astype(str).to_numpy()).reindex(pd.Index(item_numbers).astype(str))
+    paths = [tuple(value for value in row if isinstance(value, str)) for row in top_down.itertuples(index=False)]
+
+    # Every node on the distinct paths, with the level it belongs to
+    path_levels = {}
+    for row in top_down.drop_duplicates().itertuples(index=False):
+        steps = [(value, level) for value, level in zip(row, levels[::-1]) if isinstance(value, str)]
+        for depth, (_, level) in enumerate(steps):
+            path_levels.setdefault(tuple(value for value, _ in steps[:depth + 1]), level)
+    if any(not path for path in paths):
+        path_levels[(UNASSIGNED_NODE,)] = ''
+
+    # Depth first order, so a node's descendants follow it
+    node_paths = sorted(path_levels)
+    node_codes = {path: code for code, path in enumerate(node_paths)}
+    parents = np.array([node_codes.get(path[:-1], -1) for path in node_paths], dtype=np.int64)
+    depths = np.array([len(path) - 1 for path in node_paths], dtype=np.int64)
+
+    item_nodes = np.array([node_codes[path or (UNASSIGNED_NODE,)] for path in paths], dtype=np.int64)
+    ancestors = np.full((len(node_paths), int(depths.max()) + 1 if len(depths) else 1), -1, dtype=np.int64)
+    for node, path in enumerate(node_paths):
+        ancestors[node, :len(path)] = [node_codes[path[:length]] for length in range(len(path), 0, -1)]
+
+    return {
+        'node_names': pd.Index([' / '.join(path) for path in node_paths], name='Node'),
+        'node_levels': np.array([path_levels[path] for path in node_paths], dtype=object),
+        'parents': parents,
+        'depths': depths,
+        'item_numbers': pd.Index(item_numbers).astype(str),
+        'item_nodes': item_nodes,
+        'item_ancestors': ancestors[item_nodes],
+    }
+
+def _sum_rows(values, groups, n_groups):
+    """sums the rows of a matrix into n_groups rows by group (rows in group -1 are left out)"""
+    totals = np.zeros((n_groups, values.shape[1]))
+    keep = groups >= 0
+    order = np.argsort(groups[keep], kind='stable')
+    sorted_groups = groups[keep][order]
+    if len(sorted_groups):
+        starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+        totals[sorted_groups[starts]] = np.add.reduceat(values[keep][order], starts, axis=0)
+    return totals
+
+
+class WbsRollup:
+    """monthly baseline and modified costs of every WBS node, kept up to date one item at a time
+
+    The baseline is bucketed by item and month once (from a portfolio index) and summed into every node, along each
+    item's chain of ancestors. Changing one item's attributes re-buckets only that item's rows and adds the change to
+    its ancestors, so an update costs the item's rows plus one row per level instead of re-aggregating every item.
+    set_impacts recomputes every item at once, as portfolio mode does.
+    """
+
+    def __init__(self, portfolio_index, hierarchy_df):
+        self.index = portfolio_index
+        self.tree = build_wbs_tree(hierarchy_df, portfolio_index['item_numbers'])
+        self.item_codes = {item: code for code, item in enumerate(self.tree['item_numbers'])}
+
+        # Each item's rows of the portfolio index, as one contiguous run
+        self.row_order = np.argsort(portfolio_index['codes'], kind='stable')
+        self.row_boundaries = np.searchsorted(portfolio_index['codes'][self.row_order], np.arange(len(self.item_codes) + 1))
+
+        self.first_month = portfolio_index['first_month']
+        self.item_initial = portfolio_index['baseline_costs']
+        self.node_initial = self._roll_up(self.item_initial)
+        self.reset()
+
+    def reset(self):
+        """puts every item back to its own attribute values"""
+        self.item_modified = self.item_initial.copy()
+        self.node_modified = self.node_initial.copy()
+        self.changed_items = set()
+
+    def set_impacts(self, impacts_df):
+        """applies a table of impacts (from assess_portfolio_impacts) to every item and rolls all nodes up again"""
+        modified_costs, modified_months = modify_portfolio(self.index, impacts_df)
+        self._extend(*month_range(modified_months))
+        n_items, n_months = self.item_initial.shape
+        self.item_modified = bucket_by_item_and_month(self.index['codes'], modified_months - self.first_month, modified_costs, n_items, n_months)
+        self.node_modified = self._roll_up(self.item_modified)
+        self.changed_items = {item for item in impacts_df.index.astype(str) if item in self.item_codes}
+
+    def update_item(self, item_number, impacts_dic):
+        """applies one item's impacts (from assess_impacts) and updates only the item and its ancestors
+
+        Returns the positions of the nodes that changed, nearest first.
+        """
+        item = self.item_codes[str(item_number)]
+        rows = self.row_order[self.row_boundaries[item]:self.row_boundaries[item + 1]]
+
+        # Scale labor and material costs, leave any other type unchanged, and shift the dates by the lead time change
+        multipliers = np.array([1.0, impacts_dic['labor_impacts'], impacts_dic['material_impacts']])
+        costs = self.index['costs'][rows] * multipliers[self.index['multiplier_keys'][rows] % 3]
+        units_per_day = self.index['units_per_day']
+        shift = int(np.round(impacts_dic['date_impacts'] * units_per_day))
+        months = days_to_months(np.floor_divide(self.index['date_values'][rows] + shift, units_per_day))
+        if len(months):
+            self._extend(*month_range(months))
+        item_costs = np.bincount(months - self.first_month, weights=costs, minlength=self.item_initial.shape[1])
+
+        change = item_costs - self.item_modified[item]
+        self.item_modified[item] = item_costs
+        ancestors = self.tree['item_ancestors'][item]
+        ancestors = ancestors[ancestors >= 0]
+        self.node_modified[ancestors] += change
+        self.changed_items.add(str(item_number))
+        return ancestors
+
+    def node_costs(self, node=None):
+        """the baseline and modified monthly costs of a node (by name), or of every item when node is None"""
+        if node is None:
+            return self.item_initial.sum(axis=0), self.item_modified.sum(axis=0)
+        position = self._node_position(node)
+        return self.node_initial[position], self.node_modified[position]
+
+    def node_evm(self, node=None):
+        """the combined data set with EVM columns and the EVM summary of a node, or of every item when node is None"""
+        initial_costs, modified_costs = self.node_costs(node)
+        used = np.flatnonzero((initial_costs != 0) | (modified_costs != 0))
+        start, stop = (used[0], used[-1] + 1) if len(used) else (0, 0)
+        combined_data_set = pd.DataFrame({
+            'Date': month_end_dates(self.first_month + start, stop - start),
+            'Initial_Costs': initial_costs[start:stop],
+            'Modified_Costs': modified_costs[start:stop]
+        })
+        return calculate_evm(combined_data_set)
+
+    def node_summary(self):
+        """EVM summary of every node in one batched pass, in depth first order, with each node's level and depth"""
+        _, summary = calculate_evm_arrays(self.node_initial, self.node_modified)
+        summary_df = pd.DataFrame(summary, index=self.tree['node_names'])
+        summary_df.insert(0, 'Level', self.tree['node_levels'])
+        summary_df.insert(1, 'Depth', self.tree['depths'])
+        return summary_df
+
+    def children_summary(self, node=None):
+        """EVM summary of each child of a node (child nodes, then the items directly under it) in one batched pass
+
+        With node None the children are the top level nodes. Returns a table indexed by name with a Level column.
+        """
+        parent = -1 if node is None else self._node_position(node)
+        child_nodes = np.flatnonzero(self.tree['parents'] == parent)
+        child_items = np.flatnonzero(self.tree['item_nodes'] == parent) if parent >= 0 else np.zeros(0, dtype=np.int64)
+
+        initial_costs = np.vstack([self.node_initial[child_nodes], self.item_initial[child_items]])
+        modified_costs = np.vstack([self.node_modified[child_nodes], self.item_modified[child_items]])
+        _, summary = calculate_evm_arrays(initial_costs, modified_costs)
+        names = [*self.tree['node_names'][child_nodes], *self.tree['item_numbers'][child_items]]
+        summary_df = pd.DataFrame(summary, index=pd.Index(names, name='Node'))
+        summary_df.insert(0, 'Level', [*self.tree['node_levels'][child_nodes], *['Item'] * len(child_items)])
+        return summary_df
+
+    def node_items(self, node=None):
+        """the item numbers under a node (at any depth), or every item when node is None"""
+        if node is None:
+            return list(self.tree['item_numbers'])
+        position = self._node_position(node)
+        under = (self.tree['item_ancestors'] == position).any(axis=1)
+        return list(self.tree['item_numbers'][under])
+
+    def _node_position(self, node):
+        """position of a node (by name) in the tree"""
+        if node not in self.tree['node_names']:
+            raise ValueError(f"unknown WBS node {node!r}")
+        return self.tree['node_names'].get_loc(node)
+
+    def _roll_up(self, item_costs):
+        """sums items x months costs into every node along each item's chain of ancestors"""
+        n_nodes = len(self.tree['node_names'])
+        return sum(_sum_rows(item_costs, ancestors, n_nodes) for ancestors in self.tree['item_ancestors'].T)
+
+    def _extend(self, first_month, n_months):
+        """widens the month range of every matrix to cover first_month to first_month + n_months"""
+        current_stop = self.first_month + self.item_initial.shape[1]
+        new_first, new_stop = min(first_month, self.first_month), max(first_month + n_months, current_stop)
+        if new_first == self.first_month and new_stop == current_stop:
+            return
+        before, after = self.first_month - new_first, new_stop - current_stop
+        for name in ('item_initial', 'node_initial', 'item_modified', 'node_modified'):
+            setattr(self, name, np.pad(getattr(self, name), ((0, 0), (before, after))))
+        self.first_month = new_first
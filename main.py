@@ -3,18 +3,64 @@ import streamlit as st
 st.set_page_config(layout="wide")
 import pandas as pd
 import plotly.graph_objects as go
-from PIL import Image
-import io
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
+import functools
 import os
 import sys
-
-
-# Run pip install -U kaleido to install the kaleido package needed for plotly to_image()
-# Note on Windows must use kaleido version 0.1.0post1 for it to work with plotly
-
+import tempfile
+from evm_calc import (
+    ATTRIBUTE_SCHEMA,
+    COST_DTYPES,
+    COST_SCHEMA,
+    HIERARCHY_SCHEMA,
+    ScenarioCache,
+    WbsRollup,
+    assess_impacts,
+    assess_portfolio_impacts,
+    build_baseline_monthly,
+    build_item_index,
+    build_portfolio_index,
+    build_snapshot_index,
+    calculate_portfolio_evm,
+    compact_cost_data,
+    compare_versions,
+    cost_versions,
+    expand_cost_data,
+    filter_data,
+    hierarchy_levels,
+    load_data_file,
+    memory_report,
+    run_scenario,
+    scenario_key,
+    select_version,
+    version_trend,
+)
+from evm_calc.append import append_cost_rows, item_watermarks, merge_baseline_monthly, prepare_append
+from evm_calc.downsample import display_indices
+from evm_calc.goalseek import GOAL_METRICS, goal_seek
+from evm_calc.ingest import aggregate_cost_file
+from evm_calc.periods import GRANULARITIES
+from evm_calc.profiling import StageProfiler, profile_stage
+from evm_calc.montecarlo import monte_carlo_percentiles, run_monte_carlo, s_curve
+from evm_calc.scenarios import SLIDER_ATTRIBUTES, run_item_scenarios
+from evm_calc.store import DatasetStore
+from evm_calc.sweep import (
+    base_slider_values,
+    grid_scenarios,
+    latin_hypercube_scenarios,
+    prepare_sweep_inputs,
+    run_sweep,
+    surface_scenarios,
+    sweep_ranges,
+    tornado_data,
+    tornado_scenarios,
+)
+
+
+# Chart traces with more points than this are drawn with WebGL (Scattergl) rather than SVG
+WEBGL_POINT_THRESHOLD = 1000
+
+# Chart series longer than this are downsampled (largest triangle three buckets) for display
+MAX_DISPLAY_POINTS = 1000
 
 # Initialize session state for navigation and data storage
 if 'page' not in st.session_state:
@@ -23,6 +69,34 @@ if 'cost_df' not in st.session_state:
     st.session_state.cost_df = None
 if 'attribute_df' not in st.session_state:
     st.session_state.attribute_df = None
+if 'cost_item_offsets' not in st.session_state:
+    st.session_state.cost_item_offsets = None
+if 'attribute_item_offsets' not in st.session_state:
+    st.session_state.attribute_item_offsets = None
+if 'baseline_monthly' not in st.session_state:
+    st.session_state.baseline_monthly = None
+if 'scenario_cache' not in st.session_state:
+    st.session_state.scenario_cache = None
+if 'portfolio_index' not in st.session_state:
+    st.session_state.portfolio_index = None
+if 'cost_dataset' not in st.session_state:
+    st.session_state.cost_dataset = None
+if 'scenario_evaluators' not in st.session_state:
+    st.session_state.scenario_evaluators = None
+if 'report_cache' not in st.session_state:
+    st.session_state.report_cache = None
+if 'profiler' not in st.session_state:
+    st.session_state.profiler = None
+if 'cost_version' not in st.session_state:
+    st.session_state.cost_version = None
+if 'snapshot_index' not in st.session_state:
+    st.session_state.snapshot_index = None
+if 'hierarchy_df' not in st.session_state:
+    st.session_state.hierarchy_df = None
+if 'wbs_rollup' not in st.session_state:
+    st.session_state.wbs_rollup = None
+if 'wbs_attributes' not in st.session_state:
+    st.session_state.wbs_attributes = {}
 
 def main():
     # Route to the correct page based on session state
@@ -45,37 +119,76 @@ def navigate_to_chart_screen():
     """modifies the session state page to the final screen"""
     st.session_state.page = 'chart_screen'
 
+@st.cache_resource
+def dataset_store():
+    """The dataset store shared by every session of this server, so identical uploads are held once"""
+    return DatasetStore()
+
 def show_initial_screen():
     """Launches the screen to upload the detailed datafile"""
     st.title("Interactive EVM Tool")
     st.write("This tool will take a cost profile and item attributes to create an understanding of changes to EVM data")
     st.subheader("Upload Cost Data")
 
+    # Large ledgers are streamed and reduced to item, type and date totals. They can be read from a path on this
+    # machine, since an upload is held in memory whole
+    stream_file = st.checkbox("Large cost file: stream it and keep only the item, type and date totals")
+    cost_path = st.text_input("Path of the cost file on this machine (instead of uploading it)") if stream_file else ""
+
+    # Compact storage keeps dates as day numbers and costs at a chosen precision, about half the memory per row
+    compact = st.checkbox("Compact storage: keep dates as day numbers and costs at a chosen precision")
+    cost_precision = st.selectbox("Cost precision", COST_DTYPES, help="float32 keeps about 7 significant digits of each cost, totals are still summed at full precision") if compact else None
+
     # File uploader to get the data file loaded 
-    uploaded_file = st.file_uploader("Choose your cost profile dataset", type=['csv', 'xlsx'])
-    if uploaded_file is not None:
+    uploaded_file = st.file_uploader("Choose your cost profile dataset", type=['csv', 'xlsx', 'parquet', 'arrow', 'feather'])
+    cost_file = cost_path or uploaded_file
+    if cost_file:
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
+            if stream_file:
+                df, report = stream_cost_file(cost_file)
+                if cost_precision and not report['missing_columns']:
+                    df = compact_cost_data(df, cost_precision)
+                dataset_key = None
             else:
-                df = pd.read_excel(uploaded_file)
-
-            # Define expected columns for detail data
-            expected_columns = ['Date', 'Cost', 'Item Number', 'Type']
-            valid_file = validate_columns_exist(expected_columns, df)
+                # Read, format and check the columns (Date, Cost, Item Number, Type) into the shared store, which
+                # holds each distinct file once for every session
+                dataset_key, df, report = dataset_store().put(uploaded_file, COST_SCHEMA, compact=cost_precision)
+            valid_file = not report['missing_columns']
 
             if valid_file:
-                # Format columns
-                df['Date'] = pd.to_datetime(df['Date'])  # Format date column
-                df['Cost'] = pd.to_numeric(df['Cost'], errors='coerce')  # Format cost column as numeric
-                df['Item Number'] = df['Item Number'].astype(str)  # Format item number as string
-                df['Type'] = df['Type'].astype(str)  # Format type as string
-                
+                show_bad_rows(report['bad_rows'])
+
                 #create a data preview
                 st.write("Data Preview:")
-                st.dataframe(df.head())
-                st.success(f"File '{uploaded_file.name}' successfully uploaded file")
-                st.session_state.cost_df = df  # Store the dataframe in session state
+                st.dataframe(expand_cost_data(df.head()))
+                st.success(f"File '{getattr(cost_file, 'name', cost_file)}' successfully uploaded file")
+                # A file holding several baseline versions is charted one version at a time (the latest by default)
+                versions = cost_versions(df)
+                st.session_state.cost_version = st.selectbox("Baseline version to chart", versions, index=len(versions) - 1) if len(versions) > 1 else None
+
+                # Store the dataframe in session state, grouped by item so each item is a contiguous slice. Stored
+                # datasets are already grouped (each version on its own), and the session only refers to the shared copy
+                st.session_state.cost_dataset = dataset_key
+                if dataset_key is None:
+                    st.session_state.cost_df, st.session_state.cost_item_offsets = build_item_index(select_version(df, st.session_state.cost_version))
+                else:
+                    st.session_state.cost_df, st.session_state.cost_item_offsets = dataset_store().get(dataset_key, st.session_state.cost_version)
+                show_memory_report(st.session_state.cost_df)
+
+                # Every version is bucketed once, in one pass, for comparing versions on the chart screen
+                if len(versions) > 1:
+                    st.session_state.snapshot_index = dataset_store().derived(dataset_key, 'snapshot_index', build_snapshot_index) if dataset_key is not None else build_snapshot_index(df)
+                else:
+                    st.session_state.snapshot_index = None
+
+                # The baseline never changes with the sliders, so bucket it by month once per uploaded dataset
+                st.session_state.baseline_monthly = shared_dataset_value('baseline_monthly', build_baseline_monthly)
+                st.session_state.scenario_cache = ScenarioCache()
+                st.session_state.scenario_evaluators = {}  # Per-item incremental evaluators, built when an item is first charted
+                st.session_state.portfolio_index = None  # Rebuilt from the new file when portfolio mode is opened
+                st.session_state.wbs_rollup = None  # Rebuilt from the new file when the WBS roll-up is opened
+                st.session_state.wbs_attributes = {}
+                st.session_state.report_cache = None  # Exported reports were drawn from the previous file
                 st.button("Next", on_click=navigate_to_upload_screen_2)
 
             else:
@@ -87,6 +200,41 @@ def show_initial_screen():
         except Exception as e:
             st.error(f"Error: {e}")
 
+def stored_cost_dataset():
+    """The store key of the charted cost data, or None when it was streamed or the store has since dropped it to make room"""
+    key = st.session_state.get('cost_dataset')
+    return key if key is not None and key in dataset_store() else None
+
+def shared_dataset_value(name, build):
+    """Builds a value from the charted cost data once per stored dataset and version and shares it between sessions (streamed files are per session)"""
+    key = stored_cost_dataset()
+    if key is not None:
+        version = st.session_state.get('cost_version')
+        return dataset_store().derived(key, (name, version), build, version)
+    return build(st.session_state.cost_df)
+
+def stream_cost_file(cost_file):
+    """Streams a large cost file into item, type and date totals, showing progress and the ingestion rate"""
+
+    # Streamlit reruns the script on every interaction, so keep the totals of the last file streamed
+    file_key = (getattr(cost_file, 'file_id', None) or os.path.abspath(cost_file), getattr(cost_file, 'size', None) or os.path.getsize(cost_file))
+    streamed = st.session_state.get('streamed_cost_file')
+    if streamed is not None and streamed[0] == file_key:
+        df, report = streamed[1], streamed[2]
+    else:
+        status = st.empty()
+        df, report = aggregate_cost_file(cost_file, progress=lambda rows: status.write(f"Read {rows:,} rows..."))
+        status.empty()
+        if report['missing_columns']:
+            return df, report
+        st.session_state.streamed_cost_file = (file_key, df, report)
+
+    peak_rss = f", peak memory {report['peak_rss_mb']:,.0f} MB" if report['peak_rss_mb'] is not None else ""
+    st.caption(f"Streamed {report['rows']:,} rows into {len(df):,} totals in {report['seconds']:.1f} s ({report['rows_per_second']:,.0f} rows/s{peak_rss})")
+    if report['bad_row_count'] > report['bad_rows']['Row'].nunique():
+        st.caption(f"{report['bad_row_count']:,} rows have bad values, the first {len(report['bad_rows']):,} are listed")
+    return df, report
+
 def upload_attr_data_page():
     """Launches a screen to upload the data attributes"""
     st.title("Interactive EVM Tool")
@@ -94,33 +242,24 @@ def upload_attr_data_page():
     st.subheader("Upload Attribute Data")
 
     # File uploader to get item attributes data
-    uploaded_file = st.file_uploader("Choose a file for feeder page", type=['csv', 'xlsx'])
+    uploaded_file = st.file_uploader("Choose a file for feeder page", type=['csv', 'xlsx', 'parquet', 'arrow', 'feather'])
     if uploaded_file is not None:
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
-
-
-            # Define expected columns for attributes data
-            expected_columns = ['Item Number', 'Cost', 'Lead Time', 'Yield', 'Hours']
-            valid_file = validate_columns_exist(expected_columns, df)
+            # Read, format and check the columns (Item Number, Cost, Lead Time, Yield, Hours) into the shared store
+            dataset_key, df, report = dataset_store().put(uploaded_file, ATTRIBUTE_SCHEMA)
+            valid_file = not report['missing_columns']
 
             if valid_file:
-
-                # Format columns for attributes data
-                df['Item Number'] = df['Item Number'].astype(str)  # Format item number as string
-                df['Cost'] = pd.to_numeric(df['Cost'], errors='coerce')  # Format cost as numeric
-                df['Lead Time'] = pd.to_numeric(df['Lead Time'], errors='coerce')  # Format lead time as numeric
-                df['Yield'] = pd.to_numeric(df['Yield'], errors='coerce') / 100  # Format yield as percentage
-                df['Hours'] = pd.to_numeric(df['Hours'], errors='coerce')  # Format hours as numeric
+                show_bad_rows(report['bad_rows'])
 
                 #create a data preview
                 st.write("Data Preview:")
                 st.dataframe(df.head())
                 st.success(f"File '{uploaded_file.name}' successfully uploaded file")
-                st.session_state.attribute_df = df  # Store the dataframe in session state
+                # Store the dataframe in session state, grouped by item so each item is a contiguous slice
+                st.session_state.attribute_df, st.session_state.attribute_item_offsets = dataset_store().get(dataset_key)
+                st.session_state.scenario_cache = ScenarioCache()  # Cached scenarios were based on the previous attributes
+                st.session_state.report_cache = None
                 st.button("Next", on_click=navigate_to_chart_screen)
             else:
                 st.error(f"missing required columns")
@@ -130,342 +269,846 @@ def upload_attr_data_page():
 
         except Exception as e:
             st.error(f"Error: {e}")
-            
+
+def show_bad_rows(bad_rows_df):
+    """Warns about values in an uploaded file that are missing or could not be read"""
+    if bad_rows_df.empty:
+        return
+    st.warning(f"{bad_rows_df['Row'].nunique():,} rows have missing or unreadable values. Rows without an item number are skipped; other bad values count as no cost.")
+    with st.expander("Show bad rows"):
+        st.dataframe(bad_rows_df, hide_index=True)
+
+def show_memory_report(df):
+    """Shows the memory the cost data takes per row and per column"""
+    report = memory_report(df)
+    with st.expander(f"Memory use: {report['Bytes per row'].iloc[-1]:,.1f} bytes per row ({report['Bytes'].iloc[-1] / 1e6:,.1f} MB)"):
+        st.dataframe(report, hide_index=True)
+
 def show_chart_screen():    
     """Launches the final screen that includes the charts based on the uploaded data file"""
 
-    #determines multipliers that defines max value of slider bars
-    material_multiplier = 10 
-    leadtime_multiplier = 10 
-
     st.header("Interactive EVM Tool")
     # Generate PDF and display download button
     if st.session_state.cost_df is not None and st.session_state.attribute_df is not None:
+
+            # Stages of this rerun are timed when profiling is switched on in the sidebar
+            profiler = pipeline_profiler()
+
+            # New cost rows (such as the latest month's actuals) are merged into the loaded data
+            show_append_panel()
+
+            # Portfolio mode applies changes to every item at once instead of the selected item
+            if st.sidebar.toggle("Portfolio mode (apply to all items)", key="portfolio_mode"):
+                show_portfolio_screen(profiler)
+                show_profiling_panel(profiler)
+                return
+
+            # The WBS roll-up charts any assembly, subsystem or program of an optional hierarchy file
+            if st.sidebar.toggle("WBS roll-up", key="wbs_mode"):
+                show_wbs_screen(profiler)
+                show_profiling_panel(profiler)
+                return
+
+            # A file with several baseline versions can compare any two of them instead of charting one
+            if st.session_state.snapshot_index is not None:
+                if st.sidebar.toggle("Compare baseline versions", key="versions_mode"):
+                    show_versions_screen(profiler)
+                    show_profiling_panel(profiler)
+                    return
+                st.sidebar.caption(f"Charting baseline version {st.session_state.cost_version}")
      
-            # create a unique list of items from the cost data file
-            unique_items = st.session_state.cost_df['Item Number'].unique()
+            # create a unique list of items from the cost data file (recorded once when the file was indexed)
+            unique_items = list(st.session_state.cost_item_offsets)
 
             #Use unique list to create dropdown box for user interaction
             selected_item = st.sidebar.selectbox("Select Item Number", unique_items)
 
+            # Time period the costs are bucketed by for the charts and EVM
+            granularity = st.sidebar.selectbox("Time period", list(GRANULARITIES), index=list(GRANULARITIES).index("month"), format_func=str.title)
+
             # Get default attribute values for the selected item
-            item_attributes = st.session_state.attribute_df[st.session_state.attribute_df['Item Number'] == selected_item]
+            item_attributes = filter_data(st.session_state.attribute_df, selected_item, st.session_state.attribute_item_offsets)
             
-            if not item_attributes.empty:
-                default_cost = item_attributes['Cost'].values[0]
-                default_lead_time = item_attributes['Lead Time'].values[0]
-                default_yield = item_attributes['Yield'].values[0]
-                default_hours = item_attributes['Hours'].values[0]
-            else:
+            if item_attributes.empty:
                 st.warning("No matching attributes found for the selected item.")
                 return
 
-            # Material Cost Slider Bar
-            cost_slider = st.sidebar.slider(
-                f"Material Cost (default: ${default_cost})",
-                min_value=0.0, 
-                max_value=float(material_multiplier*default_cost), 
-                value=float(default_cost)
-                )
-
-            st.sidebar.divider()
-
-            # Lead Time Slider Bar
-            lead_time_slider = st.sidebar.slider(
-                f"Lead Time (default: ${default_lead_time})", 
-                min_value=0, 
-                max_value=default_lead_time*leadtime_multiplier, 
-                value=int(default_lead_time)
-                )
-
-            st.sidebar.divider()
-
-            # Yield Slider Bar
-            yield_slider = st.sidebar.slider(
-                f"Lead Time (default: ${default_yield})", 
-                min_value=0.0,
-                max_value=1.0, 
-                value=float(default_yield)
-                )
-
-            st.sidebar.divider()
-
-            # Hours Slider Bar
-            hours_slider = st.sidebar.slider(
-                f"Hours (default: ${default_hours})", 
-                min_value=0.0, 
-                max_value=10.0, 
-                value=float(default_hours)
-                )
-
-            # User attributes dictionary based on slider values
-            user_attributes_dictionary = {
-                "item_lead_time": lead_time_slider,
-                "item_cost": cost_slider,
-                "item_yeild": yield_slider,
-                "item_hours": hours_slider
-            }
-           
-            #Display charts in tabs 
-            tab1, tab2 = st.tabs([
-                "Cummulative Line Chart",
-                "Bubble Chart",
-                ]
-                )
-
-            with tab1: #Cummulative line chart
-                
-                placeholder = st.empty()
-                with placeholder.container():
-                    fig1 = generate_charts(st.session_state.cost_df, st.session_state.attribute_df, item_number=selected_item, user_attributes_dictionary=user_attributes_dictionary, chart_type="line_chart")
-
-
-            with tab2: #Bubble chart
-                placeholder = st.empty()
-                with placeholder.container():
-                    fig2 = generate_charts(st.session_state.cost_df, st.session_state.attribute_df,item_number=selected_item, user_attributes_dictionary=user_attributes_dictionary, chart_type="bubble_chart")
-
-
-            # PDF Generation
-            # Single button for export and download
-            if st.button("Export and Download PDF", key="export_pdf"):
-                initial_details = f"Initial Attributes: {default_yield*100}% Yield, ${default_cost:,.2f} item cost, {default_lead_time:,.2f} days lead time, {default_hours:,.2f} hours"
-                new_details = f"Modified Attributes: {yield_slider*100}% Yield, ${cost_slider:,.2f} item cost, {lead_time_slider:,.2f} days lead time, {hours_slider:,.2f} hours"
-                chart_details = f"{initial_details}\n{new_details}"
-                chart_title = f"Modified Cost Profile for {selected_item}"
-                st.write("Exporting PDF...")  # Debug log
-                # Generate the PDF
-                pdf_buffer = export_charts_to_pdf(fig1, fig2, chart_title, chart_details)
-                
-                if pdf_buffer:
-                    st.success("PDF generated successfully!")
-                    # Immediately serve the file for download
-                    st.download_button(
-                        label="Click here to download your PDF",
-                        data=pdf_buffer,
-                        file_name="charts.pdf",
-                        mime="application/pdf",
-                        key="download_button"
-                    )
-                else:
-                    st.error("PDF generation failed. Please check your input.")
+            # A slider move reruns only this fragment (the sliders, the open tab and the export). The steps above, the
+            # mode switches, item list and attribute lookup, run again only when the item or time period changes
+            st.session_state.chart_full_rerun = True
+            st.fragment(show_item_scenario)(selected_item, granularity, item_attributes, profiler)
 
-def generate_charts(
-        cost_df,
-        attributes_df, 
-        user_attributes_dictionary,
-        chart_type="line_chart",
-        item_number=""
-        ):
-    """generates a line and bubble line chart"""
+            # Report of every item, written in the background; the fragment refreshes itself while the job runs
+            job = st.session_state.get('report_job')
+            polling = job is not None and job.running
+            st.fragment(show_report_job, run_every=1.0 if polling else None)(granularity, polling)
 
-    #filter the cost_df by the desire item number
-    filtered_df = filter_data(cost_df, item_number)
-    filtered_attributes_df = filter_data(attributes_df, item_number)
+def show_item_scenario(selected_item, granularity, item_attributes, profiler=None):
+    """Sliders, charts and PDF export of the selected item, run as a fragment so a slider move reruns only this part of the page"""
 
-    #Calculate the percent change impacts for each attribute
-    impacts_dic = assess_impacts(filtered_attributes_df, user_attributes_dictionary)
+    #determines multipliers that defines max value of slider bars
+    material_multiplier = 10 
+    leadtime_multiplier = 10 
 
-    #Modify datafile based on impacts
-    modified_df = modify_dataset(filtered_df, impacts_dic)
+    # A fragment rerun starts its own profiler run; a full rerun has started one already
+    if not st.session_state.pop('chart_full_rerun', False):
+        profiler = pipeline_profiler()
+
+    default_cost = item_attributes['Cost'].values[0]
+    default_lead_time = item_attributes['Lead Time'].values[0]
+    default_yield = item_attributes['Yield'].values[0]
+    default_hours = item_attributes['Hours'].values[0]
+
+    # Material Cost Slider Bar
+    cost_slider = st.sidebar.slider(
+        f"Material Cost (default: ${default_cost})",
+        min_value=0.0, 
+        max_value=float(material_multiplier*default_cost), 
+        value=float(default_cost)
+        )
 
-    #create a common X dataset - combined data set is three columns, x value of dates, y values of og costs, and y values of modified costs
-    combined_data_set = create_common_x_value_by_month(filtered_df, modified_df)
+    st.sidebar.divider()
 
-    #Calculate EVM data and adds columns to the combined_data_set for the time-phased values
-    combined_data_set_with_evm, evm_summary_data = calculate_evm(combined_data_set) 
-    
-    # Plot the relevant chart based on the chart type
-    if chart_type == "line_chart":
-        fig = plot_line_chart_with_percent_delta(combined_data_set_with_evm, evm_summary_data, "Baseline", "Modified", "")
-        st.plotly_chart(fig, use_container_width=True)
-    elif chart_type == "bubble_chart":
-        fig = plot_bubble_chart(combined_data_set)
-        st.plotly_chart(fig, use_container_width=True)
+    # Lead Time Slider Bar
+    lead_time_slider = st.sidebar.slider(
+        f"Lead Time (default: ${default_lead_time})", 
+        min_value=0, 
+        max_value=default_lead_time*leadtime_multiplier, 
+        value=int(default_lead_time)
+        )
 
-    return fig
+    st.sidebar.divider()
 
-def validate_columns_exist(expected_columns, df):
-    """validates that the required columns exist in the uploaded dataframe"""
-    # Check if all expected columns are present in attributes data
-    return all(column in df.columns for column in expected_columns)
-        
-def filter_data(df, filter_item_number):
-    """create a copy of the datafile that is filtered to specific item"""
+    # Yield Slider Bar
+    yield_slider = st.sidebar.slider(
+        f"Lead Time (default: ${default_yield})", 
+        min_value=0.0,
+        max_value=1.0, 
+        value=float(default_yield)
+        )
 
-    #create a acopy of the datafile to filter
-    filtered_data = df.copy()
+    st.sidebar.divider()
 
-    if filter_item_number:
-        filtered_data = filtered_data[filtered_data['Item Number'].astype(str) == filter_item_number]
-    
-    # Ensure there's data to plot
-    if filtered_data.empty:
-        print("Warning", "No data matches the filters.")        
-        
-    return filtered_data
-
-def assess_impacts(initial_attributes, user_attributes_dictionary):
-
-    """creates a dictionary of the impacts between initial attributes and user changes"""
-    #item_lead_time changes the date only, change will be expressed in days. This will use averages in the case there are multiple data entries for attributes
-    initial_lead_time = initial_attributes['Lead Time'].mean() 
-    initial_cost = initial_attributes['Cost'].mean() 
-    initial_yeild = initial_attributes['Yield'].mean() 
-    initial_item_hours = initial_attributes['Hours'].mean() 
-
-    #Changes
-    new_lead_time = user_attributes_dictionary["item_lead_time"] - initial_lead_time #will be added to all line items
-    new_cost_percent = (user_attributes_dictionary["item_cost"] -initial_cost)/initial_cost #percent will be applied to materials costs
-    new_yield = user_attributes_dictionary["item_yeild"] - initial_yeild #already percentages, so this will give a percent change that should be applied to labor and material costs
-    new_item_hours = (user_attributes_dictionary["item_hours"]-initial_item_hours)/initial_item_hours #percentage will be applied to labor costs
-
-    #summarize change impacts
-    material_impacts = (1 + new_cost_percent - new_yield)
-    labor_impacts = (1 + new_item_hours - new_yield)
-    date_impacts = new_lead_time
-
-    #add to dictionary for simplicity downstream
-    impacts_dictionary = {
-        "material_impacts": material_impacts,  
-        "labor_impacts": labor_impacts,     
-        "date_impacts": date_impacts 
+    # Hours Slider Bar
+    hours_slider = st.sidebar.slider(
+        f"Hours (default: ${default_hours})", 
+        min_value=0.0, 
+        max_value=10.0, 
+        value=float(default_hours)
+        )
+
+    if st.session_state.scenario_cache is None:
+        st.session_state.scenario_cache = ScenarioCache()
+    if st.session_state.scenario_evaluators is None:
+        st.session_state.scenario_evaluators = {}
+
+    # User attributes dictionary based on slider values
+    user_attributes_dictionary = {
+        "item_lead_time": lead_time_slider,
+        "item_cost": cost_slider,
+        "item_yeild": yield_slider,
+        "item_hours": hours_slider
     }
 
+    #Display charts in tabs; only the open tab is computed, and switching tabs reruns this fragment
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        "Cummulative Line Chart",
+        "Bubble Chart",
+        "Sensitivity",
+        "Monte Carlo",
+        "Goal Seek",
+        ],
+        key="chart_tab",
+        on_change="rerun"
+        )
 
-    return impacts_dictionary
+    with tab1: #Cummulative line chart
+        if tab1.open:
+            placeholder = st.empty()
+            with placeholder.container():
+                generate_charts(st.session_state.cost_df, st.session_state.attribute_df, item_number=selected_item, user_attributes_dictionary=user_attributes_dictionary, chart_type="line_chart", cost_item_offsets=st.session_state.cost_item_offsets, attribute_item_offsets=st.session_state.attribute_item_offsets, baseline_monthly=st.session_state.baseline_monthly, scenario_cache=st.session_state.scenario_cache, granularity=granularity, evaluators=st.session_state.scenario_evaluators, profiler=profiler)
+
+
+    with tab2: #Bubble chart
+        if tab2.open:
+            placeholder = st.empty()
+            with placeholder.container():
+                generate_charts(st.session_state.cost_df, st.session_state.attribute_df,item_number=selected_item, user_attributes_dictionary=user_attributes_dictionary, chart_type="bubble_chart", cost_item_offsets=st.session_state.cost_item_offsets, attribute_item_offsets=st.session_state.attribute_item_offsets, baseline_monthly=st.session_state.baseline_monthly, scenario_cache=st.session_state.scenario_cache, granularity=granularity, evaluators=st.session_state.scenario_evaluators, profiler=profiler)
+
+    with tab3: #Sensitivity sweep around the current slider values
+        if tab3.open:
+            with profile_stage(profiler, "sensitivity tab"):
+                show_sensitivity_tab(selected_item, user_attributes_dictionary)
+
+    with tab4: #Risk simulation with uncertain attributes
+        if tab4.open:
+            with profile_stage(profiler, "monte carlo tab"):
+                show_monte_carlo_tab(selected_item, user_attributes_dictionary)
+
+    with tab5: #Attribute values that just meet a target
+        if tab5.open:
+            with profile_stage(profiler, "goal seek tab"):
+                show_goal_seek_tab(selected_item, user_attributes_dictionary)
+
+    # Scenario cache counters
+    cache = st.session_state.scenario_cache
+    st.sidebar.divider()
+    st.sidebar.caption(f"Scenario cache: {cache.hits} hits, {cache.misses} misses, {len(cache)}/{cache.maxsize} entries")
+    store = dataset_store()
+    st.sidebar.caption(f"Shared datasets: {len(store)} ({store.mapped_bytes() / 1e6:,.1f} MB mapped), {store.hits} repeat uploads")
+
+    # PDF Generation
+    # Single button for export and download
+    if st.button("Export and Download PDF", key="export_pdf"):
+        # The PDF libraries are only loaded once an export is asked for
+        from evm_calc.report import cached_report_pdf, scenario_settings_text
+        chart_details = scenario_settings_text(item_attributes, user_attributes_dictionary)
+        chart_title = f"Modified Cost Profile for {selected_item}"
+        st.write("Exporting PDF...")  # Debug log
+        # Charts are drawn as vector graphics once per item and slider values, and the PDF reused by later exports
+        if st.session_state.report_cache is None:
+            st.session_state.report_cache = ScenarioCache(maxsize=32)
+        combined_data_set_with_evm, evm_summary_data = run_scenario(st.session_state.cost_df, st.session_state.attribute_df, user_attributes_dictionary, item_number=selected_item, cost_item_offsets=st.session_state.cost_item_offsets, attribute_item_offsets=st.session_state.attribute_item_offsets, baseline_monthly=st.session_state.baseline_monthly, scenario_cache=st.session_state.scenario_cache, granularity=granularity, evaluators=st.session_state.scenario_evaluators)
+        # Generate the PDF
+        with profile_stage(profiler, "PDF export", len(combined_data_set_with_evm)):
+            pdf_buffer = cached_report_pdf(st.session_state.report_cache, scenario_key(selected_item, user_attributes_dictionary, granularity), chart_title, chart_details, combined_data_set_with_evm, evm_summary_data, granularity)
+
+        if pdf_buffer:
+            st.success("PDF generated successfully!")
+            # Immediately serve the file for download
+            st.download_button(
+                label="Click here to download your PDF",
+                data=pdf_buffer,
+                file_name="charts.pdf",
+                mime="application/pdf",
+                key="download_button"
+            )
+        else:
+            st.error("PDF generation failed. Please check your input.")
+
+    show_profiling_panel(profiler)
+
+def show_append_panel():
+    """Sidebar panel that appends a file of new cost rows to the charted cost data instead of uploading the whole ledger again"""
+    with st.sidebar.expander("Append new cost rows"):
+        if stored_cost_dataset() is not None:
+            watermarks = dataset_store().derived(stored_cost_dataset(), 'watermarks', item_watermarks)
+        else:
+            watermarks = item_watermarks(st.session_state.cost_df)
+        if len(watermarks):
+            st.caption(f"Costs are loaded up to {watermarks.max():%d %b %Y}. Each item's rows dated on or before its own last loaded date are taken to be loaded already, and rows without a date are left out.")
+        delta_file = st.file_uploader("New cost rows (same columns as the cost file)", type=['csv', 'xlsx', 'parquet', 'arrow', 'feather'], key="append_file")
+
+        # The uploader keeps its file between reruns, so each file is appended once
+        appended = st.session_state.get('appended_file')
+        if delta_file is not None and (appended is None or appended[0] != delta_file.file_id):
+            try:
+                report = append_cost_file(delta_file)
+            except Exception as e:
+                st.error(f"Error: {e}")
+                return
+            st.session_state.appended_file = (delta_file.file_id, report)
+            appended = st.session_state.appended_file
 
-def modify_dataset(filtered_df, impacts_dic):
-    """takes the filtered data and makes a modifed dataframe based on impacts"""
+        if delta_file is not None and appended is not None:
+            report = appended[1]
+            if report['missing_columns']:
+                st.error(f"missing columns from file: {', '.join(report['missing_columns'])}")
+                return
+            show_bad_rows(report['bad_rows'])
+            st.success(f"Appended {report['appended']:,} of {report['rows']:,} rows for {len(report['items']):,} items")
+            if report['skipped']:
+                st.info(f"{report['skipped']:,} rows were dated on or before their item's last loaded date and were skipped, for items: {', '.join(report['skipped_items'])}")
+            if report['undated']:
+                st.warning(f"{report['undated']:,} rows had no date and were left out")
+
+def append_cost_file(delta_file):
+    """Merges the new rows of a delta cost file into the session's cost data and drops the cached results of only the items it changes"""
+    version = st.session_state.get('cost_version')
+    if stored_cost_dataset() is not None:
+        # The merged dataset is stored and shared like an upload; the monthly baseline is carried over from the
+        # previous dataset with only the new rows added
+        store = dataset_store()
+        key = st.session_state.cost_dataset
+        new_key, df, report = store.append(key, delta_file, version=version)
+        if report['missing_columns'] or new_key == key:
+            return report
+        new_rows = select_version(report['appended_rows'], version)
+        store.carry(key, new_key, ('baseline_monthly', version), lambda baseline_monthly: merge_baseline_monthly(baseline_monthly, new_rows))
+        st.session_state.cost_dataset = new_key
+        st.session_state.cost_df, st.session_state.cost_item_offsets = store.get(new_key, version)
+        st.session_state.baseline_monthly = shared_dataset_value('baseline_monthly', build_baseline_monthly)
+        if st.session_state.snapshot_index is not None:
+            st.session_state.snapshot_index = store.derived(new_key, 'snapshot_index', build_snapshot_index)
+    else:
+        # Streamed files (and stored ones the store has dropped) are held by the session only. The version comparison
+        # keeps the costs first loaded
+        new_rows, report = load_data_file(delta_file, COST_SCHEMA, cache_dir=None)
+        if report['missing_columns']:
+            return report
+        new_rows, append_report = prepare_append(st.session_state.cost_df, new_rows, version)
+        report.update(append_report)
+        if new_rows.empty:
+            return report
+        st.session_state.cost_df, st.session_state.cost_item_offsets = append_cost_rows(st.session_state.cost_df, new_rows)
+        st.session_state.baseline_monthly = merge_baseline_monthly(st.session_state.baseline_monthly, new_rows)
+
+    # Only the items with new rows have stale results; program level results are rebuilt when next shown
+    items = set(report['items'])
+    for cache in (st.session_state.scenario_cache, st.session_state.report_cache):
+        if cache is not None:
+            cache.discard_items(items)
+    if st.session_state.scenario_evaluators is not None:
+        for evaluator_key in [evaluator_key for evaluator_key in st.session_state.scenario_evaluators if evaluator_key[0] in items]:
+            del st.session_state.scenario_evaluators[evaluator_key]
+    st.session_state.portfolio_index = None
+    st.session_state.wbs_rollup = None  # Rebuilt with the item changes made so far when next shown
+    sweep_results = st.session_state.get('sweep_results')
+    if sweep_results is not None and not sweep_results.empty and str(sweep_results['Item Number'].iloc[0]) in items:
+        st.session_state.sweep_results = None
+    monte_carlo_results = st.session_state.get('monte_carlo_results')
+    if monte_carlo_results is not None and str(monte_carlo_results[0]) in items:
+        st.session_state.monte_carlo_results = None
+    return report
+
+def pipeline_profiler():
+    """Starts a new run of the session's profiler when profiling is switched on in the sidebar, otherwise returns None"""
+    profiler = st.session_state.profiler
+    if not st.session_state.get('profile_pipeline'):
+        if profiler is not None:
+            profiler.close()
+            st.session_state.profiler = None
+        return None
+
+    # Tracing memory slows every stage down, so it has its own switch
+    trace_memory = bool(st.session_state.get('profile_memory'))
+    if profiler is None or profiler.trace_memory != trace_memory:
+        if profiler is not None:
+            profiler.close()
+        profiler = st.session_state.profiler = StageProfiler(trace_memory)
+    profiler.start_run()
+    return profiler
+
+def show_profiling_panel(profiler):
+    """Debug sidebar panel with the time, rows and memory of each pipeline stage of this rerun, and every run as a file"""
+    st.sidebar.divider()
+    st.sidebar.toggle("Profile the chart pipeline", key="profile_pipeline")
+    if profiler is None:
+        return
+    st.sidebar.checkbox("Record memory allocated (slower)", key="profile_memory")
+
+    run_df = profiler.to_frame(profiler.run)
+    st.sidebar.caption(f"Rerun {profiler.run}: {profiler.run_ms():,.0f} ms, {run_df['ms'].sum():,.0f} ms of it in these stages")
+    st.sidebar.dataframe(run_df.drop(columns='run'), hide_index=True, column_config={'ms': st.column_config.NumberColumn(format="%.2f"), 'allocated_kb': st.column_config.NumberColumn("allocated KB", format="%.1f")})
+
+    # Timings of every rerun so far, for tracking regressions
+    column1, column2 = st.sidebar.columns(2)
+    column1.download_button("Timings JSON", profiler.dumps('json'), file_name="evm_timings.json", mime="application/json")
+    column2.download_button("Timings CSV", profiler.dumps('csv'), file_name="evm_timings.csv", mime="text/csv")
+
+def show_report_job(granularity, polling=False):
+    """Starts a report with a page for every item at its own attribute values and shows its progress and download"""
+    job = st.session_state.get('report_job')
+    column1, column2 = st.columns([1, 3])
+    workers = column2.number_input("Report worker processes", min_value=1, max_value=os.cpu_count() or 1, value=1)
+
+    if column1.button("Report all items", key="report_all", disabled=job is not None and job.running):
+        # Replace the previous report file
+        if job is not None and os.path.exists(job.path):
+            os.remove(job.path)
+        from evm_calc.report import ReportJob
+        file_descriptor, path = tempfile.mkstemp(prefix="evm_report_", suffix=".pdf")
+        os.close(file_descriptor)
+        st.session_state.report_job = ReportJob(
+            st.session_state.cost_df,
+            st.session_state.attribute_df,
+            path,
+            cost_item_offsets=st.session_state.cost_item_offsets,
+            attribute_item_offsets=st.session_state.attribute_item_offsets,
+            granularity=granularity,
+            workers=int(workers)
+            ).start()
+        st.rerun()  # Rerun the whole page so the fragment polls the running job
+
+    if job is None:
+        return
+    if job.running:
+        st.progress(job.progress, text=f"Writing report: {job.done} of {job.total} items")
+        if st.button("Cancel report", key="cancel_report"):
+            job.cancel()
+        return
+    if polling:
+        # The job finished while the fragment was polling, so rerun the whole page to stop polling
+        st.rerun()
+
+    if job.error:
+        st.error(f"Report failed: {job.error}")
+        return
+    status = "cancelled" if job.cancelled else "written"
+    st.success(f"Report {status}: {job.done} pages in {job.seconds:.1f} s")
+    if job.skipped:
+        st.caption(f"Skipped {len(job.skipped)} items missing from the attribute file")
+    with open(job.path, "rb") as report_file:
+        st.download_button(
+            label="Download report",
+            data=report_file.read(),
+            file_name="evm_report.pdf",
+            mime="application/pdf",
+            key="download_report"
+        )
+
+def show_sensitivity_tab(selected_item, user_attributes_dictionary):
+    """Displays tornado and response surface charts and runs full sensitivity sweeps for the selected item"""
 
-    modified_df = filtered_df.copy()
+    item_inputs = prepare_sweep_inputs(
+        st.session_state.cost_df,
+        st.session_state.attribute_df,
+        [selected_item],
+        st.session_state.cost_item_offsets,
+        st.session_state.attribute_item_offsets
+        )
+    if selected_item not in item_inputs:
+        st.warning("No cost data found for the selected item.")
+        return
+
+    # Each attribute is varied this far either side of its current slider value
+    spread = st.slider("Range around current values (%)", min_value=5, max_value=100, value=50, step=5) / 100
+    base_values = {key: float(value) for key, value in user_attributes_dictionary.items()}
+    ranges = sweep_ranges(base_values, spread)
+
+    # Tornado chart: one attribute at a time at the ends of its range
+    tornado_results = run_sweep(item_inputs, {selected_item: tornado_scenarios(base_values, ranges)}, workers=1)
+    st.plotly_chart(plot_tornado_chart(tornado_data(base_values, ranges, tornado_results)), use_container_width=True)
+
+    # Response surfaces: two attributes varied together, the others at their current values
+    labels = list(SLIDER_ATTRIBUTES.values())
+    keys = list(SLIDER_ATTRIBUTES)
+    column1, column2, column3 = st.columns(3)
+    x_label = column1.selectbox("Surface x-axis", labels, index=0)
+    y_label = column2.selectbox("Surface y-axis", labels, index=1)
+    surface_points = column3.slider("Surface points per axis", min_value=5, max_value=50, value=25)
+    if x_label == y_label:
+        st.info("Choose two different attributes for the response surface.")
+    else:
+        x_key, y_key = keys[labels.index(x_label)], keys[labels.index(y_label)]
+        x_values, y_values, scenario_values = surface_scenarios(base_values, ranges, x_key, y_key, surface_points)
+        surface_results = run_sweep(item_inputs, {selected_item: scenario_values}, workers=1)
+        column1, column2 = st.columns(2)
+        for column, metric in ((column1, 'EAC'), (column2, 'SV')):
+            z_values = surface_results[metric].to_numpy().reshape(surface_points, surface_points)
+            column.plotly_chart(plot_response_surface(x_values, y_values, z_values, x_label, y_label, metric), use_container_width=True)
+
+    # Full sweep of all four attributes, spread across worker processes
+    st.subheader("Full Sweep")
+    column1, column2, column3 = st.columns(3)
+    method = column1.radio("Sampling", ["Grid", "Latin hypercube"], horizontal=True)
+    if method == "Grid":
+        points = column2.number_input("Points per attribute", min_value=2, max_value=40, value=10)
+    else:
+        samples = column2.number_input("Samples", min_value=10, max_value=1_000_000, value=10_000, step=1000)
+    workers = column3.number_input("Worker processes", min_value=1, max_value=os.cpu_count() or 1, value=os.cpu_count() or 1)
+
+    if st.button("Run sweep", key="run_sweep"):
+        if method == "Grid":
+            scenario_values = grid_scenarios(ranges, int(points))
+        else:
+            scenario_values = latin_hypercube_scenarios(ranges, int(samples))
+        with st.spinner("Running sweep..."):
+            st.session_state.sweep_results = run_sweep(item_inputs, {selected_item: scenario_values}, workers=int(workers))
+
+    sweep_results = st.session_state.get('sweep_results')
+    if sweep_results is not None and not sweep_results.empty and sweep_results['Item Number'].iloc[0] == selected_item:
+        st.write(f"{len(sweep_results):,} scenarios")
+        st.dataframe(sweep_results[['EAC', 'VAC', 'SV', 'CPI', 'SPI']].describe())
+        st.download_button(
+            label="Download sweep results (CSV)",
+            data=sweep_results.to_csv(index=False),
+            file_name=f"sweep_{selected_item}.csv",
+            mime="text/csv",
+            key="download_sweep"
+        )
 
-    #modify filtered_df cost column when type = hours by multiplying impacts_dic item labor_impacts
-    modified_df.loc[filtered_df['Type'] == 'Labor', 'Cost'] *= impacts_dic['labor_impacts']
+def show_monte_carlo_tab(selected_item, user_attributes_dictionary):
+    """Draws attribute values from distributions around the current slider values and shows EAC and finish date risk"""
 
-    #modify filtered_df cost column when type = material by multiplying impacts_dic item material_impacts
-    modified_df.loc[filtered_df['Type'] == 'Material', 'Cost'] *= impacts_dic['material_impacts']
+    item_inputs = prepare_sweep_inputs(
+        st.session_state.cost_df,
+        st.session_state.attribute_df,
+        [selected_item],
+        st.session_state.cost_item_offsets,
+        st.session_state.attribute_item_offsets
+        )
+    if selected_item not in item_inputs:
+        st.warning("No cost data found for the selected item.")
+        return
+
+    # Three point estimate per attribute: the current slider value is the most likely value
+    st.write("Uncertain attributes (low and high as a percent change from the current slider value)")
+    base_values = {key: float(value) for key, value in user_attributes_dictionary.items()}
+    distributions = {}
+    for key, label in SLIDER_ATTRIBUTES.items():
+        column1, column2, column3 = st.columns(3)
+        distribution = column1.selectbox(f"{label} distribution", ["Fixed", "Triangular", "Normal", "PERT"], key=f"mc_distribution_{key}")
+        low_percent = column2.number_input(f"{label} low (%)", min_value=-100, max_value=0, value=-20, step=5, key=f"mc_low_{key}")
+        high_percent = column3.number_input(f"{label} high (%)", min_value=0, max_value=500, value=20, step=5, key=f"mc_high_{key}")
+        if distribution != "Fixed":
+            value = base_values[key]
+            distributions[key] = (distribution.lower(), value * (1 + low_percent / 100), value, value * (1 + high_percent / 100))
+
+    column1, column2 = st.columns(2)
+    samples = column1.number_input("Samples", min_value=1000, max_value=1_000_000, value=10_000, step=1000, key="mc_samples")
+    seed = column2.number_input("Random seed", min_value=0, value=0, key="mc_seed")
+
+    if st.button("Run simulation", key="run_monte_carlo"):
+        if not distributions:
+            st.info("Choose a distribution for at least one attribute.")
+        else:
+            with st.spinner("Running simulation..."):
+                item_rows, initial_attributes = item_inputs[selected_item]
+                results_df = run_monte_carlo(item_rows, initial_attributes, base_values, distributions, int(samples), int(seed))
+                st.session_state.monte_carlo_results = (selected_item, results_df)
+
+    monte_carlo_results = st.session_state.get('monte_carlo_results')
+    if monte_carlo_results is not None and monte_carlo_results[0] == selected_item:
+        results_df = monte_carlo_results[1]
+        percentiles_df = monte_carlo_percentiles(results_df)
+        st.write(f"{len(results_df):,} samples")
+        st.dataframe(percentiles_df.style.format({'EAC': '${:,.2f}', 'VAC': '${:,.2f}', 'Modified_Finish': '{:%b %Y}'}), hide_index=True)
+
+        column1, column2 = st.columns(2)
+        column1.plotly_chart(plot_s_curve(s_curve(results_df['EAC']), percentiles_df, 'EAC'), use_container_width=True)
+        column2.plotly_chart(plot_s_curve(s_curve(results_df['Modified_Finish']), percentiles_df, 'Modified_Finish'), use_container_width=True)
+        st.download_button(
+            label="Download simulation results (CSV)",
+            data=results_df.to_csv(index=False),
+            file_name=f"monte_carlo_{selected_item}.csv",
+            mime="text/csv",
+            key="download_monte_carlo"
+        )
 
-    #modify filtered_df date column by aadding impacts_dic item date_impacts
-    modified_df['Date'] = pd.to_datetime(modified_df['Date'])
-    date_impact = pd.Timedelta(days=impacts_dic['date_impacts'])
-    modified_df['Date'] = modified_df['Date'] + date_impact
-    
-    return modified_df 
-
-def create_common_x_value_by_month(filtered_df, modified_df):
-    """creates a consistent date field between both datafiles for the x-axis"""
-    # Ensure the Date columns are in datetime format
-    filtered_df['Date'] = pd.to_datetime(filtered_df['Date'])
-    modified_df['Date'] = pd.to_datetime(modified_df['Date'])
-
-    # Resample both datasets by month, using the last day of each month, and sum the costs
-    dataset_1_monthly = filtered_df.resample('ME', on='Date').sum().reset_index()
-    dataset_2_monthly = modified_df.resample('ME', on='Date').sum().reset_index()
-
-    # Extract x (dates) and y (costs) values for both datasets
-    x_values_1 = dataset_1_monthly['Date']
-    y_values_1 = dataset_1_monthly['Cost']
-
-    x_values_2 = dataset_2_monthly['Date']
-    y_values_2 = dataset_2_monthly['Cost']
-
-    # Create a common x_value range from the minimum to the maximum dates
-    min_date = min(x_values_1.min(), x_values_2.min())
-    max_date = max(x_values_1.max(), x_values_2.max())
-
-    # Generate the common date range at monthly intervals
-    x_values_common = pd.date_range(start=min_date, end=max_date, freq='ME')
-
-    # Create dictionaries to map costs to each date
-    y_values_dict_1 = dict(zip(x_values_1, y_values_1))
-    y_values_dict_2 = dict(zip(x_values_2, y_values_2))
-
-    # Align y-values to the common date range, filling missing dates with 0
-    y_values_1_aligned = [y_values_dict_1.get(date, 0) for date in x_values_common]
-    y_values_2_aligned = [y_values_dict_2.get(date, 0) for date in x_values_common]
-
-    # Combine data for export
-    combined_data_set = pd.DataFrame({
-        'Date': x_values_common,
-        'Initial_Costs': y_values_1_aligned,
-        'Modified_Costs': y_values_2_aligned
-    })
-
-    return combined_data_set
-
-def calculate_evm(combined_data_set):
-    """Calculates the Earned Value Management metrics for each date"""
-    # Initialize lists to store calculated values
-    pv_to_date_list = []
-    schedule_percent_complete_list = []
-    ac_to_date_list = []
-    percent_complete_list = []
-    ev_list = []
-    schedule_variance_list = []
-    cost_variance_list = []
-
-    # Calculate BAC (Budget at Completion) and EAC (Estimate at Completion)
-    BAC = combined_data_set['Initial_Costs'].sum()
-    EAC = combined_data_set['Modified_Costs'].sum()
-
-    # Calculate BAC (Budget at Completion) and EAC (Estimate at Completion)
-    BAC = combined_data_set['Initial_Costs'].sum()
-    EAC = combined_data_set['Modified_Costs'].sum()
-    
-    # Iterate over each date in the combined dataset
-    for idx in range(len(combined_data_set)):
-        # Filter the data to include only dates up to the current date
-        current_data = combined_data_set.iloc[:idx + 1]
-
-        # Calculate Planned Value (PV) to date (sum of Initial_Costs up to current date)
-        PV_to_date = current_data['Initial_Costs'].sum()
-        pv_to_date_list.append(PV_to_date)
-
-        # Calculate Schedule Percent Complete (PV_to_date / BAC)
-        schedule_percent_complete = PV_to_date / BAC * 100 if BAC != 0 else 0
-        schedule_percent_complete_list.append(schedule_percent_complete)
-
-        # Calculate Actual Cost (AC) to date (sum of Modified_Costs up to current date)
-        AC_to_date = current_data['Modified_Costs'].sum()
-        ac_to_date_list.append(AC_to_date)
-
-        # Calculate Percent Complete (AC_to_date / EAC)
-        percent_complete = AC_to_date / EAC * 100 if EAC != 0 else 0
-        percent_complete_list.append(percent_complete)
-
-        # Calculate Earned Value (EV) as % complete times BAC
-        EV = percent_complete * BAC / 100
-        ev_list.append(EV)
-
-        # Calculate Schedule Variance (SV) as PV_to_date - EV
-        schedule_variance = PV_to_date - EV
-        schedule_variance_list.append(schedule_variance)
-
-        # Calculate Cost Variance (CV) as EV - AC_to_date
-        cost_variance = EV - AC_to_date
-        cost_variance_list.append(cost_variance)
-
-    # Add calculated values to the combined_data_set
-    combined_data_set['PV_to_Date'] = pv_to_date_list
-    combined_data_set['Schedule_Percent_Complete'] = schedule_percent_complete_list
-    combined_data_set['AC_to_Date'] = ac_to_date_list
-    combined_data_set['Percent_Complete'] = percent_complete_list 
-    combined_data_set['Earned_Value'] = ev_list
-    combined_data_set['Schedule_Variance'] = schedule_variance_list
-    combined_data_set['Cost_Variance'] = cost_variance_list
-
-    # Create summary data for EVM
-    evm_summary_data = {
-        'BAC': BAC,
-        'EAC': EAC,
+def show_goal_seek_tab(selected_item, user_attributes_dictionary):
+    """Finds how far each attribute can move from its current slider value before the item misses a target"""
 
+    item_inputs = prepare_sweep_inputs(
+        st.session_state.cost_df,
+        st.session_state.attribute_df,
+        [selected_item],
+        st.session_state.cost_item_offsets,
+        st.session_state.attribute_item_offsets
+        )
+    if selected_item not in item_inputs:
+        st.warning("No cost data found for the selected item.")
+        return
+    item_rows, initial_attributes = item_inputs[selected_item]
+
+    # The item's EVM at the current slider values gives the default targets
+    base_values = {key: float(value) for key, value in user_attributes_dictionary.items()}
+    current = run_item_scenarios(item_rows, initial_attributes, base_values).iloc[0]
+    finish = current['Modified_Finish']
+    current_text = f"BAC ${current['BAC']:,.2f}, EAC ${current['EAC']:,.2f}, VAC ${current['VAC']:,.2f}"
+    if pd.notna(finish):
+        current_text += f", finish {finish:%b %Y}"
+    st.write(f"At the current slider values: {current_text}")
+
+    targets = {"EAC at most": 'EAC', "VAC at least": 'VAC', "Finish month at latest": 'Modified_Finish'}
+    column1, column2 = st.columns(2)
+    metric = targets[column1.selectbox("Target", list(targets), key="goal_metric")]
+    if metric == 'Modified_Finish':
+        target = column2.date_input("Finish month", value=finish.date() if pd.notna(finish) else None)
+    else:
+        target = column2.number_input(f"{metric} ($)", value=float(current['BAC'] if metric == 'EAC' else 0.0), step=100.0, format="%.2f")
+    labels = column1.multiselect("Attributes to search", list(SLIDER_ATTRIBUTES.values()), default=list(SLIDER_ATTRIBUTES.values()), key="goal_attributes")
+    spread = column2.slider("Search up to (% above the current value)", min_value=50, max_value=1000, value=500, step=50, key="goal_spread") / 100
+    if target is None or not labels:
+        st.info("Choose a target and at least one attribute.")
+        return
+
+    # Every attribute is searched together in a few batches of scenarios, each on its own from the current values
+    keys = [key for key, label in SLIDER_ATTRIBUTES.items() if label in labels]
+    results_df = goal_seek(item_rows, initial_attributes, base_values, metric, target, keys, sweep_ranges(base_values, spread))
+    st.caption(f"{metric} {GOAL_METRICS[metric]} the target. Each row is the largest (or smallest) value of one attribute that still meets it, with the others at their current values.")
+    st.dataframe(
+        results_df.style.format({'Base_Value': '{:,.3f}', 'Low': '{:,.3f}', 'High': '{:,.3f}', 'Value': '{:,.3f}', metric: '{:%b %Y}' if metric == 'Modified_Finish' else '${:,.2f}'}, na_rep=''),
+        hide_index=True
+        )
+
+def show_portfolio_screen(profiler=None):
+    """Displays program-level charts with attribute changes applied to every item at once"""
+
+    # The slider-independent arrays are built once per uploaded cost file
+    if st.session_state.portfolio_index is None:
+        st.session_state.portfolio_index = shared_dataset_value('portfolio_index', build_portfolio_index)
+
+    # Global percent change sliders, applied to each item's own attributes
+    st.sidebar.write("Percent change applied to every item")
+    cost_change = st.sidebar.slider("Material Cost change (%)", min_value=-100, max_value=500, value=0)
+    st.sidebar.divider()
+    lead_time_change = st.sidebar.slider("Lead Time change (%)", min_value=-100, max_value=500, value=0)
+    st.sidebar.divider()
+    yield_change = st.sidebar.slider("Yield change (%)", min_value=-100, max_value=100, value=0)
+    st.sidebar.divider()
+    hours_change = st.sidebar.slider("Hours change (%)", min_value=-100, max_value=500, value=0)
+    st.sidebar.divider()
+
+    # Optional per-item attribute values, which take precedence over the percent changes
+    new_attributes_df = None
+    per_item_file = st.sidebar.file_uploader("Per-item attribute values (optional)", type=['csv', 'xlsx', 'parquet', 'arrow', 'feather'])
+    if per_item_file is not None:
+        try:
+            new_attributes_df, report = load_data_file(per_item_file, ATTRIBUTE_SCHEMA)
+            if report['missing_columns']:
+                st.sidebar.error("required columns: Item Number, Cost, Lead Time, Yield, Hours")
+                new_attributes_df = None
+        except Exception as e:
+            st.sidebar.error(f"Error: {e}")
+            new_attributes_df = None
+
+    percent_changes = {
+        "item_lead_time": lead_time_change,
+        "item_cost": cost_change,
+        "item_yeild": yield_change,
+        "item_hours": hours_change
     }
 
+    # Impacts for every item, then one batched pass over the whole cost table
+    with profile_stage(profiler, "assess_portfolio_impacts", len(st.session_state.attribute_df)):
+        impacts_df = assess_portfolio_impacts(st.session_state.attribute_df, percent_changes, new_attributes_df)
+    with profile_stage(profiler, "calculate_portfolio_evm", len(st.session_state.cost_df)):
+        combined_data_set_with_evm, evm_summary_data, item_summary_df = calculate_portfolio_evm(st.session_state.portfolio_index, impacts_df)
+
+    #Display charts in tabs; the EVM above is shared, and only the open tab builds its chart from it
+    tab1, tab2, tab3 = st.tabs([
+        "Cummulative Line Chart",
+        "Bubble Chart",
+        "Item Summary",
+        ],
+        key="portfolio_tab",
+        on_change="rerun"
+        )
+
+    with tab1: #Cummulative line chart
+        if tab1.open:
+            with profile_stage(profiler, "plot line chart", len(combined_data_set_with_evm)):
+                fig1 = plot_line_chart_with_percent_delta(combined_data_set_with_evm, evm_summary_data, "Baseline", "Modified", "")
+                st.plotly_chart(fig1, use_container_width=True)
+
+    with tab2: #Bubble chart
+        if tab2.open:
+            with profile_stage(profiler, "plot bubble chart", len(combined_data_set_with_evm)):
+                fig2 = plot_bubble_chart(combined_data_set_with_evm)
+                st.plotly_chart(fig2, use_container_width=True)
+
+    with tab3: #Items with the largest overrun first
+        if tab3.open:
+            st.dataframe(item_summary_df.sort_values('VAC'))
+
+    # PDF Generation
+    if st.button("Export and Download PDF", key="export_pdf"):
+        chart_details = f"Modified Attributes (all items): {yield_change:+}% Yield, {cost_change:+}% item cost, {lead_time_change:+}% lead time, {hours_change:+}% hours"
+        if new_attributes_df is not None:
+            chart_details += f"\nPer-item values from {per_item_file.name}"
+        from evm_calc.report import export_report_pdf, scenario_drawings
+        with profile_stage(profiler, "PDF export", len(combined_data_set_with_evm)):
+            drawings = scenario_drawings(combined_data_set_with_evm, evm_summary_data)
+            pdf_buffer = export_report_pdf([("Modified Cost Profile for all items", chart_details, drawings)])
+
+        if pdf_buffer:
+            st.success("PDF generated successfully!")
+            st.download_button(
+                label="Click here to download your PDF",
+                data=pdf_buffer,
+                file_name="charts.pdf",
+                mime="application/pdf",
+                key="download_button"
+            )
+        else:
+            st.error("PDF generation failed. Please check your input.")
+
+def show_wbs_screen(profiler=None):
+    """Displays the EVM of any node of a WBS hierarchy, with attribute changes made one item at a time"""
+    hierarchy_file = st.sidebar.file_uploader("WBS hierarchy file (Item Number, then Assembly, Subsystem, Program or other levels from the item up)", type=['csv', 'xlsx', 'parquet', 'arrow', 'feather'], key="hierarchy_file")
+    if hierarchy_file is not None and st.session_state.get('hierarchy_file_id') != hierarchy_file.file_id:
+        try:
+            hierarchy_df, report = load_data_file(hierarchy_file, HIERARCHY_SCHEMA)
+        except Exception as e:
+            st.error(f"Error: {e}")
+            return
+        if report['missing_columns'] or not hierarchy_levels(hierarchy_df):
+            st.error("required columns: Item Number and at least one level (such as Assembly)")
+            return
+        st.session_state.hierarchy_df = hierarchy_df
+        st.session_state.hierarchy_file_id = hierarchy_file.file_id
+        st.session_state.wbs_rollup = None
+    if st.session_state.hierarchy_df is None:
+        st.info("Upload a hierarchy file listing each item's assembly, subsystem and program to roll the costs up the WBS.")
+        return
+
+    # The node totals are summed once; the item changes made so far are applied again after a new file or append
+    if st.session_state.wbs_rollup is None:
+        if st.session_state.portfolio_index is None:
+            st.session_state.portfolio_index = shared_dataset_value('portfolio_index', build_portfolio_index)
+        with profile_stage(profiler, "build WBS roll-up", len(st.session_state.cost_df)):
+            rollup = WbsRollup(st.session_state.portfolio_index, st.session_state.hierarchy_df)
+            for item_number, user_attributes_dictionary in st.session_state.wbs_attributes.items():
+                if item_number in rollup.item_codes:
+                    item_attributes = filter_data(st.session_state.attribute_df, item_number, st.session_state.attribute_item_offsets)
+                    rollup.update_item(item_number, assess_impacts(item_attributes, user_attributes_dictionary))
+        st.session_state.wbs_rollup = rollup
+    rollup = st.session_state.wbs_rollup
+
+    # Nodes are listed depth first and indented by level
+    tree = rollup.tree
+    node_depths = dict(zip(tree['node_names'], tree['depths']))
+    node = st.sidebar.selectbox("WBS node", [None, *tree['node_names']], format_func=lambda name: "All items" if name is None else "\u2003" * node_depths[name] + name.split(" / ")[-1])
+
+    # One item under the node is changed at a time; only that item and its ancestors are summed again
+    st.sidebar.write("Change an item")
+    item_number = st.sidebar.selectbox("Item", rollup.node_items(node), key="wbs_item")
+    item_attributes = filter_data(st.session_state.attribute_df, item_number, st.session_state.attribute_item_offsets)
+    if item_attributes.empty:
+        st.sidebar.warning("No matching attributes found for the selected item.")
+    else:
+        base_values = base_slider_values(item_attributes)
+        base_values['item_lead_time'] = int(base_values['item_lead_time'])  # The lead time slider moves in whole days
+        values = st.session_state.wbs_attributes.get(item_number, base_values)
+        default_cost, default_lead_time = item_attributes['Cost'].values[0], item_attributes['Lead Time'].values[0]
+        user_attributes_dictionary = {
+            "item_cost": st.sidebar.slider(f"Material Cost (default: ${default_cost})", min_value=0.0, max_value=float(10 * default_cost), value=float(values['item_cost']), key=f"wbs_cost_{item_number}"),
+            "item_lead_time": st.sidebar.slider(f"Lead Time (default: {default_lead_time})", min_value=0, max_value=int(10 * default_lead_time), value=int(values['item_lead_time']), key=f"wbs_lead_time_{item_number}"),
+            "item_yeild": st.sidebar.slider(f"Yield (default: {item_attributes['Yield'].values[0]})", min_value=0.0, max_value=1.0, value=float(values['item_yeild']), key=f"wbs_yield_{item_number}"),
+            "item_hours": st.sidebar.slider(f"Hours (default: {item_attributes['Hours'].values[0]})", min_value=0.0, max_value=10.0, value=float(values['item_hours']), key=f"wbs_hours_{item_number}"),
+        }
+        if user_attributes_dictionary != values:
+            start, stop = st.session_state.cost_item_offsets[item_number]
+            with profile_stage(profiler, "WBS item update", stop - start):
+                rollup.update_item(item_number, assess_impacts(item_attributes, user_attributes_dictionary))
+            st.session_state.wbs_attributes[item_number] = user_attributes_dictionary
+    st.sidebar.button("Reset all items", key="wbs_reset", on_click=reset_wbs_items)
+    st.sidebar.caption(f"{len(st.session_state.wbs_attributes):,} items changed")
+
+    with profile_stage(profiler, "node EVM", rollup.item_initial.shape[1]):
+        combined_data_set_with_evm, evm_summary_data = rollup.node_evm(node)
+
+    #Display charts in tabs; only the open tab builds its chart
+    tab1, tab2, tab3 = st.tabs([
+        "Cummulative Line Chart",
+        "Bubble Chart",
+        "Breakdown",
+        ],
+        key="wbs_tab",
+        on_change="rerun"
+        )
+
+    with tab1: #Cummulative line chart
+        if tab1.open:
+            with profile_stage(profiler, "plot line chart", len(combined_data_set_with_evm)):
+                fig1 = plot_line_chart_with_percent_delta(combined_data_set_with_evm, evm_summary_data, "Baseline", "Modified", "All items" if node is None else node)
+                st.plotly_chart(fig1, use_container_width=True)
+
+    with tab2: #Bubble chart
+        if tab2.open:
+            with profile_stage(profiler, "plot bubble chart", len(combined_data_set_with_evm)):
+                fig2 = plot_bubble_chart(combined_data_set_with_evm)
+                st.plotly_chart(fig2, use_container_width=True)
+
+    with tab3: #The node's children, largest overrun first
+        if tab3.open:
+            st.dataframe(rollup.children_summary(node).sort_values('VAC'))
+
+def reset_wbs_items():
+    """Puts every item of the WBS roll-up back to its own attribute values, sliders included"""
+    st.session_state.wbs_rollup.reset()
+    st.session_state.wbs_attributes = {}
+    for key in [key for key in st.session_state if str(key).startswith(('wbs_cost_', 'wbs_lead_time_', 'wbs_yield_', 'wbs_hours_'))]:
+        del st.session_state[key]
+
+def show_versions_screen(profiler=None):
+    """Displays the EVM of one baseline version against another, and of every version against the base version"""
+    snapshot_index = st.session_state.snapshot_index
+    versions = list(snapshot_index['versions'])
+
+    # The base version is the plan the current version is measured against
+    base_version = st.sidebar.selectbox("Base version", versions, index=0)
+    current_version = st.sidebar.selectbox("Current version", versions, index=len(versions) - 1)
+    item_choice = st.sidebar.selectbox("Item", ["All items", *snapshot_index['item_numbers']])
+    item_number = None if item_choice == "All items" else item_choice
+
+    # Both versions come from the bucketed snapshot totals, so no cost rows are read again
+    with profile_stage(profiler, "compare_versions", len(snapshot_index['cell_costs'])):
+        combined_data_set_with_evm, evm_summary_data, item_summary_df = compare_versions(snapshot_index, base_version, current_version, item_number)
+
+    #Display charts in tabs; only the open tab is computed
+    tab1, tab2, tab3 = st.tabs([
+        "Cummulative Line Chart",
+        "Version Trend",
+        "Item Summary",
+        ],
+        key="versions_tab",
+        on_change="rerun"
+        )
 
+    with tab1: #Cummulative line chart of the two versions
+        if tab1.open:
+            if evm_summary_data['BAC'] == 0:
+                st.info(f"{item_choice} has no cost in version {base_version}.")
+            else:
+                with profile_stage(profiler, "plot line chart", len(combined_data_set_with_evm)):
+                    fig = plot_line_chart_with_percent_delta(combined_data_set_with_evm, evm_summary_data, base_version, current_version, "")
+                    st.plotly_chart(fig, use_container_width=True)
 
+    with tab2: #Every version against the base version
+        if tab2.open:
+            with profile_stage(profiler, "version_trend", len(versions)):
+                trend_df = version_trend(snapshot_index, base_version, item_number)
+            st.plotly_chart(plot_version_trend(trend_df, base_version), use_container_width=True)
+            st.dataframe(trend_df)
+
+    with tab3: #Items with the largest overrun first
+        if tab3.open:
+            st.dataframe(item_summary_df.sort_values('VAC'))
+
+def generate_charts(
+        cost_df,
+        attributes_df, 
+        user_attributes_dictionary,
+        chart_type="line_chart",
+        item_number="",
+        cost_item_offsets=None,
+        attribute_item_offsets=None,
+        baseline_monthly=None,
+        scenario_cache=None,
+        granularity="month",
+        evaluators=None,
+        profiler=None
+        ):
+    """generates a line and bubble line chart"""
+
+    #Run the scenario pipeline (or reuse the cached result for the same item and slider values)
+    combined_data_set_with_evm, evm_summary_data = run_scenario(
+        cost_df,
+        attributes_df,
+        user_attributes_dictionary,
+        item_number=item_number,
+        cost_item_offsets=cost_item_offsets,
+        attribute_item_offsets=attribute_item_offsets,
+        baseline_monthly=baseline_monthly,
+        scenario_cache=scenario_cache,
+        granularity=granularity,
+        evaluators=evaluators,
+        profiler=profiler
+        )
+    
+    # Plot the relevant chart based on the chart type
+    if chart_type == "line_chart":
+        with profile_stage(profiler, "plot line chart", len(combined_data_set_with_evm)):
+            fig = plot_line_chart_with_percent_delta(combined_data_set_with_evm, evm_summary_data, "Baseline", "Modified", "")
+            st.plotly_chart(fig, use_container_width=True)
+    elif chart_type == "bubble_chart":
+        with profile_stage(profiler, "plot bubble chart", len(combined_data_set_with_evm)):
+            fig = plot_bubble_chart(combined_data_set_with_evm, granularity)
+            st.plotly_chart(fig, use_container_width=True)
 
-    return combined_data_set, evm_summary_data 
+    return fig
 
 def plot_line_chart_with_percent_delta(evm_data, evm_summary_data, data_label_1, data_label_2, chart_title):
     """creates a line chart with both datasets that displays EVM data"""
@@ -479,7 +1122,9 @@ def plot_line_chart_with_percent_delta(evm_data, evm_summary_data, data_label_1,
     BAC = evm_summary_data["BAC"]
     EAC = evm_summary_data["EAC"]
 
-    if (BAC-EAC)/BAC < .05 and (BAC-EAC)/BAC > 0: #BAC is greater but they are close together
+    if BAC == 0: #No baseline cost (an item or WBS node with nothing planned), so no labels to space apart
+        space_modifier = 0
+    elif (BAC-EAC)/BAC < .05 and (BAC-EAC)/BAC > 0: #BAC is greater but they are close together
         space_modifier = .01*BAC
     elif (BAC-EAC)/BAC > -0.05: #EAC is greater
         space_modifier = -.01*BAC
@@ -492,66 +1137,77 @@ def plot_line_chart_with_percent_delta(evm_data, evm_summary_data, data_label_1,
     #Calculate EAC
     EAC = max(y_values_2)
 
+    # Long series are downsampled for display; the points kept are exact points of both lines
+    display = display_indices([y_values_1, y_values_2], MAX_DISPLAY_POINTS)
+    x_values = x_values.to_numpy()[display]
+    y_values_1 = y_values_1.to_numpy()[display]
+    y_values_2 = y_values_2.to_numpy()[display]
+    customdata = evm_data[['Schedule_Percent_Complete', 'Percent_Complete', 'AC_to_Date', 'Earned_Value', 'Schedule_Variance', 'Cost_Variance', 'PV_to_Date']].to_numpy()[display]
 
-    # Create the figure
-    fig = go.Figure()
+    # WebGL draws many points faster than SVG
+    scatter = go.Scattergl if len(display) > WEBGL_POINT_THRESHOLD else go.Scatter
+
+    # Create the figure from the cached layout, so only the traces and annotations are new
+    fig = go.Figure(layout=line_chart_layout())
 
     # Add the first line (hoverinfo='skip' ensures it doesn't show on hover)
-    fig.add_trace(go.Scatter(x=x_values, 
-                             y=y_values_1, 
-                             mode='lines', 
-                             name=data_label_1, 
-                             line=dict(color='blue'),
-                             showlegend=False,
-                             hoverinfo='skip'))  # Skip hover for this line
+    fig.add_trace(scatter(x=x_values, 
+                          y=y_values_1, 
+                          mode='lines', 
+                          name=data_label_1, 
+                          line=dict(color='blue'),
+                          showlegend=False,
+                          hoverinfo='skip'))  # Skip hover for this line
 
 
     # Add the second line (hoverinfo='skip' ensures it doesn't show on hover)
-    fig.add_trace(go.Scatter(x=x_values, 
-                             y=y_values_2, 
-                             mode='lines', 
-                             name=data_label_2, 
-                             line=dict(color='green', 
-                                       dash='dash'),
-                             showlegend=False,
-                             hoverinfo='skip'))  # Skip hover for this line
-
-
-    fig.add_annotation(
-        x=1.01,  # Position outside the plot area (in paper coordinates)        
-        y=BAC+space_modifier,
-        text=f'BAC ${BAC:,.2f}',
-        showarrow=False,
-        yref = 'y',
-        xref='paper',  # Reference the figure's width, not the data coordinates        
-        xanchor="left",  # Align text to the left of the annotation point
-        yanchor="middle",
-        font=dict(
-            color='blue'  # Set the font color to blue
-        )
-    )
-    fig.add_annotation(
-        x=1.01,
-        y=EAC-space_modifier,
-        text=f'EAC ${EAC:,.2f}',
-        showarrow=False,
-        yref = 'y',
-        xref='paper',  # Reference the figure's width, not the data coordinates
-        xanchor="left",  # Align text to the left of the annotation point
-        yanchor="middle",
-        font=dict(
-            color='green'  # Set the font color to blue
-        )
-    )
+    fig.add_trace(scatter(x=x_values, 
+                          y=y_values_2, 
+                          mode='lines', 
+                          name=data_label_2, 
+                          line=dict(color='green', 
+                                    dash='dash'),
+                          showlegend=False,
+                          hoverinfo='skip'))  # Skip hover for this line
+
+
+    fig.layout.annotations = [
+        dict(
+            x=1.01,  # Position outside the plot area (in paper coordinates)        
+            y=BAC+space_modifier,
+            text=f'BAC ${BAC:,.2f}',
+            showarrow=False,
+            yref = 'y',
+            xref='paper',  # Reference the figure's width, not the data coordinates        
+            xanchor="left",  # Align text to the left of the annotation point
+            yanchor="middle",
+            font=dict(
+                color='blue'  # Set the font color to blue
+            )
+        ),
+        dict(
+            x=1.01,
+            y=EAC-space_modifier,
+            text=f'EAC ${EAC:,.2f}',
+            showarrow=False,
+            yref = 'y',
+            xref='paper',  # Reference the figure's width, not the data coordinates
+            xanchor="left",  # Align text to the left of the annotation point
+            yanchor="middle",
+            font=dict(
+                color='green'  # Set the font color to blue
+            )
+        ),
+    ]
     
 
    # Add a third trace for hover text with the percent delta only
-    fig.add_trace(go.Scatter(
+    fig.add_trace(scatter(
         x=x_values, 
         y=y_values_1, 
         mode='lines',
         line=dict(color='rgba(0,0,0,0)'), # Set the line color to transparent
-        customdata=evm_data[['Schedule_Percent_Complete', 'Percent_Complete', 'AC_to_Date', 'Earned_Value', 'Schedule_Variance', 'Cost_Variance', 'PV_to_Date']],        
+        customdata=customdata,        
         hovertemplate=(
             'Cummulative to date metrics<br>'
             '   Planned value to date: $%{customdata[6]:,.2f}<br>'
@@ -568,8 +1224,12 @@ def plot_line_chart_with_percent_delta(evm_data, evm_summary_data, data_label_1,
         ,        
         showlegend=False))  # No legend entry for this trace
 
-    # Customize the layout
-    fig.update_layout(
+    return fig
+
+@functools.lru_cache(maxsize=None)
+def line_chart_layout():
+    """the cumulative line chart layout, built once and reused by every chart"""
+    layout = go.Layout(
         title='Cummulative Cost Profile',
         height = 600,
         hovermode='x unified',
@@ -590,7 +1250,7 @@ def plot_line_chart_with_percent_delta(evm_data, evm_summary_data, data_label_1,
     )
 
     #format axis
-    fig.update_xaxes(
+    layout.xaxis.update(
         tickformat='%Y-%m',  # Format for datetime tick marks
         tickmode='auto',        # Automatically determine the number of ticks
         tickangle=0,           # Angle of the tick labels
@@ -599,42 +1259,57 @@ def plot_line_chart_with_percent_delta(evm_data, evm_summary_data, data_label_1,
         tickfont=dict(color='black')      # Title of the x-axis
         )
 
-    fig.update_yaxes(
+    layout.yaxis.update(
         tickformat='$,.2f',  # Format for datetime tick marks
         tickmode='auto',        # Automatically determine the number of ticks
         title_font=dict(color='black'),  # Explicitly set title font color
         tickfont=dict(color='black')      # Title of the x-axis
         )
 
-    return fig
+    return layout
 
-def plot_bubble_chart(data):
+def plot_bubble_chart(data, granularity="month"):
     """create a bubble chart based on both datasets"""
 
     df = pd.DataFrame(data)
 
-    # Create the bubble chart
-    fig = go.Figure()
+    # Long series are downsampled for display; the bubbles kept show exact period costs
+    display = display_indices([df['Initial_Costs'], df['Modified_Costs']], MAX_DISPLAY_POINTS)
+    dates = df['Date'].to_numpy()[display]
+    # A period can net to a negative cost; it is drawn at the minimum size, as in the PDF report
+    sizeref = 2.*max(df[['Initial_Costs', 'Modified_Costs']].clip(lower=0).values.flatten().max(), 1e-9)/(40.**2)  # Adjust this value to scale bubble sizes
+
+    # WebGL draws many points faster than SVG
+    scatter = go.Scattergl if 2 * len(display) > WEBGL_POINT_THRESHOLD else go.Scatter
+
+    # Create the bubble chart from the cached layout
+    fig = go.Figure(layout=bubble_chart_layout(granularity))
+
+    # Add baseline and current data, one trace each so each has a single color
+    for label, column, color in (('Baseline', 'Initial_Costs', 'blue'), ('Current', 'Modified_Costs', 'green')):
+        fig.add_trace(scatter(
+            x=dates,
+            y=[label] * len(display),
+            mode='markers',
+            marker=dict(
+                size=df[column].clip(lower=0).to_numpy()[display],  # Bubble size represents the cost
+                sizemode='area',
+                sizeref=sizeref,
+                sizemin=4,
+                color=color,
+                opacity=0.6
+            ),
+            customdata=df[column].to_numpy()[display],
+            hovertemplate='Date: %{x}<br>Cost: $%{customdata}<extra></extra>'  # Show cost value in hover text
+        ))
 
-    # Add baseline and current data
-    fig.add_trace(go.Scatter(
-        x=pd.concat([df['Date'], df['Date']]),
-        y=['Baseline'] * len(df) + ['Current'] * len(df),
-        mode='markers',
-        marker=dict(
-            size=pd.concat([df['Initial_Costs'], df['Modified_Costs']]),  # Bubble size represents the cost
-            sizemode='area',
-            sizeref=2.*max(df[['Initial_Costs', 'Modified_Costs']].values.flatten())/(40.**2),  # Adjust this value to scale bubble sizes
-            sizemin=4,
-            color=['blue'] * len(df) + ['green'] * len(df),
-            opacity=0.6
-        ),
-        hovertemplate='Date: %{x}<br>Cost: $%{marker.size}<extra></extra>'  # Show cost value in hover text
-    ))
+    return fig
 
-    # Customize the layout
-    fig.update_layout(
-        title='Cost Magnitudes by Month',
+@functools.lru_cache(maxsize=None)
+def bubble_chart_layout(granularity="month"):
+    """the bubble chart layout for a time period, built once and reused by every chart"""
+    layout = go.Layout(
+        title=f'Cost Magnitudes by {granularity.title()}',
         height = 600,
         xaxis_title='Date',
         yaxis_title='',
@@ -655,7 +1330,7 @@ def plot_bubble_chart(data):
         paper_bgcolor='white',
         showlegend=False  # Remove the legend
     )
-    fig.update_xaxes(
+    layout.xaxis.update(
         tickformat='%Y-%m',  # Format for datetime tick marks
         tickmode='auto',        # Automatically determine the number of ticks
         tickangle=0,           # Angle of the tick labels
@@ -663,55 +1338,142 @@ def plot_bubble_chart(data):
         tickfont=dict(color='black')      # Title of the x-axis
         )
 
-    fig.update_yaxes(
+    layout.yaxis.update(
         tickmode='auto',        # Automatically determine the number of ticks
         title_font=dict(color='black'),  # Explicitly set title font color
         tickfont=dict(color='black')      # Title of the x-axis
         )
+    return layout
+
+def plot_tornado_chart(tornado_df, metric='EAC'):
+    """creates a tornado chart of how far each attribute's range moves the metric from its base value"""
+
+    base_value = tornado_df[f'Base_{metric}'].iloc[0]
+
+    # Widest swing at the top
+    tornado_df = tornado_df.iloc[::-1]
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=tornado_df['Attribute'],
+        x=tornado_df[f'{metric}_Low'] - base_value,
+        base=base_value,
+        orientation='h',
+        name='Low value',
+        marker_color='blue',
+        customdata=tornado_df['Low_Value'],
+        hovertemplate=f'%{{y}} at %{{customdata:,.2f}}<br>{metric}: $%{{x:,.2f}}<extra></extra>'
+    ))
+    fig.add_trace(go.Bar(
+        y=tornado_df['Attribute'],
+        x=tornado_df[f'{metric}_High'] - base_value,
+        base=base_value,
+        orientation='h',
+        name='High value',
+        marker_color='green',
+        customdata=tornado_df['High_Value'],
+        hovertemplate=f'%{{y}} at %{{customdata:,.2f}}<br>{metric}: $%{{x:,.2f}}<extra></extra>'
+    ))
+
+    # Customize the layout
+    fig.update_layout(
+        title=f'{metric} Sensitivity',
+        height=400,
+        barmode='overlay',
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis=dict(showgrid=True, gridcolor='lightgray', tickformat='$,.0f', title_text=metric),
+    )
+    fig.add_vline(x=base_value, line_color='black', line_dash='dash')
+
     return fig
 
-def export_charts_to_pdf(chart1, chart2, title, settings_text):
-    # Create an in-memory bytes buffer for the PDF
-    pdf_buffer = io.BytesIO()
+def plot_response_surface(x_values, y_values, z_values, x_label, y_label, metric):
+    """creates a contour chart of a metric over a grid of two attributes"""
 
-    # Initialize a PDF canvas
-    c = canvas.Canvas(pdf_buffer, pagesize=letter)
-    height = letter
+    fig = go.Figure(go.Contour(
+        x=x_values,
+        y=y_values,
+        z=z_values,
+        colorscale='RdBu_r',
+        colorbar=dict(title=metric, tickformat='$,.0f'),
+        hovertemplate=f'{x_label}: %{{x:,.2f}}<br>{y_label}: %{{y:,.2f}}<br>{metric}: $%{{z:,.2f}}<extra></extra>'
+    ))
 
-    # Add title to the PDF
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(72, height - 72, title)
+    # Customize the layout
+    fig.update_layout(
+        title=f'{metric} Response Surface',
+        height=450,
+        xaxis_title=x_label,
+        yaxis_title=y_label,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+    )
+
+    return fig
 
-    # Add settings text
-    c.setFont("Helvetica", 9)
-    text_y = height - 100
-    for line in settings_text.split('\n'):
-        c.drawString(72, text_y, line)
-        text_y -= 14
+def plot_s_curve(curve_df, percentiles_df, metric):
+    """creates a cumulative probability (S-curve) chart with the percentile values marked"""
 
-    # Convert Plotly charts to images
-    chart1_img = Image.open(io.BytesIO(chart1.to_image(format="png", width=1200, height=600, scale=2)))
-    chart2_img = Image.open(io.BytesIO(chart2.to_image(format="png", width=1200, height=600, scale=2)))
+    is_date = metric == 'Modified_Finish'
+    title = 'Finish Date' if is_date else metric
+    value_format = '%{x|%b %Y}' if is_date else '$%{x:,.2f}'
+
+    fig = go.Figure(go.Scatter(
+        x=curve_df['Value'],
+        y=curve_df['Probability'],
+        mode='lines',
+        line=dict(color='green', width=2, shape='hv' if is_date else 'linear'),
+        name=title,
+        hovertemplate=f'{title}: {value_format}<br>Probability: %{{y:.0%}}<extra></extra>'
+    ))
 
-    # Add the first chart image to the PDF
-    chart1_reader = ImageReader(chart1_img)
-    c.drawImage(chart1_reader, 72, text_y - 300, width=500, height=250)
+    # Mark the percentiles (P10/P50/P90)
+    for _, row in percentiles_df.iterrows():
+        fig.add_vline(x=row[metric], line_color='gray', line_dash='dash', annotation_text=row['Percentile'])
 
-    # Add the second chart image to the PDF
-    chart2_reader = ImageReader(chart2_img)
-    c.drawImage(chart2_reader, 72, text_y - 600, width=500, height=250)
+    # Customize the layout
+    fig.update_layout(
+        title=f'{title} S-Curve',
+        height=400,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        yaxis=dict(showgrid=True, gridcolor='lightgray', tickformat='.0%', title_text='Probability', range=[0, 1]),
+        xaxis=dict(showgrid=True, gridcolor='lightgray', tickformat='%b %Y' if is_date else '$,.0f', title_text=title),
+    )
 
-    # Finalize and save the PDF
-    c.showPage()
-    c.save()
+    return fig
 
-    # Reset buffer position
-    pdf_buffer.seek(0)
-    return pdf_buffer
+def plot_version_trend(trend_df, reference_version):
+    """creates a chart of the EAC of each version with the reference version's BAC marked"""
+    fig = go.Figure(go.Scatter(
+        x=trend_df.index,
+        y=trend_df['EAC'],
+        mode='lines+markers',
+        line=dict(color='green'),
+        customdata=trend_df[['VAC']].to_numpy(),
+        hovertemplate='Version: %{x}<br>EAC: $%{y:,.2f}<br>VAC: $%{customdata[0]:,.2f}<extra></extra>'
+    ))
+    fig.add_hline(y=trend_df['BAC'].iloc[0], line_color='blue', line_dash='dash', annotation_text=f'BAC ({reference_version})')
 
+    # Customize the layout
+    fig.update_layout(
+        title='EAC by Version',
+        height=400,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        yaxis=dict(showgrid=True, gridcolor='lightgray', tickformat='$,.0f', title_text='EAC'),
+        xaxis=dict(type='category', title_text='Version'),
+    )
 
+    return fig
 
 # Run the app
 if __name__ == "__main__":
-    # Ensure the script runs as a Streamlit app
-    os.system(f"{sys.executable} -m streamlit run {__file__}")
+    if st.runtime.exists():
+        main()
+    else:
+        # Started with python main.py: run the Streamlit server in this process rather than starting another one
+        from streamlit.web import cli as stcli
+        sys.argv = ["streamlit", "run", __file__]
+        sys.exit(stcli.main())